@@ -0,0 +1,75 @@
+"""
+住所の地域判定の速度比較 (47都道府県を順に startswith vs 先頭2文字の辞書)
+
+実行方法:
+    python benchmarks/bench_address_region.py [住所数]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from address_region import PREFECTURES, classify_region, classify_regions  # noqa: E402
+
+
+def legacy_extract_prefecture(address):
+    """変更前の extract_prefecture (呼び出しごとにリストを作成し、順に startswith)"""
+    prefectures = list(PREFECTURES)
+    for prefecture in prefectures:
+        if address.startswith(prefecture):
+            return prefecture
+    return ""
+
+
+def legacy_classify(address):
+    """変更前の is_chubu_address / is_kansai_address (呼び出し側でリストを作成)"""
+    chubu_addresses = ["静岡県", "岐阜県", "長野県", "愛知県", "新潟県", "三重県", "富山県", "石川県"]
+    kansai_addresses = ["大阪府", "京都府", "兵庫県", "滋賀県", "和歌山県", "奈良県"]
+    if legacy_extract_prefecture(address) in chubu_addresses:
+        return "中部"
+    if legacy_extract_prefecture(address) in kansai_addresses:
+        return "関西"
+    return ""
+
+
+def make_addresses(count, rng):
+    """都道府県付きの住所に、都道府県を省略した住所や空欄を混ぜる"""
+    cities = ["名古屋市中区栄1-2-3", "大阪市北区梅田4-5-6", "札幌市中央区北1条", "那覇市泉崎1-1"]
+    addresses = []
+    for _ in range(count):
+        r = rng.random()
+        if r < 0.9:
+            addresses.append(rng.choice(PREFECTURES) + rng.choice(cities))
+        elif r < 0.97:
+            addresses.append(rng.choice(cities))
+        else:
+            addresses.append("")
+    return addresses
+
+
+def timed(func, *args):
+    start_time = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start_time, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    addresses = make_addresses(count, random.Random(0))
+
+    t_legacy, expected = timed(lambda values: [legacy_classify(a) for a in values], addresses)
+    t_single, single = timed(lambda values: [classify_region(a) for a in values], addresses)
+    t_batch, batch = timed(classify_regions, addresses)
+    assert single == expected and batch == expected
+
+    print(f"{count:,}件の住所")
+    print(f"変更前 (順に startswith)   : {t_legacy:.3f}秒")
+    print(f"classify_region (1件ずつ)  : {t_single:.3f}秒 ({t_legacy / t_single:.1f}倍)")
+    print(f"classify_regions (一括)    : {t_batch:.3f}秒 ({t_legacy / t_batch:.1f}倍, {count / t_batch:,.0f} 件/秒)")
+
+
+if __name__ == "__main__":
+    main()
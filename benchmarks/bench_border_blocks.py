@@ -0,0 +1,103 @@
+"""
+罫線フェーズの速度比較 (行ごとのブロック判定 + セル単位の罫線 vs ランレングス検出 + 範囲単位の罫線)
+
+実行方法:
+    python benchmarks/bench_border_blocks.py [行数]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import openpyxl  # noqa: E402
+from openpyxl.styles import Border  # noqa: E402
+from openpyxl.xml.functions import tostring  # noqa: E402
+
+from border_blocks import apply_block_borders, find_border_blocks, side_hair, side_thin  # noqa: E402
+
+
+def make_sheet(rows):
+    """A列に番号・G行・空行が混在する線番表風のシートを作成する"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for r in range(1, rows + 1):
+        m = r % 12
+        if m == 0:
+            value = None
+        elif m == 1:
+            value = f"G{r}"
+        elif m == 7:
+            value = "備考"
+        else:
+            value = m
+        sheet.cell(row=r, column=1, value=value)
+        sheet.cell(row=r, column=2, value=f"B{r}")
+    return workbook, sheet
+
+
+def legacy_set_borders_for_range(sheet, start_row, end_row):
+    """変更前の set_borders_for_range (セルごとに Border を生成)"""
+    for r_idx in range(start_row, end_row + 1):
+        for c_idx in range(1, 10):
+            top_style = side_thin if r_idx == start_row else side_hair
+            bottom_style = side_thin if r_idx == end_row else side_hair
+            sheet.cell(row=r_idx, column=c_idx).border = Border(
+                left=side_thin, right=side_thin, top=top_style, bottom=bottom_style)
+
+
+def legacy_border_phase(sheet, rows):
+    """変更前: 1行ずつ判定し、ブロックが終わるたびに罫線を設定"""
+    border_start_row = 0
+    border_end_row = 0
+    for i in range(1, rows + 1):
+        a_value = sheet.cell(row=i, column=1).value
+        is_target_row = False
+        if isinstance(a_value, str) and a_value.strip().upper().startswith("G"):
+            is_target_row = True
+        elif isinstance(a_value, (int, float)) and 1 <= a_value <= 99 and int(a_value) == a_value:
+            is_target_row = True
+        if is_target_row:
+            if border_start_row == 0:
+                border_start_row = i
+            border_end_row = i
+        elif border_start_row > 0:
+            legacy_set_borders_for_range(sheet, border_start_row, border_end_row)
+            border_start_row = 0
+            border_end_row = 0
+    if border_start_row > 0:
+        legacy_set_borders_for_range(sheet, border_start_row, border_end_row)
+
+
+def new_border_phase(sheet, rows):
+    """変更後: A列をまとめて読み、ブロック単位で範囲適用"""
+    a_values = [row[0] for row in sheet.iter_rows(min_row=1, max_row=rows, min_col=1, max_col=1, values_only=True)]
+    apply_block_borders(sheet, find_border_blocks(a_values))
+
+
+def timed(func, *args):
+    start_time = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start_time
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    _, sheet_a = make_sheet(rows)
+    _, sheet_b = make_sheet(rows)
+
+    t_legacy = timed(legacy_border_phase, sheet_a, rows)
+    t_new = timed(new_border_phase, sheet_b, rows)
+
+    # 全セルの罫線が一致することを確認
+    for r in range(1, rows + 1):
+        for c in range(1, 10):
+            assert tostring(sheet_a.cell(r, c).border.to_tree()) == tostring(sheet_b.cell(r, c).border.to_tree()), (r, c)
+
+    print(f"{rows}行 (A〜I列)")
+    print(f"罫線フェーズ: 変更前 {t_legacy:.3f}秒 / 変更後 {t_new:.3f}秒 ({t_legacy / t_new:.1f}倍)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+名前定義の値取得で発生する COM 呼び出し回数の比較 (名前ごとに Range vs DefinedNameSnapshot)
+
+Excel を使わず、呼び出し回数を数える代替オブジェクト (tests/fake_com.py) で計測します。
+実際の COM 呼び出しは1回あたり数ミリ秒かかるため、回数がそのまま所要時間の目安になります。
+
+実行方法:
+    python benchmarks/bench_defined_names.py [名前の数] [シート数]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests"))
+
+from openpyxl.utils.cell import get_column_letter  # noqa: E402
+
+from defined_name_snapshot import DefinedNameSnapshot  # noqa: E402
+from fake_com import FakeCom, FakeExcel, FakeWorkbook, legacy_defined_name_lookup  # noqa: E402
+
+# save_starred_xlsx で参照する名前
+LOOKUP_NAMES = ["HOUSES.BUILDING_NO", "HOUSES.BUILDING_NAME", "ADD_NAME1", "ADD_NAME2", "HOUSES.ADDRESS",
+                "HOUSES.TENTATIVE_NAME", "HOUSES.SERVICE_ID", "HOUSES.BUILDING_STATE"]
+
+
+def make_workbook(name_count, sheet_count):
+    """情報シートに名前付きセルが並び、各シートにシートレベルの名前があるブックを作成する"""
+    com = FakeCom()
+    workbook = FakeWorkbook(com)
+    for index in range(sheet_count):
+        workbook.add_sheet("情報" if index == 0 else f"シート{index}")
+    info = workbook.sheets[0]
+
+    fixed = {"HOUSES.BUILDING_NO": 12345, "HOUSES.BUILDING_NAME": "テストマンション", "ADD_NAME2": "報告書",
+             "HOUSES.ADDRESS": "愛知県名古屋市", "HOUSES.TENTATIVE_NAME": "", "HOUSES.SERVICE_ID": "FOO",
+             "HOUSES.BUILDING_STATE": "新築", "ADD_NAME1": None}
+    names = list(fixed) + [f"HOUSES.FIELD_{i}" for i in range(max(0, name_count - len(fixed)))]
+    for i, name in enumerate(names):
+        row, col = 2 + i % 60, 2 + (i // 60) * 3
+        info.cells[(row, col)] = fixed.get(name, f"値{i}")
+        workbook.add_name(name, f"=情報!${get_column_letter(col)}${row}")
+    workbook.add_name("TAX_RATE", "=0.1") # 定数の名前 (Range で取得)
+
+    for sheet in workbook.sheets[1:]:
+        sheet.cells[(1, 1)] = f"{sheet.title} の印刷範囲"
+        workbook.add_name(f"{sheet.title}!Print_Area", f"={sheet.title}!$A$1:$H$40")
+    return com, workbook
+
+
+def legacy_lookup(excel, wb):
+    """変更前の save_starred_xlsx と同じ手順 (名前定義の辞書作成 + 名前ごとに Range)"""
+    return legacy_defined_name_lookup(excel, wb, LOOKUP_NAMES + ["TAX_RATE"])
+
+
+def snapshot_lookup(excel, wb, active_sheet, names=None):
+    snapshot = DefinedNameSnapshot.capture(excel, wb, active_sheet, names)
+    return {name: snapshot.get(name) for name in LOOKUP_NAMES + ["TAX_RATE"]}
+
+
+def main():
+    name_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sheet_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    com, wb = make_workbook(name_count, sheet_count)
+    excel = FakeExcel(com, wb, wb.sheets[0])
+    expected = legacy_lookup(excel, wb)
+    legacy_calls = com.calls
+
+    com.calls = 0
+    values = snapshot_lookup(excel, wb, wb.sheets[0])
+    all_names_calls = com.calls
+    assert values == expected, (values, expected)
+
+    com.calls = 0
+    values = snapshot_lookup(excel, wb, wb.sheets[0], LOOKUP_NAMES + ["TAX_RATE"])
+    wanted_names_calls = com.calls
+    assert values == expected, (values, expected)
+
+    print(f"名前 {len(wb.names)} 件 / シート {sheet_count} 枚 / 取得する名前 {len(expected)} 件")
+    print(f"COM呼び出し回数: 変更前 {legacy_calls} 回")
+    print(f"  スナップショット (全名前を列挙)  : {all_names_calls} 回 ({legacy_calls / all_names_calls:.1f}分の1)")
+    print(f"  スナップショット (使う名前を指定): {wanted_names_calls} 回 ({legacy_calls / wanted_names_calls:.1f}分の1)")
+
+
+if __name__ == "__main__":
+    main()
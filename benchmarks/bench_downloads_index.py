@@ -0,0 +1,69 @@
+"""
+ダウンロードフォルダの写真ZIP検索の速度比較 (ブックごとに glob.glob vs DownloadsIndex)
+
+実行方法:
+    python benchmarks/bench_downloads_index.py [ファイル数] [検索回数]
+"""
+
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+os.environ.setdefault("EXCEL_AUTOMATION_STORE", tempfile.mkdtemp(prefix="bench_store_"))
+
+from downloads_index import DownloadsIndex  # noqa: E402
+
+
+def make_downloads(folder, count, rng):
+    """ZIP と、それ以外のダウンロードファイル (PDF / xlsx / 画像) が混在するフォルダを作成する"""
+    numbers = []
+    for index in range(count):
+        number = str(100000 + index)
+        ext = rng.choice([".zip", ".pdf", ".xlsx", ".jpg"])
+        open(os.path.join(folder, f"{number}_案件{index}{ext}"), "wb").close()
+        if ext == ".zip":
+            numbers.append(number)
+    return numbers
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as folder:
+        numbers = make_downloads(folder, count, rng)
+        queries = [rng.choice(numbers) for _ in range(lookups)]
+
+        start_time = time.perf_counter()
+        expected = []
+        for number in queries:
+            zip_files = glob.glob(os.path.join(folder, f"{number}*.zip"))
+            expected.append(zip_files[0] if zip_files else None)
+        t_glob = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        index = DownloadsIndex(folder)
+        found = [index.find_newest(number) for number in queries]
+        t_first = time.perf_counter() - start_time
+        assert found == expected
+
+        start_time = time.perf_counter()
+        index = DownloadsIndex(folder) # 保存した索引を読み込む (次回の実行に相当)
+        found = [index.find_newest(number) for number in queries]
+        t_reload = time.perf_counter() - start_time
+        assert found == expected
+
+    print(f"ファイル {count} 件 / ZIP {len(numbers)} 件 / 検索 {lookups} 回")
+    print(f"glob.glob (検索ごとに走査) : {t_glob:.3f}秒")
+    print(f"DownloadsIndex (初回走査)  : {t_first:.3f}秒 ({t_glob / t_first:.1f}倍)")
+    print(f"DownloadsIndex (保存済み)  : {t_reload:.3f}秒 ({t_glob / t_reload:.1f}倍)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+格納ファイルのコピー速度比較 (shutil.copy2 を順に実行 vs file_transfer.run_transfers)
+
+xlsx / PDF / 写真ZIP 相当のファイルを格納先フォルダへコピーし、
+1回目 (格納先が空) と 2回目 (格納先に同じ内容のファイルがある) の所要時間を比べます。
+ネットワーク共有上のフォルダを格納先に指定すると、同時コピーの効果が分かりやすくなります。
+
+実行方法:
+    python benchmarks/bench_file_transfer.py [格納先フォルダ] [組数]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from file_transfer import Transfer, run_transfers  # noqa: E402
+
+# 1組あたりのファイルサイズ (xlsx, PDF, 写真ZIP)
+FILE_SIZES = [(".xlsx", 2 * 1024 * 1024), (".pdf", 5 * 1024 * 1024), (".zip", 40 * 1024 * 1024)]
+
+
+def make_sources(folder, sets):
+    sources = []
+    for index in range(sets):
+        for ext, size in FILE_SIZES:
+            path = os.path.join(folder, f"報告書{index}{ext}")
+            with open(path, "wb") as f:
+                f.write(os.urandom(size))
+            sources.append(path)
+    return sources
+
+
+def legacy_copy(sources, dest):
+    for source in sources:
+        shutil.copy2(source, os.path.join(dest, os.path.basename(source)))
+
+
+def main():
+    dest_root = sys.argv[1] if len(sys.argv) > 1 else None
+    sets = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory(dir=dest_root) as dest_dir:
+        sources = make_sources(source_dir, sets)
+        total = sum(os.path.getsize(path) for path in sources)
+        legacy_dest = os.path.join(dest_dir, "legacy")
+        new_dest = os.path.join(dest_dir, "transfer")
+        os.makedirs(legacy_dest)
+        os.makedirs(new_dest)
+        transfers = [Transfer(path, os.path.join(new_dest, os.path.basename(path))) for path in sources]
+
+        print(f"{len(sources)} ファイル / {total / 1e6:.0f}MB")
+        for attempt in ("1回目 (格納先が空)", "2回目 (同じ内容が格納済み)"):
+            start_time = time.perf_counter()
+            legacy_copy(sources, legacy_dest)
+            t_legacy = time.perf_counter() - start_time
+            _, stats = run_transfers(transfers)
+            print(f"{attempt}: 変更前 {t_legacy:.3f}秒 / run_transfers {stats.elapsed:.3f}秒")
+            print(f"    {stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+IPアドレス置換エンジンの速度計測 (ルールを1件ずつ ipaddress で照合 vs 区間表 + bisect)
+
+実行方法:
+    python benchmarks/bench_ip_remap.py [アドレス数] [ルール数]
+"""
+
+import ipaddress
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from ip_remap import CidrRemapper  # noqa: E402
+
+
+def make_rules(count, rng):
+    """10.32.0.0/11 の中で /16〜/32 のサブネット移行ルールを作成する"""
+    rules = {}
+    while len(rules) < count:
+        prefixlen = rng.choice([16, 20, 24, 28, 32])
+        src = ipaddress.IPv4Network((0x0A200000 + rng.randrange(1 << 21), prefixlen), strict=False)
+        dst = ipaddress.IPv4Network((0x0A800000 + rng.randrange(1 << 21), prefixlen), strict=False)
+        rules.setdefault(src, dst)
+    return [(str(src), str(dst)) for src, dst in rules.items()]
+
+
+def make_column(count, rng):
+    """アドレス・HUB名・空欄などが混在するB列を作成する"""
+    values = []
+    for _ in range(count):
+        r = rng.random()
+        if r < 0.8:
+            values.append(str(ipaddress.IPv4Address(0x0A200000 + rng.randrange(1 << 21))))
+        elif r < 0.9:
+            values.append(f"HUB-{rng.randrange(10)}")
+        else:
+            values.append(None)
+    return values
+
+
+def naive_remap_column(rules, values):
+    """比較用: 値ごとに全ルールを ipaddress で照合し、最長一致を探す"""
+    networks = [(ipaddress.IPv4Network(src), ipaddress.IPv4Network(dst)) for src, dst in rules]
+    changes = []
+    for index, value in enumerate(values):
+        if not isinstance(value, str):
+            continue
+        try:
+            address = ipaddress.IPv4Address(value.strip())
+        except ValueError:
+            continue
+        best = None
+        for src, dst in networks:
+            if address in src and (best is None or src.prefixlen > best[0].prefixlen):
+                best = (src, dst)
+        if best is not None:
+            new_address = ipaddress.IPv4Address(int(best[1].network_address) + int(address) - int(best[0].network_address))
+            if new_address != address:
+                changes.append((index, str(new_address)))
+    return changes
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rule_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = random.Random(0)
+    rules = make_rules(rule_count, rng)
+    values = make_column(count, rng)
+
+    start_time = time.perf_counter()
+    remapper = CidrRemapper(rules)
+    build_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    changes = remapper.remap_column(values)
+    engine_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    expected = naive_remap_column(rules, values)
+    naive_time = time.perf_counter() - start_time
+    assert changes == expected
+
+    print(f"{count}件 / ルール {len(rules)}件 / 置換 {len(changes)}件")
+    print(f"ルール表の構築: {build_time * 1000:.2f} ms")
+    print(f"1件ずつ照合   : {naive_time:.3f}秒")
+    print(f"区間表 + bisect: {engine_time:.3f}秒 ({count / engine_time:,.0f} 件/秒, {naive_time / engine_time:.1f}倍)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+部屋番号の生成の速度比較 (while で 4/9 を1つずつ飛ばして output += vs room_numbering)
+
+実行方法:
+    python benchmarks/bench_room_numbering.py [棟数] [階数] [部屋数]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from room_numbering import format_buildings  # noqa: E402
+
+
+def legacy_generate_extended(buildings, include_4):
+    """変更前の RoomGenerator.generate_extended (GUI 部分を除く)"""
+    output = ""
+    for bldg, rooms, floors in buildings:
+        for floor in range(1, floors + 1):
+            floor_num = floor * 100
+            room_counter = 0
+            added_rooms = 0
+            while added_rooms < rooms:
+                room_counter += 1
+                if room_counter % 10 == 4 and not include_4:
+                    continue
+                room = floor_num + room_counter
+                if bldg:
+                    output += f"{bldg}{room} "
+                else:
+                    output += f"{room} "
+                added_rooms += 1
+            output = output.rstrip() + "\n"
+        output += "\n"
+    return output.rstrip()
+
+
+def measure(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    building_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    floor_count = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    room_count = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    buildings = [(f"{i + 1}-", room_count, floor_count) for i in range(building_count)]
+    total_rooms = building_count * floor_count * room_count
+    print(f"{building_count} 棟 × {floor_count} 階 × {room_count} 部屋 = {total_rooms} 部屋")
+
+    legacy_output, legacy_time = measure(legacy_generate_extended, buildings, False)
+    new_output, new_time = measure(lambda: format_buildings(buildings, include_4=False, include_9=True))
+    assert legacy_output == new_output, "出力が一致しません"
+
+    print(f"変更前 (while + output +=) : {legacy_time:.3f}秒")
+    print(f"room_numbering             : {new_time:.3f}秒 ({legacy_time / new_time:.1f}倍)")
@@ -0,0 +1,95 @@
+"""
+罫線・フォント設定の速度比較 (セルごとに Border/Font を代入 vs StyleCache で一括適用)
+
+実行方法:
+    python benchmarks/bench_style_cache.py [行数]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import openpyxl  # noqa: E402
+from openpyxl.styles import Border, Font, Side  # noqa: E402
+from openpyxl.xml.functions import tostring  # noqa: E402
+
+from style_cache import StyleCache  # noqa: E402
+
+side_thin = Side(style="thin")
+side_hair = Side(style="hair")
+meiryo_font = Font(name="Meiryo UI", size=11)
+
+
+def make_sheet(rows, cols=9):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for r in range(1, rows + 1):
+        for c in range(1, cols + 1):
+            sheet.cell(row=r, column=c, value=r * c)
+    return workbook, sheet
+
+
+def borders_legacy(sheet, rows, cols):
+    """変更前: セルごとに Border を生成して代入"""
+    for r in range(1, rows + 1):
+        for c in range(1, cols + 1):
+            top = side_thin if r == 1 else side_hair
+            bottom = side_thin if r == rows else side_hair
+            sheet.cell(row=r, column=c).border = Border(left=side_thin, right=side_thin, top=top, bottom=bottom)
+
+
+def borders_cached(sheet, rows, cols):
+    """変更後: Border を使い回して行単位で一括適用"""
+    cache = StyleCache.for_workbook(sheet.parent)
+    for r in range(1, rows + 1):
+        top = side_thin if r == 1 else side_hair
+        bottom = side_thin if r == rows else side_hair
+        cache.apply(sheet, r, 1, r, cols, border=cache.border(left=side_thin, right=side_thin, top=top, bottom=bottom))
+
+
+def fonts_legacy(sheet):
+    for row in sheet.iter_rows(min_row=1):
+        for cell in row:
+            cell.font = meiryo_font
+
+
+def fonts_cached(sheet):
+    StyleCache.for_workbook(sheet.parent).apply(sheet, 1, 1, sheet.max_row, sheet.max_column, font=meiryo_font)
+
+
+def style_xml(style):
+    return tostring(style.to_tree())
+
+
+def timed(func, *args):
+    start_time = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start_time
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    cols = 9
+
+    wb_a, ws_a = make_sheet(rows, cols)
+    wb_b, ws_b = make_sheet(rows, cols)
+    t_border_legacy = timed(borders_legacy, ws_a, rows, cols)
+    t_border_cached = timed(borders_cached, ws_b, rows, cols)
+    t_font_legacy = timed(fonts_legacy, ws_a)
+    t_font_cached = timed(fonts_cached, ws_b)
+
+    # 結果が一致することを確認
+    for r in (1, 2, rows // 2, rows):
+        for c in (1, cols):
+            assert style_xml(ws_a.cell(r, c).border) == style_xml(ws_b.cell(r, c).border)
+            assert style_xml(ws_a.cell(r, c).font) == style_xml(ws_b.cell(r, c).font)
+
+    print(f"{rows}行 x {cols}列")
+    print(f"罫線  : 変更前 {t_border_legacy:.3f}秒 / 変更後 {t_border_cached:.3f}秒 ({t_border_legacy / t_border_cached:.1f}倍)")
+    print(f"フォント: 変更前 {t_font_legacy:.3f}秒 / 変更後 {t_font_cached:.3f}秒 ({t_font_legacy / t_font_cached:.1f}倍)")
+
+
+if __name__ == "__main__":
+    main()
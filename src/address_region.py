@@ -0,0 +1,69 @@
+"""
+住所 → 都道府県 → 地域 の判定
+
+都道府県名は先頭2文字ですべて区別できる (「神奈」「和歌」「鹿児」など) ため、
+先頭2文字をキーにした辞書で候補を1つに絞り、startswith で確認します。
+47都道府県を順に startswith で調べる必要はありません。
+
+地域の表は frozenset / 辞書で、モジュールの読み込み時に1回だけ作成します。
+住所の列をまとめて判定する場合は classify_regions() を使ってください。
+"""
+
+PREFECTURES = (
+    "北海道", "青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県",
+    "茨城県", "栃木県", "群馬県", "埼玉県", "千葉県", "東京都", "神奈川県",
+    "新潟県", "富山県", "石川県", "福井県", "山梨県", "長野県", "岐阜県",
+    "静岡県", "愛知県", "三重県", "滋賀県", "京都府", "大阪府", "兵庫県",
+    "奈良県", "和歌山県", "鳥取県", "島根県", "岡山県", "広島県", "山口県",
+    "徳島県", "香川県", "愛媛県", "高知県", "福岡県", "佐賀県", "長崎県",
+    "熊本県", "大分県", "宮崎県", "鹿児島県", "沖縄県",
+)
+
+# 格納先の振り分けで使う地域 (save_starred_xlsx の中部地方 / 関西案件)
+REGION_CHUBU = "中部"
+REGION_KANSAI = "関西"
+CHUBU_PREFECTURES = frozenset(["静岡県", "岐阜県", "長野県", "愛知県", "新潟県", "三重県", "富山県", "石川県"])
+KANSAI_PREFECTURES = frozenset(["大阪府", "京都府", "兵庫県", "滋賀県", "和歌山県", "奈良県"])
+
+PREFIX_LENGTH = 2
+_prefecture_by_prefix = {prefecture[:PREFIX_LENGTH]: prefecture for prefecture in PREFECTURES}
+assert len(_prefecture_by_prefix) == len(PREFECTURES), "都道府県名の先頭2文字が重複しています"
+
+_region_by_prefecture = {prefecture: REGION_CHUBU for prefecture in CHUBU_PREFECTURES}
+_region_by_prefecture.update({prefecture: REGION_KANSAI for prefecture in KANSAI_PREFECTURES})
+
+
+def extract_prefecture(address):
+    """住所の先頭の都道府県名を返す。都道府県名で始まらない場合は空文字"""
+    if not isinstance(address, str):
+        return ""
+    prefecture = _prefecture_by_prefix.get(address[:PREFIX_LENGTH])
+    if prefecture is not None and address.startswith(prefecture):
+        return prefecture
+    return ""
+
+
+def classify_region(address):
+    """住所の地域 (REGION_CHUBU / REGION_KANSAI) を返す。どちらでもなければ空文字"""
+    return _region_by_prefecture.get(extract_prefecture(address), "")
+
+
+def extract_prefectures(addresses):
+    """住所の列から都道府県名の列を返す"""
+    by_prefix = _prefecture_by_prefix
+    result = []
+    append = result.append
+    for address in addresses:
+        if isinstance(address, str):
+            prefecture = by_prefix.get(address[:PREFIX_LENGTH])
+            if prefecture is not None and address.startswith(prefecture):
+                append(prefecture)
+                continue
+        append("")
+    return result
+
+
+def classify_regions(addresses):
+    """住所の列から地域の列を返す (出力の順序は入力と同じ)"""
+    region_of = _region_by_prefecture.get
+    return [region_of(prefecture, "") for prefecture in extract_prefectures(addresses)]
@@ -0,0 +1,199 @@
+"""
+置き換えられた格納ファイルの重複排除アーカイブ (内容のハッシュで保存)
+
+格納先の既存ファイル (xlsx / PDF / 写真ZIP) を置き換える際、これまでは案件フォルダ内の
+{yyyy-mm-dd}_old フォルダへ移動していたため、同じ内容のファイルが日付ごとに溜まっていました。
+
+このモジュールでは共有フォルダ (ドライブ) ごとに1つのアーカイブ (ARCHIVE_DIR_NAME) を置き、
+
+    objects/<SHA-256の先頭2文字>/<SHA-256>   ... ファイルの内容 (同じ内容は1つだけ。読み取り専用)
+    manifest.jsonl                           ... アーカイブした記録 (日時, ハッシュ, サイズ, 元のパス, oldフォルダでの名前)
+
+として保存します。{yyyy-mm-dd}_old フォルダには従来どおりのファイル名で内容へのハードリンクを置くため、
+アーカイブは同じドライブ内のリンクの作成と削除だけで済み、ファイルのコピーは発生しません。
+ハードリンクを作成できない場合は内容を objects に移動し、old フォルダには MANIFEST_NAME の記録だけを残します。
+
+old フォルダに同じ名前のファイルがある場合は、同じ内容なら何もせず、違う内容なら時刻を付けた名前にします。
+"""
+
+import datetime
+import errno
+import json
+import os
+import shutil
+import stat
+import threading
+
+from file_hash import file_sha256
+
+ARCHIVE_DIR_NAME = ".archive_store"
+MANIFEST_NAME = ".archive_manifest.jsonl" # ハードリンクを作成できなかったファイルの記録 (old フォルダ内)
+
+_manifest_lock = threading.Lock()
+
+
+def _volume_root(path):
+    """パスが属する共有フォルダ (\\\\server\\share) / ドライブ / マウントポイントのルートを返す"""
+    path = os.path.abspath(path)
+    drive, _ = os.path.splitdrive(path)
+    if drive:
+        return drive + os.sep
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def archive_root_for(folder):
+    """
+    folder と同じドライブ上のアーカイブのパスを返す (無ければ作成する)。
+
+    ドライブのルートに作成できない場合は、folder の1つ上のフォルダ (案件フォルダの一覧) に作成する。
+    """
+    for base in (_volume_root(folder), os.path.dirname(os.path.abspath(folder))):
+        root = os.path.join(base, ARCHIVE_DIR_NAME)
+        try:
+            os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+            return root
+        except OSError:
+            continue
+    raise OSError(f"アーカイブを作成できません: {folder}")
+
+
+def _object_path(root, digest):
+    return os.path.join(root, "objects", digest[:2], digest)
+
+
+def _store_object(path, object_path):
+    """
+    ファイルの内容を objects に保存する (同じ内容が既にあれば何もしない)。
+
+    Returns:
+        bool: 元のファイルと objects がハードリンクでつながっている (または元のファイルが不要になった) 場合 True。
+              ハードリンクを作成できず、元のファイルを objects へ移動した場合は False。
+    """
+    if os.path.exists(object_path):
+        return True
+    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+    try:
+        os.link(path, object_path)
+        linked = True
+    except FileExistsError:
+        return True # 別のスレッドが同じ内容を先に保存した
+    except OSError:
+        shutil.move(path, object_path)
+        linked = False
+    return linked
+
+
+def _unique_name(folder, file_name, object_path):
+    """
+    old フォルダでの名前を決める。
+
+    Returns:
+        tuple: (パス, 既に同じ内容がある場合 True)
+    """
+    candidate = os.path.join(folder, file_name)
+    stem, ext = os.path.splitext(file_name)
+    suffix = datetime.datetime.now().strftime("%H%M%S")
+    counter = 1
+    while os.path.exists(candidate):
+        try:
+            if os.path.samefile(candidate, object_path) or file_sha256(candidate) == os.path.basename(object_path):
+                return candidate, True
+        except OSError:
+            pass
+        candidate = os.path.join(folder, f"{stem}_{suffix}" + (f"_{counter}" if counter > 1 else "") + ext)
+        counter += 1
+    return candidate, False
+
+
+def _append_jsonl(path, record):
+    with _manifest_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def archive_file(target_file_path, base_folder, now=None):
+    """
+    置き換えられるファイルをアーカイブし、{yyyy-mm-dd}_old フォルダからハードリンク (または記録) で参照できるようにする。
+    元のファイルは削除される (内容はアーカイブに残る)。
+
+    Returns:
+        str: old フォルダでのパス。
+    """
+    now = now or datetime.datetime.now()
+    root = archive_root_for(base_folder)
+    digest = file_sha256(target_file_path)
+    size = os.path.getsize(target_file_path)
+    object_path = _object_path(root, digest)
+
+    old_folder = os.path.join(base_folder, f"{now:%Y-%m-%d}_old")
+    os.makedirs(old_folder, exist_ok=True)
+    linked = _store_object(target_file_path, object_path)
+    old_path, exists = _unique_name(old_folder, os.path.basename(target_file_path), object_path)
+
+    if not exists:
+        try:
+            os.link(object_path, old_path)
+        except OSError as e:
+            if e.errno == errno.EEXIST:
+                raise
+            # ハードリンクを作成できないドライブでは old フォルダに記録だけを残す
+            _append_jsonl(os.path.join(old_folder, MANIFEST_NAME),
+                          {"name": os.path.basename(old_path), "sha256": digest, "size": size,
+                           "object": object_path, "archived_at": now.isoformat(timespec="seconds")})
+    if linked and os.path.exists(target_file_path):
+        os.remove(target_file_path)
+    # 内容は読み取り専用にする (Windows では読み取り専用のファイルを削除できないため、元のファイルを削除してから)
+    try:
+        os.chmod(object_path, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+    except OSError:
+        pass
+
+    _append_jsonl(os.path.join(root, "manifest.jsonl"),
+                  {"archived_at": now.isoformat(timespec="seconds"), "sha256": digest, "size": size,
+                   "source": os.path.abspath(target_file_path), "old_path": os.path.abspath(old_path)})
+    return old_path
+
+
+def restore_object(root, digest, dest):
+    """アーカイブの内容をコピーして取り出す (取り出したファイルは書き込み可能)"""
+    shutil.copyfile(_object_path(root, digest), dest)
+    return dest
+
+
+def archive_stats(root):
+    """
+    アーカイブの集計を返す。
+
+    Returns:
+        dict: objects (保存している内容の数), stored_bytes (保存しているバイト数),
+              archived (アーカイブした回数), archived_bytes (アーカイブしたバイト数の合計)
+    """
+    objects = stored_bytes = 0
+    for folder, _, files in os.walk(os.path.join(root, "objects")):
+        for name in files:
+            objects += 1
+            stored_bytes += os.path.getsize(os.path.join(folder, name))
+    archived = archived_bytes = 0
+    manifest = os.path.join(root, "manifest.jsonl")
+    if os.path.exists(manifest):
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    archived += 1
+                    archived_bytes += json.loads(line)["size"]
+    return {"objects": objects, "stored_bytes": stored_bytes, "archived": archived, "archived_bytes": archived_bytes}
+
+
+if __name__ == "__main__":
+    import sys
+    target = sys.argv[1] if len(sys.argv) > 1 else os.getcwd()
+    archive_root = archive_root_for(target)
+    result = archive_stats(archive_root)
+    print(f"アーカイブ: {archive_root}")
+    print(f"アーカイブした回数: {result['archived']} 件 ({result['archived_bytes'] / 1e6:.1f}MB)")
+    print(f"保存している内容: {result['objects']} 件 ({result['stored_bytes'] / 1e6:.1f}MB)")
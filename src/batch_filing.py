@@ -0,0 +1,316 @@
+"""
+星つきxlsxの一括格納 (Excel を使わない)
+
+save_starred_xlsx は Excel のアクティブブック1つずつしか処理できないため、完成した報告書を
+まとめて格納する場合は、このスクリプトで .xlsx ファイルを直接読んで処理します。
+
+    1. 各ブックの名前定義 (HOUSES.* / ADD_NAME*) を xlsx から直接読む
+    2. 振り分け表 (filing_routes) で格納先を決め、格納するファイルを一覧にする
+       (フォルダの検索だけで、この段階ではファイルを変更しない)
+    3. 複数のブックが同じファイル・同じ写真ZIPを使う場合は「競合」として実行しない
+    4. 残りをスレッドプールで並列に格納する (既存ファイルの old フォルダへの移動、コピー、ZIPの移動)
+       格納先に同じ内容のファイルがある場合はスキップする (file_transfer)
+       写真ZIPは CRC を検証してから移動する。--zip-level を指定すると重複を除いて詰め直す (photo_zip)
+    5. ファイルごとの結果をCSVに書き出す
+
+PDF の出力は差し替え可能で、既定では出力しません (--pdf python で Excel を使わずに描画する (pdf_render)、
+--pdf libreoffice で LibreOffice を使う)。
+Linux でも実行できます (Excel / COM を使わない)。
+
+実行方法:
+    python batch_filing.py [ブックまたはフォルダ ...] [--workers N] [--report 結果.csv]
+                           [--pdf none|python|libreoffice] [--downloads フォルダ] [--zip-level 0-9] [--dry-run]
+"""
+
+import csv
+import datetime
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import filing_routes
+from file_transfer import STATUS_FAILED as TRANSFER_FAILED
+from file_transfer import STATUS_SKIPPED as TRANSFER_SKIPPED
+from file_transfer import Transfer, TransferStats, transfer_file
+from filing_ops import (FILING_DEFINED_NAMES, filing_metadata, find_photo_zip, is_created_before_today,
+                        move_existing_file, photo_zip_name, starred_file_name)
+from filing_routes import FilingRouteError, default_folder_map, execute_plan
+from local_store import store_path
+from pdf_render import RenderReport, pooled_pdf_exporter
+from photo_zip import check_photo_zip
+from project_index import find_project_folders
+from xlsx_parts import read_defined_name_values
+
+DEFAULT_WORKERS = 4
+
+STATUS_PLANNED = "予定"
+STATUS_DONE = "完了"
+STATUS_CONFLICT = "競合"
+STATUS_ERROR = "エラー"
+
+OP_COPY = "copy"
+OP_PDF = "pdf"
+OP_MOVE = "move"
+
+
+class BatchItem:
+    """1ブック分の格納計画と結果"""
+
+    def __init__(self, source):
+        self.source = source
+        self.metadata = None
+        self.folder = None
+        self.folder_message = None
+        self.operations = [] # (操作, 元ファイル, 格納先)
+        self.status = STATUS_PLANNED
+        self.message = ""
+        self.stored = []
+        self.moved_to_old = []
+        self.transfers = [] # TransferResult のリスト
+        self.zip_report = None # 写真ZIPの検証結果 (photo_zip.ZipReport)
+        self.pdf_report = None # PDF の出力結果 (pdf_render.RenderReport)
+
+    def fail(self, status, message):
+        self.status = status
+        self.message = message
+
+
+def read_workbook_metadata(path):
+    """ブックの名前定義から格納用のメタデータを読む"""
+    with zipfile.ZipFile(path) as zf:
+        values = read_defined_name_values(zf, FILING_DEFINED_NAMES)
+    metadata = filing_metadata(values)
+    if metadata["service_id"] is None:
+        raise ValueError("HOUSES.SERVICE_ID の名前定義または値がありません。")
+    if metadata["building_state"] is None:
+        raise ValueError("HOUSES.BUILDING_STATE の名前定義または値がありません。")
+    return metadata
+
+
+def plan_batch(paths, folder_map, download_folder_path, pdf_exporter=None, find_folders=find_project_folders):
+    """
+    各ブックの格納先と格納するファイルを決める (ファイル・フォルダは変更しない)。
+
+    Returns:
+        list: BatchItem のリスト (入力と同じ順序)。
+    """
+    items = [BatchItem(path) for path in paths]
+    for item in items:
+        try:
+            item.metadata = read_workbook_metadata(item.source)
+        except Exception as e:
+            item.fail(STATUS_ERROR, f"名前定義を読み取れませんでした: {e}")
+            continue
+
+        metadata = item.metadata
+        try:
+            item.folder, item.folder_message = execute_plan(
+                filing_routes.plan(metadata, folder_map), find_folders, create=False)
+        except FilingRouteError as e:
+            item.fail(STATUS_ERROR, "\n".join([str(e)] + e.candidates))
+            continue
+
+        file_name = starred_file_name(metadata["building_no"], metadata["building_name"],
+                                      metadata["addname1"], metadata["addname2"])
+        xlsx_target = os.path.join(item.folder, file_name)
+        item.operations.append((OP_COPY, item.source, xlsx_target))
+        if pdf_exporter is not None:
+            item.operations.append((OP_PDF, xlsx_target, os.path.splitext(xlsx_target)[0] + ".pdf"))
+        zip_file_name = find_photo_zip(download_folder_path, metadata["building_no"], metadata["tentative_name"])
+        if zip_file_name is not None:
+            item.operations.append(
+                (OP_MOVE, zip_file_name, os.path.join(item.folder, photo_zip_name(metadata["addname2"]))))
+
+    _mark_conflicts(items)
+    return items
+
+
+def _mark_conflicts(items):
+    """同じ格納先ファイル、または同じ写真ZIPを使うブックをすべて競合にする"""
+    claims = {}
+    for item in items:
+        if item.status != STATUS_PLANNED:
+            continue
+        for operation, source, target in item.operations:
+            claims.setdefault(("格納先", os.path.normcase(target)), []).append(item)
+            if operation == OP_MOVE:
+                claims.setdefault(("写真ZIP", os.path.normcase(source)), []).append(item)
+
+    for (kind, path), claimed in claims.items():
+        if len(claimed) < 2:
+            continue
+        names = ", ".join(os.path.basename(item.source) for item in claimed)
+        for item in claimed:
+            item.fail(STATUS_CONFLICT, f"{kind}が重複しています: {path} ({names})")
+
+
+def execute_item(item, pdf_exporter=None, zip_repack_level=None):
+    """1ブック分の格納を実行する (スレッドプールから呼ばれる)"""
+
+    def move_replaced_file(transfer):
+        # 写真ZIPは常に、xlsx は今日より前に作成されたものだけ old フォルダへ移動する (今日作成したものは上書き)
+        if transfer.move or is_created_before_today(transfer.target):
+            if not move_existing_file(transfer.target, item.folder):
+                return False
+            item.moved_to_old.append(os.path.basename(transfer.target))
+        return True
+
+    try:
+        os.makedirs(item.folder, exist_ok=True)
+        for operation, source, target in item.operations:
+            if operation == OP_PDF:
+                if os.path.exists(target) and not move_replaced_file(Transfer(source, target)):
+                    item.fail(STATUS_ERROR, f"既存ファイルを old フォルダに移動できませんでした: {target}")
+                    return item
+                result = pdf_exporter(source, target)
+                if isinstance(result, RenderReport):
+                    item.pdf_report = result
+                item.stored.append(os.path.basename(target))
+                continue
+            if operation == OP_MOVE:
+                # 写真ZIPは CRC を検証してから移動する (破損していればダウンロードフォルダに残す)
+                report = check_photo_zip(source, zip_repack_level)
+                item.zip_report = report
+                if not report.ok:
+                    item.fail(STATUS_ERROR, f"写真ZIPが破損しています: {report.errors[0][0]} {report.errors[0][1]}")
+                    return item
+            result = transfer_file(Transfer(source, target, move=operation == OP_MOVE), move_replaced_file)
+            item.transfers.append(result)
+            if result.status == TRANSFER_FAILED:
+                item.fail(STATUS_ERROR, result.error)
+                return item
+            if result.status == TRANSFER_SKIPPED:
+                item.stored.append(f"{os.path.basename(target)} ({TRANSFER_SKIPPED})")
+            else:
+                item.stored.append(os.path.basename(target))
+    except Exception as e:
+        item.fail(STATUS_ERROR, f"{type(e).__name__}: {e}")
+        return item
+    item.status = STATUS_DONE
+    return item
+
+
+def libreoffice_pdf_exporter(xlsx_path, pdf_path):
+    """LibreOffice (soffice --headless) で PDF を出力する。並列実行できるよう呼び出しごとにプロファイルを分ける"""
+    soffice = shutil.which("soffice") or shutil.which("libreoffice")
+    if soffice is None:
+        raise RuntimeError("LibreOffice (soffice) が見つかりません。")
+    with tempfile.TemporaryDirectory() as work_dir:
+        profile_url = "file://" + os.path.join(work_dir, "profile").replace(os.sep, "/")
+        subprocess.run([soffice, f"-env:UserInstallation={profile_url}", "--headless",
+                        "--convert-to", "pdf", "--outdir", work_dir, xlsx_path],
+                       check=True, capture_output=True, timeout=600)
+        output = os.path.join(work_dir, os.path.splitext(os.path.basename(xlsx_path))[0] + ".pdf")
+        shutil.move(output, pdf_path)
+
+
+PDF_EXPORTERS = {"none": None, "python": pooled_pdf_exporter, "libreoffice": libreoffice_pdf_exporter}
+
+
+def write_status_report(items, report_path):
+    """ファイルごとの結果をCSV (Excelで開けるよう UTF-8 BOM 付き) に書き出す"""
+    with open(report_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ブック", "状態", "格納フォルダ", "格納ファイル", "oldフォルダへ移動", "メッセージ"])
+        for item in items:
+            planned = [os.path.basename(target) for _, _, target in item.operations]
+            writer.writerow([item.source, item.status, item.folder or "",
+                             " / ".join(item.stored if item.status == STATUS_DONE else planned),
+                             " / ".join(item.moved_to_old), item.message])
+
+
+def run_batch(paths, folder_map=None, download_folder_path=None, pdf_exporter=None,
+              workers=None, report_path=None, dry_run=False, zip_repack_level=None):
+    """一括格納を実行し、結果をCSVに書き出す。BatchItem のリストを返す"""
+    start_time = time.perf_counter()
+    user_profile = os.environ.get("USERPROFILE") or os.path.expanduser("~")
+    folder_map = folder_map or default_folder_map(user_profile)
+    download_folder_path = download_folder_path or os.path.join(os.path.expanduser("~"), "Downloads")
+
+    items = plan_batch(paths, folder_map, download_folder_path, pdf_exporter)
+    runnable = [item for item in items if item.status == STATUS_PLANNED]
+    if not dry_run and runnable:
+        with ThreadPoolExecutor(max_workers=workers or DEFAULT_WORKERS) as executor:
+            list(executor.map(lambda item: execute_item(item, pdf_exporter, zip_repack_level), runnable))
+    elapsed = time.perf_counter() - start_time
+
+    for item in items:
+        print(f"[{item.status}] {os.path.basename(item.source)} -> {item.folder or '-'}"
+              + (f"\n    {item.message}" if item.message else ""))
+    counts = {status: sum(1 for item in items if item.status == status)
+              for status in (STATUS_DONE, STATUS_PLANNED, STATUS_CONFLICT, STATUS_ERROR)}
+    print(f"対象ブック: {len(items)} 件 ({' / '.join(f'{k} {v}' for k, v in counts.items() if v)}) {elapsed:.2f}秒")
+    if not dry_run:
+        print(TransferStats([result for item in items for result in item.transfers], elapsed).summary())
+        for item in items:
+            if item.zip_report is not None:
+                print(f"    {item.zip_report.summary()}")
+            if item.pdf_report is not None:
+                print(f"    PDF {item.pdf_report.summary()}")
+
+    if report_path is None:
+        report_path = store_path("reports", f"一括格納_{datetime.datetime.now():%Y%m%d_%H%M%S}.csv")
+    write_status_report(items, report_path)
+    print(f"結果を書き出しました: {report_path}")
+    return items
+
+
+def expand_paths(args):
+    """引数のブックとフォルダ (直下の .xlsx) を展開する。Excel の一時ファイル (~$) は除く"""
+    paths = []
+    for arg in args:
+        if os.path.isdir(arg):
+            paths.extend(sorted(glob.glob(os.path.join(glob.escape(arg), "*.xlsx"))))
+        else:
+            paths.append(arg)
+    return [path for path in paths if not os.path.basename(path).startswith("~$")]
+
+
+def _parse_args(argv):
+    options = {"workers": None, "report_path": None, "pdf": "none", "downloads": None, "dry_run": False,
+               "zip_level": None}
+    targets = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--workers":
+            options["workers"] = int(next(args, "0")) or None
+        elif arg == "--report":
+            options["report_path"] = next(args, None)
+        elif arg == "--pdf":
+            options["pdf"] = next(args, "none")
+        elif arg == "--downloads":
+            options["downloads"] = next(args, None)
+        elif arg == "--zip-level":
+            options["zip_level"] = int(next(args, "6"))
+        elif arg == "--dry-run":
+            options["dry_run"] = True
+        else:
+            targets.append(arg)
+    return targets, options
+
+
+if __name__ == "__main__":
+    target_args, opts = _parse_args(sys.argv[1:])
+    if opts["pdf"] not in PDF_EXPORTERS:
+        print(f"--pdf には {' / '.join(PDF_EXPORTERS)} のいずれかを指定してください。")
+        sys.exit(1)
+    if not target_args:
+        import tkinter as tk
+        from tkinter import filedialog
+        root = tk.Tk()
+        root.withdraw()
+        target_args = list(filedialog.askopenfilenames(
+            title="格納する星つきxlsxを選択してください", filetypes=[("Excel ブック", "*.xlsx")]))
+    workbook_paths = expand_paths(target_args)
+    if workbook_paths:
+        run_batch(workbook_paths, download_folder_path=opts["downloads"], pdf_exporter=PDF_EXPORTERS[opts["pdf"]],
+                  workers=opts["workers"], report_path=opts["report_path"], dry_run=opts["dry_run"],
+                  zip_repack_level=opts["zip_level"])
+    else:
+        print("ブックが選択されなかったため、処理をキャンセルしました。")
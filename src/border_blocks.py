@@ -0,0 +1,90 @@
+"""
+線番表の罫線ブロック検出と範囲単位の罫線適用
+
+A列が "G" で始まる文字列、または 1〜99 の整数の行を罫線対象とし、
+連続する対象行を1つのブロックとして A〜I 列に罫線を引きます。
+
+ブロック検出はA列の値の並びを1回たどるランレングス処理 (itertools.groupby) で行い、
+罫線は「最上行」「内部行」「最下行」の3つの範囲に、事前に作成した Border をまとめて適用します。
+"""
+
+import itertools
+
+from openpyxl.styles import Side
+
+from style_cache import StyleCache
+
+BORDER_MIN_COL = 1  # A列
+BORDER_MAX_COL = 9  # I列
+
+# --- 罫線スタイル定義 (Sideオブジェクト) ---
+side_thin = Side(style='thin')
+side_hair = Side(style='hair') # 内部横線用 (VBAのxlHairline)
+side_none = Side(style=None) # 罫線なし
+
+
+def is_border_target_value(a_value):
+    """A列の値が罫線対象か判定する ("G"で始まる文字列、または 1〜99 の整数)"""
+    if isinstance(a_value, str):
+        return a_value.strip().upper().startswith("G")
+    if isinstance(a_value, (int, float)):
+        return 1 <= a_value <= 99 and int(a_value) == a_value
+    return False
+
+
+def find_border_blocks(a_values, first_row=1):
+    """
+    A列の値の並びから、罫線対象行が連続するブロックを求める。
+
+    Args:
+        a_values (list): A列の値 (first_row 行目から順に)。
+        first_row (int): a_values[0] の行番号。
+    Returns:
+        list: (開始行, 終了行) のタプルのリスト (両端を含む)。
+    """
+    blocks = []
+    row = first_row
+    # 罫線対象かどうかが同じ行の並び (ラン) ごとにまとめる
+    for is_target, run in itertools.groupby(a_values, key=is_border_target_value):
+        length = sum(1 for _ in run)
+        if is_target:
+            blocks.append((row, row + length - 1))
+        row += length
+    return blocks
+
+
+def _block_borders(style_cache):
+    """ブロック内の位置ごとの Border (左右は常に細線、上下は外枠が細線・内部がヘアライン)"""
+    return {
+        "single": style_cache.border(left=side_thin, right=side_thin, top=side_thin, bottom=side_thin),
+        "top": style_cache.border(left=side_thin, right=side_thin, top=side_thin, bottom=side_hair),
+        "inner": style_cache.border(left=side_thin, right=side_thin, top=side_hair, bottom=side_hair),
+        "bottom": style_cache.border(left=side_thin, right=side_thin, top=side_hair, bottom=side_thin),
+    }
+
+
+def apply_block_borders(sheet, blocks, patch_writer=None, min_col=BORDER_MIN_COL, max_col=BORDER_MAX_COL):
+    """
+    各ブロックに罫線を範囲単位で設定する。
+
+    Args:
+        blocks (list): find_border_blocks() が返す (開始行, 終了行) のリスト。
+        patch_writer (XlsxPatchWriter, optional): 罫線を変更した範囲を記録するライター。
+    Returns:
+        int: 罫線を設定したセル数。
+    """
+    style_cache = StyleCache.for_workbook(sheet.parent)
+    borders = _block_borders(style_cache)
+    count = 0
+    for start_row, end_row in blocks:
+        if start_row <= 0 or end_row < start_row:
+            continue
+        if start_row == end_row:
+            count += style_cache.apply(sheet, start_row, min_col, start_row, max_col, border=borders["single"])
+        else:
+            count += style_cache.apply(sheet, start_row, min_col, start_row, max_col, border=borders["top"])
+            count += style_cache.apply(sheet, start_row + 1, min_col, end_row - 1, max_col, border=borders["inner"])
+            count += style_cache.apply(sheet, end_row, min_col, end_row, max_col, border=borders["bottom"])
+        if patch_writer is not None:
+            patch_writer.mark_style(sheet, start_row, min_col, end_row, max_col)
+    return count
@@ -0,0 +1,114 @@
+"""
+整形処理のロールバック用スナップショット
+
+ブック全体をコピーする代わりに、保存時に書き換えたセルの「書き換え前のセルXML」だけを
+gzip 圧縮した JSON に保存します (XlsxPatchWriter.save(snapshot=...) で取得)。
+スナップショットの大きさは変更したセル数に比例し、ブックの大きさには依存しません。
+
+ロールバックは XlsxPatchWriter.restore_cells() で対象シートのXMLだけを1回書き換えて行います。
+保存後にブックが別の処理 (Excelでの上書き保存など) で変更されていると、
+共有文字列やスタイルの番号がずれている可能性があるため、ロールバックを中止します。
+
+ブック全体を保存し直した場合 (部分保存できない変更があった場合) は、
+セル単位のスナップショットを取れないため、保存前のブックのコピーを残してスナップショットから参照します。
+"""
+
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from file_hash import file_sha256
+from xlsx_patch_writer import XlsxPatchWriter
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".json.gz"
+
+
+class SnapshotError(Exception):
+    """スナップショットが読めない、またはロールバックできない場合に送出する例外"""
+
+
+def snapshot_path_for(filepath, now=None):
+    """ブックと同じフォルダに置くスナップショットのパス (<ブック名>_ロールバック_<日時>.json.gz)"""
+    now = now or datetime.datetime.now()
+    return f"{os.path.splitext(filepath)[0]}_ロールバック_{now:%Y%m%d_%H%M%S}{SNAPSHOT_SUFFIX}"
+
+
+def write_snapshot(snapshot_path, filepath, originals, backup_path=None):
+    """
+    保存直後のブックに対するスナップショットを書き出す。
+
+    Args:
+        filepath (str): 保存したブックのパス (保存後のハッシュを記録する)。
+        originals (dict): {シート名: {座標: 書き換え前のセルXML (無かった場合は None)}}
+        backup_path (str, optional): ブック全体を保存し直した場合の、保存前のブックのコピー。
+    Returns:
+        int: スナップショットのファイルサイズ (バイト)。
+    """
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "workbook": os.path.basename(filepath),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "saved_sha256": file_sha256(filepath),
+        "backup": os.path.basename(backup_path) if backup_path else None,
+        "cells": originals,
+    }
+    with gzip.open(snapshot_path, "wt", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    return os.path.getsize(snapshot_path)
+
+
+def read_snapshot(snapshot_path):
+    """スナップショットを読み込む"""
+    try:
+        with gzip.open(snapshot_path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"スナップショットを読み込めませんでした: {snapshot_path}\n\n詳細: {e}") from e
+    if data.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"対応していないスナップショットの形式です (version={data.get('version')})。")
+    return data
+
+
+def snapshot_target(snapshot_path, data):
+    """スナップショットの対象ブックのパス (スナップショットと同じフォルダ)"""
+    return os.path.join(os.path.dirname(os.path.abspath(snapshot_path)), data["workbook"])
+
+
+def rollback(snapshot_path):
+    """
+    スナップショットの内容でブックを処理前の状態に戻す。
+
+    Returns:
+        tuple: (ブックのパス, 書き戻したセル数)
+    Raises:
+        SnapshotError: ブックが見つからない、または保存後に変更されている場合。
+    """
+    data = read_snapshot(snapshot_path)
+    filepath = snapshot_target(snapshot_path, data)
+    if not os.path.exists(filepath):
+        raise SnapshotError(f"対象のブックが見つかりません:\n{filepath}")
+    if file_sha256(filepath) != data["saved_sha256"]:
+        raise SnapshotError(f"処理後にブックが変更されているため、ロールバックできません:\n{filepath}")
+
+    if data.get("backup"):
+        backup_path = os.path.join(os.path.dirname(filepath), data["backup"])
+        if not os.path.exists(backup_path):
+            raise SnapshotError(f"保存前のブックのコピーが見つかりません:\n{backup_path}")
+        fd, temp_path = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(filepath))
+        os.close(fd)
+        try:
+            shutil.copyfile(backup_path, temp_path)
+            shutil.copymode(filepath, temp_path) # mkstemp の権限 (0600) のままにしない
+            os.replace(temp_path, filepath)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return filepath, None
+
+    XlsxPatchWriter(filepath).restore_cells(data["cells"])
+    return filepath, sum(len(cells) for cells in data["cells"].values())
@@ -0,0 +1,111 @@
+"""
+整形処理の変更ログ (ルール・シート・範囲・変更前/変更後の値)
+
+同じルールで同じ列の連続した行が同じ値に変わった場合は1件の範囲 (例: F10:F250) にまとめるため、
+変更セル数が多くてもログの件数とサイズは小さく保たれます。
+
+出力形式はファイル名の拡張子で決まります:
+    *.jsonl / *.jsonl.gz : 1行1件の JSON
+    *.csv   / *.csv.gz   : 見出し付きCSV (Excelで開けるよう UTF-8 BOM 付き)
+"""
+
+import csv
+import datetime
+import gzip
+import io
+import json
+
+CSV_FIELDS = ["rule", "sheet", "range", "count", "old", "new"]
+MAX_SUMMARY_RANGES = 5 # 画面表示で1ルールあたりに列挙する範囲の数
+
+
+def _jsonable(value):
+    """日付はISO形式の文字列、それ以外はそのまま返す"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+class ChangeLog:
+    """1回の実行で変更したセルを範囲単位で記録する"""
+
+    def __init__(self):
+        self.entries = []
+        self._open_runs = {} # (シート名, ルール, 列) -> 最後に追加したエントリ
+
+    def __len__(self):
+        return len(self.entries)
+
+    def record(self, rule, cell, old, new):
+        """
+        セルの変更を記録する。直前の行の同じルール・同じ列・同じ値の変更に続く場合は範囲を延長する。
+
+        Args:
+            rule (str): 変更ルールの識別名。
+            cell: 変更した openpyxl のセル。
+        """
+        sheet_title = cell.parent.title
+        key = (sheet_title, rule, cell.column_letter)
+        old = _jsonable(old)
+        new = _jsonable(new)
+        entry = self._open_runs.get(key)
+        if entry is not None and entry["end"] == cell.row - 1 and entry["old"] == old and entry["new"] == new:
+            entry["end"] = cell.row
+            entry["count"] += 1
+            return
+        entry = {"rule": rule, "sheet": sheet_title, "column": cell.column_letter,
+                 "start": cell.row, "end": cell.row, "count": 1, "old": old, "new": new}
+        self.entries.append(entry)
+        self._open_runs[key] = entry
+
+    @staticmethod
+    def range_text(entry):
+        """エントリの範囲を 'F10' または 'F10:F250' の形式で返す"""
+        start = f"{entry['column']}{entry['start']}"
+        if entry["start"] == entry["end"]:
+            return start
+        return f"{start}:{entry['column']}{entry['end']}"
+
+    def rows(self):
+        """出力用の行 (CSV_FIELDS のキーを持つ辞書) を順に返す"""
+        for entry in self.entries:
+            yield {"rule": entry["rule"], "sheet": entry["sheet"], "range": self.range_text(entry),
+                   "count": entry["count"], "old": entry["old"], "new": entry["new"]}
+
+    def count(self, sheet_title, rule=None):
+        """シート (とルール) ごとの変更セル数"""
+        return sum(entry["count"] for entry in self.entries
+                   if entry["sheet"] == sheet_title and (rule is None or entry["rule"] == rule))
+
+    def summary_lines(self, sheet_title, labels, max_ranges=MAX_SUMMARY_RANGES):
+        """
+        画面表示用の要約をルールごとに1行で返す。範囲は先頭 max_ranges 件だけを列挙する。
+
+        Args:
+            labels (dict): {ルール: 表示名}。この順序で出力する。
+        """
+        lines = []
+        for rule, label in labels.items():
+            entries = [entry for entry in self.entries if entry["sheet"] == sheet_title and entry["rule"] == rule]
+            if not entries:
+                continue
+            ranges = ", ".join(self.range_text(entry) for entry in entries[:max_ranges])
+            if len(entries) > max_ranges:
+                ranges += f" ほか {len(entries) - max_ranges} 範囲"
+            lines.append(f"{label} ({sum(entry['count'] for entry in entries)}件): {ranges}")
+        return lines
+
+    def write(self, path):
+        """変更ログをファイルに書き出す (形式は拡張子で判定)。書き出したエントリ数を返す"""
+        is_gzip = path.lower().endswith(".gz")
+        is_csv = (path[:-3] if is_gzip else path).lower().endswith(".csv")
+        raw = gzip.open(path, "wb") if is_gzip else open(path, "wb")
+        with io.TextIOWrapper(raw, encoding="utf-8-sig" if is_csv else "utf-8", newline="") as f:
+            if is_csv:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.rows())
+            else:
+                for row in self.rows():
+                    f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        return len(self.entries)
@@ -8,6 +8,7 @@ import shutil
 from openpyxl.worksheet.table import Table, TableStyleInfo
 from openpyxl.styles import Font
 from openpyxl.utils import get_column_letter
+from style_cache import apply_style_to_range
 
 # win32com をインポート
 try:
@@ -411,9 +412,9 @@ def process_report():
                         if ws.max_row <= 1:
                             continue
 
-                        for row in ws.iter_rows(min_row=1):
-                            for cell in row:
-                                cell.font = meiryo_font
+                        # 同じFontを使い回し、シート全体に一括で設定する
+                        apply_style_to_range(
+                            ws, 1, 1, ws.max_row, ws.max_column, font=meiryo_font)
 
                         for col in ws.columns:
                             max_length = 0
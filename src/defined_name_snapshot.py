@@ -0,0 +1,230 @@
+"""
+Excel (COM) の名前定義と値をまとめて取得するスナップショット
+
+名前ごとに excel.Range(名前).Value を呼ぶと、名前の数 × (フル名・短縮名・再試行) 回の
+COM 呼び出しが発生します。このモジュールでは
+
+    1. wb.Names を1回だけ列挙して、名前と参照先 (RefersTo) を読み取る
+       (wb.Names にはシートレベルの名前も "シート名!名前" の形で含まれる)
+       使う名前が決まっている場合は names を指定すると、列挙せずにその名前だけを Names.Item で読む
+    2. 参照先のセルをシートごとにまとめ、外接範囲を ws.Range(...).Value の1回で読み取る
+    3. 以降の名前の検索はメモリ上の辞書だけで行う
+
+という手順で COM 呼び出しを減らします。
+数式や定数、複数範囲など参照先を解析できない名前だけは、最初に検索されたときに
+excel.Range(名前).Value で取得します (結果は保持する)。
+
+※COM に依存しないため、テストやベンチマークでは同じ属性を持つ代替オブジェクトを渡せます。
+"""
+
+import re
+
+from openpyxl.utils.cell import column_index_from_string, get_column_letter
+
+MAX_BULK_CELLS = 20000 # 外接範囲がこれより大きいシートは名前ごとに読み取る
+
+# ='シート名'!$A$1 / =シート名!$A$1:$B$2 (ブック外参照 [Book]Sheet や複数範囲は対象外)
+refers_to_pattern = re.compile(
+    r"^=(?:'((?:[^']|'')+)'|([^'!\[\]]+))!\$?([A-Z]{1,3})\$?(\d+)(?::\$?([A-Z]{1,3})\$?(\d+))?$")
+local_name_pattern = re.compile(r"^(?:'((?:[^']|'')+)'|([^'!]+))!(.+)$")
+# 引用符で囲まないシート名 (文字・数字・_・. だけで、数字と . で始まらない) と、セル参照と紛らわしいシート名
+plain_sheet_pattern = re.compile(r"[^\W\d.][\w.]*")
+cell_like_sheet_pattern = re.compile(r"[A-Za-z]{1,3}\d+|[RrCc]\d*|[Rr]\d*[Cc]\d*")
+
+
+def parse_refers_to(refers_to):
+    """
+    参照式を (シート名, 開始行, 開始列, 終了行, 終了列) に分解する。解析できなければ None を返す。
+    """
+    match = refers_to_pattern.match(refers_to or "")
+    if match is None:
+        return None
+    sheet = match.group(1).replace("''", "'") if match.group(1) else match.group(2)
+    first_col = column_index_from_string(match.group(3))
+    first_row = int(match.group(4))
+    last_col = column_index_from_string(match.group(5)) if match.group(5) else first_col
+    last_row = int(match.group(6)) if match.group(6) else first_row
+    return (sheet, min(first_row, last_row), min(first_col, last_col),
+            max(first_row, last_row), max(first_col, last_col))
+
+
+def split_local_name(full_name):
+    """'Sheet1!NAME' -> ('Sheet1', 'NAME')、ブックレベルの名前は (None, 名前)"""
+    match = local_name_pattern.match(full_name)
+    if match is None:
+        return None, full_name
+    sheet = match.group(1).replace("''", "'") if match.group(1) else match.group(2)
+    return sheet, match.group(3)
+
+
+def _read_refers_to(name_obj):
+    try:
+        return name_obj.RefersTo
+    except Exception:
+        try:
+            return name_obj.RefersToLocal
+        except Exception:
+            return None
+
+
+def _quote_sheet(sheet):
+    """シート名を参照式用に引用符で囲む ('My Sheet' -> "'My Sheet'")"""
+    return "'" + sheet.replace("'", "''") + "'"
+
+
+def _sheet_prefix(sheet):
+    """
+    Name.Name と同じ形のシート名の部分を返す。
+
+    Excel は引用符が必要なシート名 (空白・記号を含む、数字で始まる、セル参照と紛らわしい) だけを
+    'My Sheet'!NAME のように囲み、情報!NAME のようなシート名は囲まない。
+    """
+    if plain_sheet_pattern.fullmatch(sheet) and not cell_like_sheet_pattern.fullmatch(sheet):
+        return sheet
+    return _quote_sheet(sheet)
+
+
+def _address(top, left, bottom, right):
+    """行・列番号から 'B2:EB16' 形式のアドレスを作る"""
+    return f"{get_column_letter(left)}{top}:{get_column_letter(right)}{bottom}"
+
+
+def _as_grid(value):
+    """Range.Value の戻り値 (単一セルなら値、複数セルならタプルのタプル) を2次元に揃える"""
+    if isinstance(value, tuple):
+        return value
+    return ((value,),)
+
+
+class DefinedNameSnapshot:
+    """名前定義と参照先の値を保持し、名前の検索をメモリ上で行う"""
+
+    def __init__(self, excel, workbook, active_sheet_name=None, names=None):
+        self.excel = excel
+        self.active_sheet_name = active_sheet_name
+        self.refers_to = {}     # フル名 ("Sheet1!NAME" を含む) -> 参照式
+        self._values = {}       # (シート名 (ブックレベルは None), 名前) -> 値
+        self._lazy = set()      # 値を検索時に Range から取得する (シート名, 名前)
+        self._capture(workbook, names)
+
+    @classmethod
+    def capture(cls, excel, workbook, active_sheet=None, names=None):
+        """
+        スナップショットを作成する。
+
+        Args:
+            active_sheet: シートレベルの名前を優先するシート (通常は ActiveSheet)。
+            names (list, optional): 使う名前。指定すると、その名前 (と短縮名) だけを読み込む。
+        """
+        active_sheet_name = None
+        if active_sheet is not None:
+            try:
+                active_sheet_name = active_sheet.Name
+            except Exception:
+                pass
+        return cls(excel, workbook, active_sheet_name, names)
+
+    def _iter_names(self, workbook, names):
+        """(フル名, 参照式) を返す。names 指定時はアクティブシートのシートレベル → ブックレベルの順に Item で探す"""
+        names_collection = workbook.Names
+        if names is None:
+            for name_obj in names_collection:
+                try:
+                    full_name = name_obj.Name
+                except Exception:
+                    continue
+                yield full_name, _read_refers_to(name_obj)
+            return
+
+        wanted = []
+        for name in names:
+            for candidate in (name, name.split(".")[-1]):
+                if candidate not in wanted:
+                    wanted.append(candidate)
+        scopes = [self.active_sheet_name, None] if self.active_sheet_name else [None]
+        for name in wanted:
+            for scope in scopes:
+                full_name = name if scope is None else f"{_sheet_prefix(scope)}!{name}"
+                try:
+                    name_obj = names_collection.Item(full_name)
+                except Exception:
+                    continue # 存在しない名前
+                yield (full_name if scope is None else f"{scope}!{name}"), _read_refers_to(name_obj)
+
+    def _capture(self, workbook, names):
+        areas = {} # シート名 -> [(名前のキー, 開始行, 開始列, 終了行, 終了列)]
+        for full_name, refers in self._iter_names(workbook, names):
+            if not refers:
+                continue
+            self.refers_to[full_name] = refers
+            sheet_scope, name = split_local_name(full_name)
+            key = (sheet_scope, name)
+            parsed = parse_refers_to(refers)
+            if parsed is None:
+                self._lazy.add(key)
+                continue
+            sheet, *bounds = parsed
+            areas.setdefault(sheet, []).append((key, *bounds))
+
+        for sheet, sheet_areas in areas.items():
+            try:
+                worksheet = workbook.Worksheets(sheet)
+                self._read_areas(worksheet, sheet_areas)
+            except Exception:
+                # シートが見つからないなどの場合は検索時に Range から取得する
+                self._lazy.update(key for key, *_ in sheet_areas)
+
+    def _read_areas(self, worksheet, sheet_areas):
+        """シート内の参照先を外接範囲の1回の読み取りで取得する (大きすぎる場合は範囲ごと)"""
+        top = min(area[1] for area in sheet_areas)
+        left = min(area[2] for area in sheet_areas)
+        bottom = max(area[3] for area in sheet_areas)
+        right = max(area[4] for area in sheet_areas)
+        if (bottom - top + 1) * (right - left + 1) <= MAX_BULK_CELLS:
+            grid = _as_grid(worksheet.Range(_address(top, left, bottom, right)).Value)
+            blocks = [(area, grid, top, left) for area in sheet_areas]
+        else:
+            blocks = []
+            for area in sheet_areas:
+                _, r1, c1, r2, c2 = area
+                grid = _as_grid(worksheet.Range(_address(r1, c1, r2, c2)).Value)
+                blocks.append((area, grid, r1, c1))
+
+        for (key, r1, c1, r2, c2), grid, origin_row, origin_col in blocks:
+            rows = [row[c1 - origin_col:c2 - origin_col + 1] for row in grid[r1 - origin_row:r2 - origin_row + 1]]
+            value = rows[0][0] if r1 == r2 and c1 == c2 else tuple(tuple(row) for row in rows)
+            self._values[key] = value
+
+    def _lookup(self, name):
+        """Excel の Range(名前) と同じく、アクティブシートのシートレベル → ブックレベルの順で探す"""
+        keys = [(self.active_sheet_name, name)] if self.active_sheet_name else []
+        keys.append((None, name))
+        for key in keys:
+            if key in self._values:
+                return True, self._values[key]
+            if key in self._lazy:
+                reference = name if key[0] is None else f"{_quote_sheet(key[0])}!{name}"
+                self._values[key] = self._range_value(reference)
+                self._lazy.discard(key)
+                return True, self._values[key]
+        return False, None
+
+    def _range_value(self, reference):
+        try:
+            return self.excel.Range(reference).Value
+        except Exception:
+            return None
+
+    def get(self, name):
+        """
+        名前の値を返す。見つからない場合は "HOUSES.BUILDING_NO" -> "BUILDING_NO" のように
+        最後の "." 以降の短縮名でも探す。どちらも無ければ None。
+        """
+        candidates = [name]
+        if "." in name:
+            candidates.append(name.split(".")[-1])
+        for candidate in candidates:
+            found, value = self._lookup(candidate)
+            if found:
+                return value
+        return None
@@ -0,0 +1,110 @@
+"""
+ダウンロードフォルダの写真ZIPの索引
+
+数千件のファイルがあるダウンロードフォルダを、ブックごとに glob.glob("{BuildingNo}*.zip") で
+走査する代わりに、ZIP ファイルの (名前, サイズ, 更新日時) を名前順のリストとして保持し、
+bisect で前方一致検索します。
+
+・索引はローカル保存領域 (local_store) に保存し、一括格納の実行をまたいで使います
+・フォルダの更新日時 (ファイルの追加・削除・名前変更で変わる) が変わった場合だけ os.scandir で走査し直します
+  (ZIP 以外のファイルは名前だけで除外し、stat しません)
+・候補が複数ある場合は、更新日時が最も新しいもの (同じなら名前順で最初のもの) を返します
+  (glob.glob の結果の先頭はファイルシステムの順序によって変わるため)
+"""
+
+import os
+from bisect import bisect_left
+
+from local_store import key_for_path, load_json, save_json, store_path
+
+INDEX_VERSION = 1
+ZIP_EXTENSION = ".zip"
+
+_indexes = {} # 正規化したパス -> DownloadsIndex
+
+
+class DownloadsIndex:
+    """1つのフォルダ直下の ZIP ファイルを名前順で保持する"""
+
+    def __init__(self, folder):
+        self.folder = os.path.abspath(folder)
+        self.entries = [] # [名前, サイズ, 更新日時(ns)] を名前順に
+        self.mtime_ns = None
+        self.store_file = store_path("downloads_index", f"{key_for_path(self.folder)}.json.gz")
+        self._load()
+
+    def _load(self):
+        data = load_json(self.store_file)
+        if data and data.get("version") == INDEX_VERSION and data.get("path") == self.folder:
+            self.entries = data["entries"]
+            self.mtime_ns = data["mtime_ns"]
+
+    def _save(self):
+        try:
+            save_json(self.store_file, {"version": INDEX_VERSION, "path": self.folder,
+                                        "mtime_ns": self.mtime_ns, "entries": self.entries})
+        except OSError as e:
+            print(f"警告: ダウンロードフォルダの索引を保存できませんでした: {self.store_file} ({e})")
+
+    def refresh(self):
+        """
+        フォルダの更新日時が変わっていれば走査し直す。
+
+        Returns:
+            bool: 走査し直した場合 True。
+        """
+        try:
+            mtime_ns = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            self.entries, self.mtime_ns = [], None
+            return True
+        if mtime_ns == self.mtime_ns:
+            return False
+
+        entries = []
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if not entry.name.lower().endswith(ZIP_EXTENSION):
+                        continue
+                    try:
+                        if entry.is_file():
+                            st = entry.stat() # Windows では走査結果に含まれるため追加の問い合わせは発生しない
+                            entries.append([entry.name, st.st_size, st.st_mtime_ns])
+                    except OSError:
+                        continue
+        except OSError:
+            entries = []
+        entries.sort()
+        self.entries = entries
+        self.mtime_ns = mtime_ns
+        self._save()
+        return True
+
+    def candidates(self, prefix):
+        """名前が prefix で始まる ZIP を (名前, サイズ, 更新日時) のリストで返す (名前順)"""
+        self.refresh()
+        index = bisect_left(self.entries, [prefix])
+        result = []
+        while index < len(self.entries) and self.entries[index][0].startswith(prefix):
+            result.append(tuple(self.entries[index]))
+            index += 1
+        return result
+
+    def find_newest(self, prefix):
+        """名前が prefix で始まる ZIP のうち、更新日時が最も新しいもののフルパスを返す。無ければ None"""
+        candidates = self.candidates(prefix)
+        if not candidates:
+            return None
+        name = min(candidates, key=lambda entry: (-entry[2], entry[0]))[0]
+        return os.path.join(self.folder, name)
+
+
+def downloads_index_for(folder):
+    """フォルダごとに1つの DownloadsIndex を返す"""
+    key = os.path.normcase(os.path.abspath(folder))
+    index = _indexes.get(key)
+    if index is None:
+        index = DownloadsIndex(folder)
+        _indexes[key] = index
+    return index
@@ -4,6 +4,8 @@ from tkinter import ttk, messagebox
 from tkinter import IntVar, BooleanVar, StringVar
 import pythoncom
 
+import room_numbering
+
 def get_excel_application():
     """
     既存のExcelアプリケーションを取得するか、なければ新しく作成する
@@ -178,8 +180,8 @@ def generate_room_numbers():
             # 3桁未満の場合はそのまま部屋番号として扱う
             start_room_num = int(start_room)
     else:
-        # 文字の場合、最初の文字を使用
-        start_room_num = start_room[0]
+        # 文字の場合、英字だけなら全体 (例: "AA")、それ以外は最初の文字を使用
+        start_room_num = start_room if start_room.isascii() and start_room.isalpha() else start_room[0]
     
     # Excelアプリケーションの取得
     try:
@@ -220,30 +222,12 @@ def generate_room_numbers():
             floor_index = floor_count - floor  # 上の階から配置するための逆インデックス
             
             # 現在の階の部屋番号のリストを作成
-            room_numbers = []
-            
             if start_is_numeric:
-                # 数字の部屋番号の場合
-                current_room_num = start_room_num
-                for i in range(room_count * 2):  # 余裕を持って多めに生成
-                    if len(room_numbers) >= room_count:
-                        break
-                    
-                    # 4号室と9号室のチェック
-                    if (current_room_num % 10 == 4 and not include_4) or (current_room_num % 10 == 9 and not include_9):
-                        current_room_num += 1
-                        continue
-                    
-                    room_number = floor * 100 + current_room_num
-                    room_numbers.append(str(room_number))
-                    current_room_num += 1
+                # 数字の部屋番号の場合 (4号室と9号室は指定に応じて飛ばす)
+                room_numbers = list(room_numbering.room_numbers(room_count, floor, start_room_num, include_4, include_9))
             else:
-                # 文字の部屋番号の場合
-                current_char = start_room_num
-                for i in range(room_count):
-                    room_numbers.append(f"{floor}{current_char}")
-                    # 次の文字へ（例：'A' -> 'B'）
-                    current_char = chr(ord(current_char) + 1)
+                # 文字の部屋番号の場合 (例：'A' -> 'B'、'Z' の次は 'AA')
+                room_numbers = list(room_numbering.alphabet_rooms(room_count, floor, start_room_num))
             
             # 老番順の場合はリストを逆順にする
             if room_order == 2:  # 老番順
@@ -0,0 +1,20 @@
+"""
+ファイルの内容のハッシュ
+
+ファイルを CHUNK_SIZE ごとに読んで SHA-256 を計算します (ファイルの大きさによらずメモリ使用量は一定)。
+スナップショット (cell_snapshot)、線番表のインデックス (line_number_index)、
+格納ファイルの転送 (file_transfer)、置き換えたファイルのアーカイブ (archive_store) で共通です。
+"""
+
+import hashlib
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """ファイルの SHA-256 を16進文字列で返す"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,184 @@
+"""
+ファイルの排他オープン待ちモジュール
+
+Excel などが対象ファイルを開いている間は、排他オープン (Windows) または
+排他ロック (Linux などの fcntl 環境) が取得できません。固定時間スリープする代わりに、
+指数バックオフで排他オープンを試行し、取得できた時点ですぐに戻ります。
+
+Excel がブックを開くと同じフォルダにオーナーファイル (~$ブック名.xlsx) が作成されるため、
+オーナーファイルがロックされている間も「使用中」とみなします。
+(Excel が異常終了して残ったオーナーファイルはロックされていないので無視します)
+"""
+
+import os
+import sys
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+DEFAULT_TIMEOUT = 10.0      # 解放を待つ最大秒数
+INITIAL_DELAY = 0.02        # 最初の再試行までの待ち時間 (秒)
+MAX_DELAY = 0.5             # 再試行間隔の上限 (秒)
+
+AcquireResult = namedtuple("AcquireResult", ["seconds", "attempts", "stale_owner_file"])
+
+
+class FileBusyError(TimeoutError):
+    """期限までにファイルが解放されなかった場合に送出する例外"""
+
+    def __init__(self, filepath, reason, seconds, attempts):
+        super().__init__(f"'{os.path.basename(filepath)}' が {seconds:.1f} 秒以内に解放されませんでした ({reason})")
+        self.filepath = filepath
+        self.reason = reason
+        self.seconds = seconds
+        self.attempts = attempts
+
+
+def owner_file_candidates(filepath):
+    """Excel のオーナーファイル (~$name.xlsx) の候補パスを返す"""
+    folder, name = os.path.split(os.path.abspath(filepath))
+    candidates = [os.path.join(folder, "~$" + name)]
+    if len(name) > 2:
+        # 長いファイル名では先頭2文字が ~$ に置き換えられる場合がある
+        candidates.append(os.path.join(folder, "~$" + name[2:]))
+    return candidates
+
+
+def _lock_fd(fd):
+    if sys.platform == "win32":
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _unlock_fd(fd):
+    if sys.platform == "win32":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def try_exclusive_open(filepath):
+    """
+    ファイルを排他で開けるか試す (開けた場合はすぐに閉じる)。
+
+    Returns:
+        bool: 排他オープンできれば True、他のプロセスが使用中なら False。
+    Raises:
+        FileNotFoundError: ファイルが存在しない場合。
+    """
+    try:
+        fd = os.open(filepath, os.O_RDWR | getattr(os, "O_BINARY", 0))
+    except PermissionError:
+        # Windows では Excel が書き込み禁止の共有モードで開いているとここで失敗する
+        return False
+    try:
+        _lock_fd(fd)
+    except OSError:
+        return False
+    else:
+        _unlock_fd(fd)
+        return True
+    finally:
+        os.close(fd)
+
+
+def _busy_reason(filepath):
+    """使用中ならその理由、解放済みなら None を返す。2番目の値は放置されたオーナーファイルの有無"""
+    stale_owner = False
+    for owner_path in owner_file_candidates(filepath):
+        if not os.path.exists(owner_path):
+            continue
+        try:
+            if not try_exclusive_open(owner_path):
+                return f"オーナーファイル '{os.path.basename(owner_path)}' が使用中", stale_owner
+            stale_owner = True
+        except FileNotFoundError:
+            continue
+    if not try_exclusive_open(filepath):
+        return "ファイルが他のプロセスで開かれています", stale_owner
+    return None, stale_owner
+
+
+def wait_for_file_release(filepath, timeout=DEFAULT_TIMEOUT, initial_delay=INITIAL_DELAY, max_delay=MAX_DELAY):
+    """
+    ファイルが排他で開けるようになるまで指数バックオフで待つ。
+
+    Returns:
+        AcquireResult: 取得までの秒数、試行回数、放置されたオーナーファイルがあったか。
+    Raises:
+        FileNotFoundError: ファイルが存在しない場合。
+        FileBusyError: timeout 秒以内に解放されなかった場合。
+    """
+    start_time = time.perf_counter()
+    delay = initial_delay
+    attempts = 0
+    while True:
+        attempts += 1
+        reason, stale_owner = _busy_reason(filepath)
+        elapsed = time.perf_counter() - start_time
+        if reason is None:
+            return AcquireResult(elapsed, attempts, stale_owner)
+        if elapsed >= timeout:
+            raise FileBusyError(filepath, reason, elapsed, attempts)
+        time.sleep(min(delay, timeout - elapsed))
+        delay = min(delay * 2, max_delay)
+
+
+@contextmanager
+def hold_file_lock(filepath):
+    """
+    ファイルの排他ロックを保持する (Excel がファイルを開いている状態の代わりとして使用)。
+
+    例:
+        with hold_file_lock("sample.xlsx"):
+            wait_for_file_release("sample.xlsx", timeout=0.1)  # -> FileBusyError
+    """
+    fd = os.open(filepath, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0))
+    try:
+        _lock_fd(fd)
+        try:
+            yield filepath
+        finally:
+            _unlock_fd(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def try_file_lock(filepath, timeout=0.0, poll_interval=0.5):
+    """
+    ファイルの排他ロックを、待たずに (または timeout 秒まで再試行して) 取得する。
+
+    取得できた場合は True を返し、with を抜けるまで保持する。取得できなかった場合は False を返す。
+
+    例:
+        with try_file_lock("worker.lock", timeout=10.0) as locked:
+            if not locked:
+                return  # 別のプロセスが実行中
+    """
+    fd = os.open(filepath, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0))
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                _lock_fd(fd)
+                break
+            except OSError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    yield False
+                    return
+                time.sleep(min(poll_interval, remaining))
+        try:
+            yield True
+        finally:
+            _unlock_fd(fd)
+    finally:
+        os.close(fd)
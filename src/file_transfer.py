@@ -0,0 +1,122 @@
+"""
+格納ファイル (xlsx / PDF / 写真ZIP) のコピー・移動をまとめて行う
+
+・複数のファイルをスレッドプールで同時にコピー・移動します (ネットワーク共有への書き込み待ちを重ねる)
+・格納先に同じ内容のファイルがある場合は、サイズと更新日時、またはハッシュ (SHA-256 を順に読みながら計算) を
+  比べてスキップします
+・コピーは shutil.copy2 で行います (Linux は sendfile、macOS は fcopyfile のカーネルコピー、
+  Windows は 1MiB のバッファで読み書き)。移動は同じドライブなら名前の変更だけです
+
+run_transfers() は結果と合わせて、移動したバイト数・スキップしたバイト数・スループットを返します。
+"""
+
+import os
+import shutil
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from file_hash import file_sha256
+
+DEFAULT_WORKERS = 4
+
+STATUS_COPIED = "コピー"
+STATUS_MOVED = "移動"
+STATUS_SKIPPED = "同一のためスキップ"
+STATUS_FAILED = "失敗"
+
+
+class Transfer(namedtuple("Transfer", ["source", "target", "move"])):
+    """1ファイルのコピー (move=False) または移動 (move=True)"""
+
+    def __new__(cls, source, target, move=False):
+        return super().__new__(cls, source, target, move)
+
+
+# status は STATUS_*、size は対象のバイト数、error は失敗時のメッセージ
+TransferResult = namedtuple("TransferResult", ["transfer", "status", "size", "error"])
+
+
+def same_content(source, target):
+    """
+    2つのファイルの内容が同じか。
+
+    サイズが違えば読まずに False、サイズと更新日時が同じ (shutil.copy2 でコピーしたもの) なら読まずに True、
+    それ以外は両方のハッシュを比べる。
+    """
+    try:
+        source_stat, target_stat = os.stat(source), os.stat(target)
+    except OSError:
+        return False
+    if source_stat.st_size != target_stat.st_size:
+        return False
+    if source_stat.st_mtime_ns == target_stat.st_mtime_ns:
+        return True
+    return file_sha256(source) == file_sha256(target)
+
+
+def transfer_file(transfer, before_replace=None):
+    """
+    1ファイルをコピーまたは移動する。
+
+    Args:
+        before_replace (callable, optional): 格納先に内容の異なるファイルがある場合に、上書き前に
+            before_replace(transfer) を呼ぶ (old フォルダへの移動など)。False を返した場合は中止する。
+    Returns:
+        TransferResult
+    """
+    source, target, move = transfer
+    try:
+        size = os.path.getsize(source)
+        if os.path.exists(target):
+            if same_content(source, target):
+                if move:
+                    os.remove(source)
+                return TransferResult(transfer, STATUS_SKIPPED, size, None)
+            if before_replace is not None and not before_replace(transfer):
+                return TransferResult(transfer, STATUS_FAILED, size, f"既存ファイルを置き換えられませんでした: {target}")
+        if move:
+            shutil.move(source, target)
+            return TransferResult(transfer, STATUS_MOVED, size, None)
+        shutil.copy2(source, target)
+        return TransferResult(transfer, STATUS_COPIED, size, None)
+    except Exception as e:
+        return TransferResult(transfer, STATUS_FAILED, 0, f"{type(e).__name__}: {e}")
+
+
+class TransferStats:
+    """転送量の集計"""
+
+    def __init__(self, results, elapsed):
+        self.files = len(results)
+        self.bytes_moved = sum(r.size for r in results if r.status in (STATUS_COPIED, STATUS_MOVED))
+        self.bytes_skipped = sum(r.size for r in results if r.status == STATUS_SKIPPED)
+        self.failed = sum(1 for r in results if r.status == STATUS_FAILED)
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self):
+        """1秒あたりの転送バイト数"""
+        return self.bytes_moved / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"転送 {self.bytes_moved / 1e6:.1f}MB / スキップ {self.bytes_skipped / 1e6:.1f}MB "
+                f"({self.files} ファイル, {self.elapsed:.2f}秒, {self.throughput / 1e6:.1f}MB/秒)")
+
+
+def run_transfers(transfers, workers=None, before_replace=None):
+    """
+    複数のファイルを同時にコピー・移動する。
+
+    ※同じ格納先を持つ転送を渡さないでください (呼び出し側で重複を除く)。
+    Returns:
+        tuple: (TransferResult のリスト (入力と同じ順序), TransferStats)
+    """
+    transfers = list(transfers)
+    start_time = time.perf_counter()
+    if len(transfers) <= 1:
+        results = [transfer_file(t, before_replace) for t in transfers]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers or DEFAULT_WORKERS, len(transfers))) as executor:
+            results = list(executor.map(lambda t: transfer_file(t, before_replace), transfers))
+    return results, TransferStats(results, time.perf_counter() - start_time)
@@ -0,0 +1,99 @@
+"""
+星つきxlsxの格納で使うファイル操作 (Excel / COM に依存しない部分)
+
+save_starred_xlsx (Excel 上のアクティブブック) と batch_filing (.xlsx ファイルの一括格納) の両方から使います。
+"""
+
+import datetime
+import os
+
+from archive_store import archive_file
+from downloads_index import downloads_index_for
+
+# 格納先とファイル名の決定に使う名前定義
+FILING_DEFINED_NAMES = ["HOUSES.BUILDING_NO", "HOUSES.BUILDING_NAME", "ADD_NAME1", "ADD_NAME2", "HOUSES.ADDRESS",
+                        "HOUSES.TENTATIVE_NAME", "HOUSES.SERVICE_ID", "HOUSES.BUILDING_STATE"]
+
+INVALID_FILE_CHARS = ["/", "\\", ":", "*", "?", "<", ">", "|", '"']
+PHOTO_ZIP_NAME = "写真.zip"
+EXTRA_PHOTO_ZIP_NAME = "別件写真.zip"
+EXTRA_REPORT_NAME = "別件報告書"
+
+
+def get_file_name(full_path):
+    return os.path.basename(full_path)
+
+
+def sanitize_file_part(text):
+    """ファイル名に使えない文字を "_" に置き換える"""
+    for ch in INVALID_FILE_CHARS:
+        text = text.replace(ch, "_")
+    return text
+
+
+def starred_file_name(building_no, building_name, addname1, addname2):
+    """☆(ADD_NAME1) BuildingNo_BuildingName_ADD_NAME2.xlsx のファイル名を返す"""
+    fix_addname1 = f"({addname1}) " if len(addname1) > 0 else ""
+    return f"☆{fix_addname1}{building_no}_{building_name}_{addname2}.xlsx"
+
+
+def filing_metadata(values):
+    """
+    名前定義の値 {名前: 値} から格納用のメタデータを作成する (save_starred_xlsx と同じ変換)。
+
+    Returns:
+        dict: service_id, building_state, address, building_no, building_name, tentative_name, addname1, addname2
+    """
+    building_no_value = values.get("HOUSES.BUILDING_NO")
+    if isinstance(building_no_value, (int, float)):
+        building_no = str(int(building_no_value))
+    else:
+        building_no = str(building_no_value or "")
+    return {
+        "service_id": values.get("HOUSES.SERVICE_ID"),
+        "building_state": values.get("HOUSES.BUILDING_STATE"),
+        "address": values.get("HOUSES.ADDRESS") or "",
+        "building_no": sanitize_file_part(building_no),
+        "building_name": sanitize_file_part(str(values.get("HOUSES.BUILDING_NAME") or "")),
+        "tentative_name": values.get("HOUSES.TENTATIVE_NAME") or "",
+        "addname1": str(values.get("ADD_NAME1") or ""),
+        "addname2": sanitize_file_part(str(values.get("ADD_NAME2") or "")),
+    }
+
+
+def photo_zip_name(addname2):
+    """格納先での写真ZIPのファイル名 (別件報告書の場合は 別件写真.zip)"""
+    return EXTRA_PHOTO_ZIP_NAME if addname2 == EXTRA_REPORT_NAME else PHOTO_ZIP_NAME
+
+
+def find_photo_zip(download_folder_path, building_no, tentative_name):
+    """
+    ダウンロードフォルダから写真ZIPを探す。
+
+    tentative_name が空の場合は building_no で始まるZIP (複数あれば更新日時が最も新しいもの。downloads_index で検索)、
+    それ以外は BuildingNo_仮称.zip を返す。見つからない場合は None。
+    """
+    if str(tentative_name).strip() == "":
+        return downloads_index_for(download_folder_path).find_newest(building_no)
+    zip_file_name = os.path.join(download_folder_path, f"{building_no}_{tentative_name}.zip")
+    return zip_file_name if os.path.exists(zip_file_name) else None
+
+
+def is_created_before_today(file_path):
+    """格納先の既存ファイルが今日より前に作成されたものか (今日作成したものは上書きする)"""
+    return datetime.date.fromtimestamp(os.path.getctime(file_path)) < datetime.date.today()
+
+
+def move_existing_file(target_file_path, base_folder):
+    """
+    置き換えられる既存ファイルを、移動先フォルダ内の今日の日付の old フォルダから参照できるようにする関数
+    ※内容はドライブごとのアーカイブ (archive_store) に1つだけ保存し、old フォルダにはハードリンクを置く
+    """
+    today_str = datetime.datetime.today().strftime("%Y-%m-%d")
+    try:
+        archive_file(target_file_path, base_folder)
+    except Exception as e:
+        print(
+            f"ファイル '{get_file_name(target_file_path)}' を '{today_str}_old' フォルダに移動できませんでした。エラー: {e}")
+        return False
+    return True
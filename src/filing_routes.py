@@ -0,0 +1,171 @@
+"""
+星つきxlsxの格納先フォルダの振り分け表
+
+save_starred_xlsx の「サービス / 新築・既存 / 地域」による格納先の分岐を、上から順に評価する
+振り分け表 (FILING_RULES) として定義します。新しいサービスや地域は表に行を追加するだけで対応できます。
+
+    plan(metadata, folder_map)        ... 表だけで格納先の候補を決める (ファイルシステムには触れない)
+    plan_many(metadata_list, ...)     ... 複数ブック分をまとめて plan
+    execute_plan(filing_plan, ...)    ... 既存フォルダを検索し、無ければ作成して格納先を確定する
+
+ルールの照合結果は (サービス, 状態, 地域) ごとに保持するため、同じ組み合わせは2回目以降は辞書の参照だけです。
+"""
+
+import os
+from collections import namedtuple
+
+from address_region import REGION_CHUBU, REGION_KANSAI, classify_region
+
+ANY = "*"
+STATE_NEW = "新築"
+STATE_EXISTING = "既存"
+
+# 新規フォルダ名: 新築は仮称 (TENTATIVE_NAME)、それ以外は建物名 (BUILDING_NAME)
+NAME_NEW = "{building_no}_{tentative_name}"
+NAME_EXISTING = "{building_no}_{building_name}"
+
+MSG_FOUND = "以下のフォルダに自動的に格納します: {path}"
+MSG_AMBIGUOUS = "BuildingNoを先頭に含むフォルダが複数見つかりました。処理を中止します。"
+
+# 既存フォルダの検索 (フォルダのキー, 見つかった場合のメッセージ, 複数見つかった場合のメッセージ)
+Search = namedtuple("Search", ["folder_key", "found_message", "ambiguous_message"])
+
+# 振り分け先: 順に検索し、どこにも無ければ create_in に name_template のフォルダを作成する。error があれば中止
+Route = namedtuple("Route", ["searches", "create_in", "name_template", "error"])
+
+# 振り分け表の1行 (サービス, 新築/既存, 地域 → 振り分け先)。ANY はすべてに一致する
+FilingRule = namedtuple("FilingRule", ["service", "state", "region", "route"])
+
+# 振り分け表の評価結果 (ファイルシステムに触れる前の状態)
+FilingPlan = namedtuple("FilingPlan", ["metadata", "route", "searches", "create_path", "error"])
+
+
+def default_folder_map(user_profile):
+    """フォルダのキー → パス (フォルダパスやキー名、漢字部分を適当に変更した例)"""
+    return {
+        "FOO_new": os.path.join(user_profile, "Documents", "TestFolder", "新規案件"),
+        "FOO_exist": os.path.join(user_profile, "Documents", "TestFolder", "既存案件"),
+        "FOO_chubu": os.path.join(user_profile, "Documents", "TestFolder", "既存案件", "中部地方"),
+        "FOO_kansai": os.path.join(user_profile, "Documents", "TestFolder", "関西支社", "関西案件"),
+        "FOO_newex": os.path.join(user_profile, "Documents", "TestFolder", "新規案件", "導入済み"),
+        "BAR_exist": os.path.join(user_profile, "Documents", "TestFolder", "BAR既存")
+    }
+
+
+def _generic_route(folder_key, name_template):
+    """フォルダ内を BuildingNo で検索し、無ければ作成する振り分け先"""
+    return Route((Search(folder_key, MSG_FOUND, MSG_AMBIGUOUS),), folder_key, name_template, None)
+
+
+def _error_route(message):
+    return Route((), None, None, message)
+
+
+FILING_RULES = (
+    FilingRule("FOO", STATE_NEW, REGION_CHUBU, _generic_route("FOO_chubu", NAME_NEW)),
+    FilingRule("FOO", ANY, REGION_CHUBU, _generic_route("FOO_chubu", NAME_EXISTING)),
+    FilingRule("FOO", STATE_NEW, REGION_KANSAI, _generic_route("FOO_kansai", NAME_NEW)),
+    FilingRule("FOO", ANY, REGION_KANSAI, _generic_route("FOO_kansai", NAME_EXISTING)),
+    FilingRule("FOO", STATE_NEW, ANY, Route(
+        (Search("FOO_newex", "導入済みフォルダに既存フォルダが見つかりました。格納先: {path}",
+                "導入済みフォルダ内に複数の該当フォルダが見つかりました。処理を中止します。"),
+         Search("FOO_new", "新規案件フォルダに既存フォルダが見つかりました。格納先: {path}",
+                "新規案件フォルダ内に複数の該当フォルダが見つかりました。処理を中止します。")),
+        "FOO_new", NAME_NEW, None)),
+    FilingRule("FOO", STATE_EXISTING, ANY, _generic_route("FOO_exist", NAME_EXISTING)),
+    FilingRule("FOO", ANY, ANY, _error_route("HOUSES.BUILDING_STATEが新築でも既存でもありません。処理を中止します。")),
+    FilingRule("BAR", STATE_NEW, ANY, _generic_route("BAR_exist", NAME_NEW)),
+    FilingRule("BAR", ANY, ANY, _generic_route("BAR_exist", NAME_EXISTING)),
+    FilingRule(ANY, ANY, ANY, _error_route("ServiceIDがFOOでもBARでもありません: {service_id}")),
+)
+
+
+class FilingRouteError(Exception):
+    """格納先を決められない場合 (該当フォルダが複数ある、振り分け表に該当しない) に送出する例外"""
+
+    def __init__(self, message, candidates=()):
+        super().__init__(message)
+        self.candidates = list(candidates)
+
+
+class FilingRouter:
+    """振り分け表を (サービス, 状態, 地域) → 振り分け先 の辞書として評価する"""
+
+    def __init__(self, rules=FILING_RULES):
+        self.rules = tuple(rules)
+        self._dispatch = {}
+
+    def route_for(self, service, state, region):
+        key = (service, state, region)
+        route = self._dispatch.get(key)
+        if route is None:
+            for rule in self.rules:
+                if (rule.service in (ANY, service) and rule.state in (ANY, state)
+                        and rule.region in (ANY, region)):
+                    route = rule.route
+                    break
+            else:
+                route = _error_route("格納先の振り分けルールがありません。")
+            self._dispatch[key] = route
+        return route
+
+    def plan(self, metadata, folder_map):
+        """
+        1ブック分のメタデータから格納先の候補を決める (ファイルシステムには触れない)。
+
+        Args:
+            metadata (dict): service_id, building_state, address, building_no, building_name, tentative_name
+            folder_map (dict): フォルダのキー → パス
+        """
+        region = classify_region(metadata.get("address") or "")
+        route = self.route_for(metadata.get("service_id"), metadata.get("building_state"), region)
+        if route.error:
+            return FilingPlan(metadata, route, [], None, route.error.format(**metadata))
+        fields = {key: metadata.get(key) or "" for key in ("building_no", "building_name", "tentative_name")}
+        searches = [(folder_map[search.folder_key], search) for search in route.searches]
+        create_path = os.path.join(folder_map[route.create_in], route.name_template.format(**fields))
+        return FilingPlan(metadata, route, searches, create_path, None)
+
+    def plan_many(self, metadata_list, folder_map):
+        return [self.plan(metadata, folder_map) for metadata in metadata_list]
+
+
+_default_router = FilingRouter()
+
+
+def plan(metadata, folder_map):
+    return _default_router.plan(metadata, folder_map)
+
+
+def plan_many(metadata_list, folder_map):
+    return _default_router.plan_many(metadata_list, folder_map)
+
+
+def execute_plan(filing_plan, find_folders, create=True):
+    """
+    既存フォルダを検索して格納先を確定する。どこにも無ければ作成する。
+
+    Args:
+        find_folders (callable): find_folders(フォルダ, BuildingNo) で一致するフォルダのリストを返す関数。
+        create (bool): False の場合はフォルダを作成しない (作成予定のパスを返す)。
+    Returns:
+        tuple: (格納先のパス, メッセージ)。作成予定のフォルダが既にある場合のメッセージは None
+    Raises:
+        FilingRouteError: 振り分け表に該当しない、または該当フォルダが複数ある場合。
+    """
+    if filing_plan.error:
+        raise FilingRouteError(filing_plan.error)
+    building_no = filing_plan.metadata.get("building_no") or ""
+    for folder, search in filing_plan.searches:
+        matched = find_folders(folder, building_no)
+        if len(matched) > 1:
+            raise FilingRouteError(search.ambiguous_message, matched)
+        if len(matched) == 1:
+            return matched[0], search.found_message.format(path=matched[0])
+
+    path = filing_plan.create_path
+    if os.path.isdir(path):
+        return path, None
+    if create:
+        os.makedirs(path)
+    return path, f"フォルダが存在しなかったため、新規に作成しました: {path}"
@@ -0,0 +1,126 @@
+"""
+フォルダ名の前方一致検索用インデックス (ネットワーク共有上の案件フォルダ向け)
+
+数千件の案件フォルダがある共有フォルダを毎回 os.scandir で走査する代わりに、
+サブフォルダ名をソート済みのリストとして保持し、bisect で前方一致検索します。
+
+・インデックスはローカル保存領域 (local_store) に保存し、次回の実行でも使います
+・フォルダの更新日時 (フォルダの作成・削除・名前変更で変わる) が変わった場合だけ走査し直します
+・更新日時の確認 (stat) も STAT_INTERVAL 秒以内は省略し、見つからなかった場合だけすぐに確認し直します
+
+前方一致の規則は find_folders_starting_with と同じで、フォルダ名が prefix と完全一致するか、
+prefix の直後が区切り文字 ("_", 半角スペース, "-", "－") の場合に一致とみなします。
+"""
+
+import os
+import time
+from bisect import bisect_left
+
+from local_store import key_for_path, load_json, save_json, store_path
+
+INDEX_VERSION = 1
+FOLDER_DELIMITERS = ("_", " ", "-", "－")
+STAT_INTERVAL = 30.0 # この秒数以内に確認済みならフォルダの更新日時を確認しない
+
+_indexes = {} # 正規化したパス -> FolderIndex
+
+
+def matches_folder_prefix(name, prefix):
+    """フォルダ名が prefix と完全一致するか、prefix + 区切り文字 で始まる場合に True"""
+    if not name.startswith(prefix):
+        return False
+    return len(name) == len(prefix) or name[len(prefix)] in FOLDER_DELIMITERS
+
+
+class FolderIndex:
+    """1つのフォルダ直下のサブフォルダ名をソート済みで保持する"""
+
+    def __init__(self, base_path, stat_interval=STAT_INTERVAL):
+        self.base_path = os.path.abspath(base_path)
+        self.stat_interval = stat_interval
+        self.names = []
+        self.mtime_ns = None
+        self.checked_at = 0.0 # 最後に更新日時を確認した時刻 (time.monotonic)
+        self.store_file = store_path("folder_index", f"{key_for_path(self.base_path)}.json.gz")
+        self._load()
+
+    def _load(self):
+        data = load_json(self.store_file)
+        if data and data.get("version") == INDEX_VERSION and data.get("path") == self.base_path:
+            self.names = data["names"]
+            self.mtime_ns = data["mtime_ns"]
+
+    def _save(self):
+        try:
+            save_json(self.store_file, {"version": INDEX_VERSION, "path": self.base_path,
+                                        "mtime_ns": self.mtime_ns, "names": self.names})
+        except OSError as e:
+            print(f"警告: フォルダ一覧を保存できませんでした: {self.store_file} ({e})")
+
+    def refresh(self, force=False):
+        """
+        フォルダの更新日時が変わっていれば走査し直す。
+
+        Returns:
+            bool: 走査し直した場合 True。
+        """
+        now = time.monotonic()
+        if not force and self.mtime_ns is not None and now - self.checked_at < self.stat_interval:
+            return False
+        try:
+            mtime_ns = os.stat(self.base_path).st_mtime_ns
+        except OSError:
+            # フォルダが無い (または接続できない) 場合は空として扱う
+            self.names, self.mtime_ns, self.checked_at = [], None, now
+            return True
+        self.checked_at = now
+        if not force and mtime_ns == self.mtime_ns:
+            return False
+
+        # 走査前の更新日時を記録する (走査中に変更されても次回に走査し直される)
+        names = []
+        try:
+            with os.scandir(self.base_path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            names.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            names = [] # フォルダでない場合など
+        self.names = sorted(names)
+        self.mtime_ns = mtime_ns
+        self._save()
+        return True
+
+    def _lookup(self, prefix):
+        index = bisect_left(self.names, prefix)
+        result = []
+        while index < len(self.names) and self.names[index].startswith(prefix):
+            name = self.names[index]
+            if matches_folder_prefix(name, prefix):
+                result.append(name)
+            index += 1
+        return result
+
+    def find(self, prefix):
+        """prefix に一致するサブフォルダのフルパスを名前順で返す"""
+        refreshed = self.refresh()
+        names = self._lookup(prefix)
+        if not names and not refreshed:
+            # 見つからない場合は新規フォルダ作成につながるため、更新日時を確認し直す
+            self.checked_at = 0.0
+            if self.refresh():
+                names = self._lookup(prefix)
+        return [os.path.join(self.base_path, name) for name in names]
+
+
+def folder_index_for(base_path):
+    """フォルダごとに1つの FolderIndex を返す"""
+    key = os.path.normcase(os.path.abspath(base_path))
+    index = _indexes.get(key)
+    if index is None:
+        index = FolderIndex(base_path)
+        _indexes[key] = index
+    return index
@@ -0,0 +1,173 @@
+"""
+IPアドレスのサブネット移行 (CIDR → CIDR) 置換エンジン
+
+「変更前CIDR → 変更後CIDR」のルール表から、最長一致 (longest prefix match) で
+ルールを選び、ホスト部を保ったままネットワーク部を書き換えます。
+
+ルール表はソート済みの区間表 (区間の開始アドレスと、その区間で最も具体的なルール) に
+変換しておき、検索は bisect で行います。
+
+ルールファイル (CSV) の例:
+    変更前,変更後
+    10.32.0.0/16,10.128.0.0/16
+    10.32.5.0/24,10.200.5.0/24
+    10.32.0.1/32,10.128.0.1/32
+"""
+
+import csv
+import ipaddress
+from bisect import bisect_right
+
+
+class RemapRuleError(ValueError):
+    """ルール表が不正な場合に送出する例外"""
+
+
+def parse_ipv4(text):
+    """'a.b.c.d' 形式の文字列を整数に変換する。IPv4アドレスでなければ None を返す"""
+    parts = text.split(".")
+    if len(parts) != 4:
+        return None
+    value = 0
+    for part in parts:
+        # 先頭0付き ("010") や空白・符号を含む値はアドレスとみなさない
+        if not part.isdigit() or not part.isascii() or (len(part) > 1 and part[0] == "0"):
+            return None
+        octet = int(part)
+        if octet > 255:
+            return None
+        value = (value << 8) | octet
+    return value
+
+
+def format_ipv4(value):
+    """整数を 'a.b.c.d' 形式の文字列に変換する"""
+    return f"{value >> 24 & 255}.{value >> 16 & 255}.{value >> 8 & 255}.{value & 255}"
+
+
+class CidrRemapper:
+    """CIDR → CIDR のルール表で IPv4 アドレスを書き換える"""
+
+    def __init__(self, rules):
+        """
+        Args:
+            rules (iterable): (変更前CIDR, 変更後CIDR) の組。"10.32.0.1" のようなアドレスは /32 として扱う。
+        """
+        self.rules = []
+        seen = set()
+        for src_text, dst_text in rules:
+            try:
+                src = ipaddress.IPv4Network(str(src_text).strip())
+                dst = ipaddress.IPv4Network(str(dst_text).strip())
+            except ValueError as e:
+                raise RemapRuleError(f"ルール '{src_text} -> {dst_text}' が不正です: {e}") from e
+            if dst.prefixlen > src.prefixlen:
+                raise RemapRuleError(f"ルール '{src} -> {dst}': 変更後のサブネットが変更前より小さいため、ホスト部を保持できません。")
+            if src in seen:
+                raise RemapRuleError(f"変更前 '{src}' のルールが重複しています。")
+            seen.add(src)
+            self.rules.append((src, dst))
+        self._build_intervals()
+        self._cache = {}
+
+    def _build_intervals(self):
+        """
+        ルールを重ならない区間の表に変換する。
+        CIDR 同士は「包含」か「交わらない」のどちらかなので、外側から順にスタックで処理すると
+        各区間に最も具体的な (プレフィックスが最も長い) ルールを割り当てられる。
+        """
+        ordered = sorted(range(len(self.rules)),
+                         key=lambda i: (int(self.rules[i][0].network_address), self.rules[i][0].prefixlen))
+        starts = []
+        rule_ids = []
+
+        def emit(start, rule_id):
+            if starts and rule_ids[-1] == rule_id:
+                return
+            if starts and starts[-1] == start:
+                rule_ids[-1] = rule_id
+                return
+            starts.append(start)
+            rule_ids.append(rule_id)
+
+        stack = []  # (終了アドレス, ルール番号)
+        cursor = 0
+        for rule_id in ordered:
+            src = self.rules[rule_id][0]
+            start = int(src.network_address)
+            end = int(src.broadcast_address)
+            while stack and stack[-1][0] < start:
+                top_end, _ = stack.pop()
+                cursor = top_end + 1
+                emit(cursor, stack[-1][1] if stack else -1)
+            emit(start, rule_id)
+            stack.append((end, rule_id))
+        while stack:
+            top_end, _ = stack.pop()
+            if top_end < 0xFFFFFFFF:
+                emit(top_end + 1, stack[-1][1] if stack else -1)
+
+        self._starts = starts
+        self._rule_ids = rule_ids
+        self._offsets = [(int(src.network_address), int(dst.network_address)) for src, dst in self.rules]
+
+    @classmethod
+    def from_csv(cls, path, encoding="utf-8-sig"):
+        """CSVファイル (1列目: 変更前CIDR, 2列目: 変更後CIDR) からルールを読み込む。見出し行や空行は無視する"""
+        rules = []
+        with open(path, newline="", encoding=encoding) as f:
+            for line_no, row in enumerate(csv.reader(f), start=1):
+                if not row or not row[0].strip() or row[0].strip().startswith("#"):
+                    continue
+                if line_no == 1 and not row[0].strip()[0].isdigit():
+                    continue
+                if len(row) < 2:
+                    raise RemapRuleError(f"{path} の {line_no} 行目: 変更後のCIDRがありません。")
+                rules.append((row[0], row[1]))
+        return cls(rules)
+
+    def remap_int(self, address):
+        """整数のアドレスを書き換える。対象ルールがなければ None を返す"""
+        index = bisect_right(self._starts, address) - 1
+        if index < 0:
+            return None
+        rule_id = self._rule_ids[index]
+        if rule_id < 0:
+            return None
+        src_net, dst_net = self._offsets[rule_id]
+        return dst_net + (address - src_net)
+
+    def remap(self, text):
+        """
+        文字列のアドレスを書き換える。
+
+        Returns:
+            str: 書き換え後のアドレス。アドレスでない値や、書き換えても同じ値になる場合は None。
+        """
+        if text in self._cache:
+            return self._cache[text]
+        result = None
+        address = parse_ipv4(text)
+        if address is not None:
+            new_address = self.remap_int(address)
+            if new_address is not None and new_address != address:
+                result = format_ipv4(new_address)
+        self._cache[text] = result
+        return result
+
+    def remap_column(self, values):
+        """
+        列の値をまとめて書き換える。文字列以外や空文字はすぐにスキップする。
+
+        Returns:
+            list: (インデックス, 書き換え後のアドレス) のリスト (値が変わるものだけ)。
+        """
+        remap = self.remap
+        changes = []
+        for index, value in enumerate(values):
+            if not isinstance(value, str) or not value:
+                continue
+            new_value = remap(value.strip())
+            if new_value is not None:
+                changes.append((index, new_value))
+        return changes
@@ -2,11 +2,19 @@ import openpyxl
 import re
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from openpyxl.styles import Border, Side # 未使用のPatternFill, Font, Alignmentを削除
 # from openpyxl.utils import get_column_letter # 未使用のため削除
 import os
 import sys # sysモジュールを追加
-import time # timeモジュールをトップレベルでインポート
+import datetime
+import shutil
+import zipfile
+from cell_snapshot import SNAPSHOT_SUFFIX, SnapshotError, read_snapshot, rollback, snapshot_path_for, snapshot_target, write_snapshot # ロールバック用の差分スナップショット
+from change_log import ChangeLog # 変更内容を範囲単位で記録する変更ログ
+from border_blocks import apply_block_borders, find_border_blocks # 罫線ブロックの検出と範囲単位の罫線設定
+from ip_remap import CidrRemapper, RemapRuleError # CIDRルール表によるIPアドレス置換
+from file_lock import FileBusyError, wait_for_file_release # 固定スリープの代わりにファイル解放を待つ
+from xlsx_patch_writer import PatchError, XlsxPatchWriter # 変更シートだけを書き換える保存処理
+from xlsx_parts import defined_name_sheets, load_workbook_partial, peek_cell_values, read_sheet_parts # 対象シートだけを読み込む
 
 # pywin32のインポート試行
 try:
@@ -27,11 +35,30 @@ SECONDARY_NAME = "HOUSES.SCHEDULE_DATE"
 TARGET_SHEET_KEYWORD = "L線番表"
 MAX_ROWS_TO_PROCESS = 1000
 EXCLUDED_ROWS_F = range(8, 13) # F列の更新を除外する行 (1-based)
-
-# --- 罫線スタイル定義 (Sideオブジェクト) ---
-side_thin = Side(style='thin')
-side_hair = Side(style='hair') # 内部横線用 (VBAのxlHairline)
-side_none = Side(style=None) # 罫線なし
+FILE_RELEASE_TIMEOUT = 3.0 # ファイルが解放されるまで待つ秒数
+EXCEL_CLOSE_TIMEOUT = 15.0 # Excelでブックを閉じた後、解放を待つ最大秒数
+
+# --- B列IPアドレスの置換ルール (変更前CIDR, 変更後CIDR) ---
+# スクリプトと同じフォルダに ip_remap_rules.csv があれば、そちらのルール表を優先して使用する
+IP_REMAP_RULES = [
+    ("10.32.0.1/32", "10.128.0.1/32"),
+]
+IP_REMAP_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ip_remap_rules.csv")
+
+# --- 変更ログ (処理したブックと同じフォルダに「<ブック名>_変更ログ_<日時><拡張子>」で出力) ---
+CHANGE_LOG_EXTENSION = ".jsonl.gz" # ".jsonl" / ".csv" / ".csv.gz" も指定可能
+RULE_F_DATE = "f_date"
+RULE_D_GOKAKU = "d_gokaku"
+RULE_B_HUB = "b_hub"
+RULE_B_IP = "b_ip"
+RULE_D_HUB_GOKAKU = "d_hub_gokaku"
+RULE_LABELS = { # 結果表示での表示名 (この順序で表示)
+    RULE_F_DATE: "F列に日付を入力",
+    RULE_D_GOKAKU: "D列に'合格'を入力 (条件2)",
+    RULE_B_HUB: "B列のHUBパターンを置換",
+    RULE_B_IP: "B列のIPアドレスを置換",
+    RULE_D_HUB_GOKAKU: "D列に'合格'を追記 (HUB行)",
+}
 
 # --- 正規表現パターン ---
 # パターン: (2桁数字 + 空白* + HUB) または (HUB + (空白 or -)* + 2桁数字)
@@ -115,14 +142,12 @@ def close_excel_if_open(filepath_to_check):
                             try:
                                 wb_fullpath = os.path.abspath(wb.FullName)
                                 if wb_fullpath == abs_filepath_to_check:
-                                    print(f"情報: ファイル '{os.path.basename(filepath_to_check)}' を開いているExcelプロセスが見つかりました。閉じます...")
-                                    # wb.Close(SaveChanges=False) # ワークブックだけ閉じる (安全だが、アプリが残る)
-                                    excel_instance.Quit() # アプリケーションごと閉じる (リスクあり)
+                                    print(f"情報: ファイル '{os.path.basename(filepath_to_check)}' を開いているExcelが見つかりました。ブックを閉じます...")
+                                    # アプリケーションごと Quit() すると他のブックまで閉じてしまうため、対象ブックだけ閉じる
+                                    wb.Close(SaveChanges=False)
                                     found_and_closed = True
-                                    print(f"情報: Excelプロセスを閉じました。")
-                                    # 重要: プロセス終了後、少し待機時間を設ける
-                                    # time モジュールはトップレベルでインポート済み
-                                    time.sleep(2) # 2秒待機
+                                    print(f"情報: ブックを閉じました。")
+                                    # ファイルの解放待ちは呼び出し側 (wait_for_file_release) で行う
                                     break # 対象を見つけて閉じたので内部ループを抜ける
                             except Exception as e_wb:
                                 print(f"警告: ワークブック '{getattr(wb, 'Name', '不明')}' のパス取得または比較中にエラー: {e_wb}")
@@ -134,14 +159,11 @@ def close_excel_if_open(filepath_to_check):
                          # このオブジェクトが目的のファイルを開いているか確認
                          try:
                              if hasattr(excel_app, 'FullName') and os.path.abspath(excel_app.FullName) == abs_filepath_to_check:
-                                 print(f"情報: ファイル '{os.path.basename(filepath_to_check)}' を開いているExcelオブジェクトが見つかりました。関連プロセスを閉じます...")
-                                 # このオブジェクトに関連するApplicationを取得して閉じる
-                                 app_to_quit = excel_app.Application
-                                 app_to_quit.Quit()
+                                 print(f"情報: ファイル '{os.path.basename(filepath_to_check)}' を開いているExcelオブジェクトが見つかりました。ブックを閉じます...")
+                                 # このオブジェクト (Workbook) だけを閉じる
+                                 excel_app.Close(SaveChanges=False)
                                  found_and_closed = True
-                                 print(f"情報: Excelプロセスを閉じました。")
-                                 # time モジュールはトップレベルでインポート済み
-                                 time.sleep(2)
+                                 print(f"情報: ブックを閉じました。")
                                  break
                          except Exception as e_obj:
                              print(f"警告: Excelオブジェクトの確認中にエラー: {e_obj}")
@@ -162,67 +184,266 @@ def close_excel_if_open(filepath_to_check):
     finally:
         pythoncom.CoUninitialize() # COMライブラリを解放
 
-def set_borders_for_range(sheet, start_row, end_row):
-    """指定された範囲に罫線を設定する (再修正版: 初期化と4辺の確実な設定)"""
-    if start_row <= 0 or end_row < start_row:
-        return
+def set_borders_for_range(sheet, start_row, end_row, patch_writer=None):
+    """指定された範囲 (A〜I列) に罫線を設定する (外枠と縦線は細線、内部横線はヘアライン)"""
+    apply_block_borders(sheet, [(start_row, end_row)], patch_writer)
+
+
+def load_ip_remapper():
+    """IPアドレス置換のルール表を読み込む (ルールファイルが無ければ IP_REMAP_RULES を使用)"""
+    if os.path.exists(IP_REMAP_RULES_FILE):
+        remapper = CidrRemapper.from_csv(IP_REMAP_RULES_FILE)
+        print(f"情報: IPアドレス置換ルールを読み込みました ({len(remapper.rules)}件): {IP_REMAP_RULES_FILE}")
+        return remapper
+    return CidrRemapper(IP_REMAP_RULES)
+
+
+def acquire_target_file(filepath):
+    """
+    対象ファイルが他のプロセスで開かれていないか確認し、解放されるまで待つ。
+    期限内に解放されない場合は、Excelでブックを閉じてよいか確認する。
+
+    Returns:
+        bool: ファイルを取得できた場合 True。中止する場合 False。
+    """
+    try:
+        try:
+            result = wait_for_file_release(filepath, timeout=FILE_RELEASE_TIMEOUT)
+        except FileBusyError as e_busy:
+            answer = messagebox.askyesno(
+                "ファイル使用中",
+                f"ファイルが使用中です:\n{filepath}\n\n{e_busy.reason}\n\n"
+                "Excelで開いているブックを保存せずに閉じて続行しますか？"
+            )
+            if not answer:
+                return False
+            close_excel_if_open(filepath)
+            result = wait_for_file_release(filepath, timeout=EXCEL_CLOSE_TIMEOUT)
+    except FileNotFoundError:
+        messagebox.showerror("エラー", f"ファイルが見つかりません:\n{filepath}")
+        return False
+    except FileBusyError as e_busy:
+        messagebox.showerror("エラー", f"ファイルが解放されませんでした:\n{filepath}\n\nファイルを閉じてから再度実行してください。\n\n詳細: {e_busy}")
+        return False
+
+    if result.stale_owner_file:
+        print("情報: 使用されていないExcelのオーナーファイル (~$) が残っていますが、処理を続行します。")
+    print(f"情報: ファイルを取得しました ({result.seconds * 1000:.0f} ms, 確認 {result.attempts} 回)")
+    return True
+
+
+def find_target_sheets(filepath):
+    """
+    workbook.xml のシート名から対象シートを探す。
+    名前に TARGET_SHEET_KEYWORD を含むシートだけ B6 セルを確認し、シート全体は読み込まない。
+
+    Returns:
+        tuple: (対象シート名のリスト (ブック内の順序), 読み込みが必要なシート名の集合, 読み込まずに済んだシート数)
+    """
+    with zipfile.ZipFile(filepath) as zf:
+        sheet_parts = read_sheet_parts(zf)
+        target_titles = []
+        for title, part, _ in sheet_parts:
+            if TARGET_SHEET_KEYWORD in title:
+                b6_value = peek_cell_values(zf, part, ["B6"])["B6"]
+                if b6_value is not None and b6_value != "":
+                    target_titles.append(title)
+        # 名前付きセル (HOUSES.BUILD_START など) の参照先シートは値の取得に必要なので読み込む
+        required_titles = set(target_titles) | defined_name_sheets(zf, {PRIMARY_NAME, SECONDARY_NAME})
+    skipped_count = sum(1 for title, _, _ in sheet_parts if title not in required_titles)
+    return target_titles, required_titles, skipped_count
+
+
+def format_target_sheet(sheet, value_to_use, ip_remapper, patch_writer, change_log):
+    """
+    1つの L線番表 シートを処理し、結果メッセージを返す。
+
+    Args:
+        value_to_use: F列に入力する値 (HOUSES.BUILD_START など)。
+        ip_remapper (CidrRemapper): B列IPアドレスの置換ルール。
+        patch_writer (XlsxPatchWriter): 変更したセルを記録するライター。
+        change_log (ChangeLog): 変更内容 (ルール・範囲・変更前後の値) を記録するログ。
+    """
+
+    # --- IPアドレスの置換先をB列全体でまとめて求める (キーは0始まりのインデックス = 行番号 - 1) ---
+    b_values = [row[0] for row in sheet.iter_rows(min_row=1, max_row=MAX_ROWS_TO_PROCESS,
+                                                   min_col=2, max_col=2, values_only=True)]
+    ip_updates = dict(ip_remapper.remap_column(b_values))
+
+    # 1行目から指定行数までを処理
+    for i in range(1, MAX_ROWS_TO_PROCESS + 1):
+        # セルオブジェクト取得
+        b_cell = sheet.cell(row=i, column=2) # B列
+        d_cell = sheet.cell(row=i, column=4) # D列
+        f_cell = sheet.cell(row=i, column=6) # F列
+
+        # 値を取得 (文字列として扱い、前後の空白を削除)
+        # .valueがNoneの場合も考慮してstr()で変換
+        b_value_str = str(b_cell.value).strip() if b_cell.value is not None else ""
+        d_value_str = str(d_cell.value).strip() if d_cell.value is not None else ""
+        f_value = f_cell.value # F列は空かどうかを直接判定
+
+        f_cell_is_empty = f_value is None or f_value == ""
+        d_cell_is_empty = d_value_str == "" # Trimして空文字なら空とみなす
+
+        # --- 条件1: D列が "合格" で F列が空の場合 ---
+        if d_value_str.lower() == "合格" and f_cell_is_empty:
+            if i not in EXCLUDED_ROWS_F:
+                f_cell.value = value_to_use
+                patch_writer.mark_value(f_cell)
+                change_log.record(RULE_F_DATE, f_cell, f_value, value_to_use)
+
+        # --- 条件2: D列が空白で F列が空の場合 ---
+        elif d_cell_is_empty and f_cell_is_empty:
+            # B列が3文字以下の空でない文字列で、かつ "ONU" や "HUB" でない場合
+            if 0 < len(b_value_str) <= 3:
+                b_value_upper = b_value_str.upper()
+                if b_value_upper != "ONU" and b_value_upper != "HUB":
+                    if i not in EXCLUDED_ROWS_F:
+                        d_old_value = d_cell.value
+                        f_cell.value = value_to_use
+                        d_cell.value = "合格"
+                        patch_writer.mark_value(f_cell)
+                        patch_writer.mark_value(d_cell)
+                        change_log.record(RULE_F_DATE, f_cell, f_value, value_to_use)
+                        change_log.record(RULE_D_GOKAKU, d_cell, d_old_value, "合格")
+
+        # --- HUB パターンの置換 ---
+        match = hub_pattern.search(b_value_str)
+        if match:
+            num_part = ""
+            # マッチした部分から数字を取得 (group(1) or group(2))
+            if match.group(1):
+                num_part = match.group(1)
+            elif match.group(2):
+                num_part = match.group(2)
+
+            # numPart が2桁の数字の場合のみ処理
+            if len(num_part) == 2 and num_part.isdigit():
+                last_digit = num_part[-1]
+                new_value = f"HUB-{last_digit}"
+                if str(b_cell.value) != new_value: # 値が変わる場合のみ更新
+                    b_old_value = b_cell.value
+                    b_cell.value = new_value
+                    patch_writer.mark_value(b_cell)
+                    change_log.record(RULE_B_HUB, b_cell, b_old_value, new_value)
+
+        # --- IPアドレス置換 (ルール表に従ってサブネットを移行。例: "10.32.0.1" -> "10.128.0.1") ---
+        new_ip = ip_updates.get(i - 1)
+        if new_ip is not None:
+             if str(b_cell.value) != new_ip: # 値が変わる場合のみ更新
+                b_old_value = b_cell.value
+                b_cell.value = new_ip
+                patch_writer.mark_value(b_cell)
+                change_log.record(RULE_B_IP, b_cell, b_old_value, new_ip)
+
+        # --- B列に "HUB" が含まれ、かつD列に "合格" が含まれていない場合、D列に "合格" を追記 ---
+        # 注意: HUBパターン置換後の値で判定すべきか、元の値で判定すべきか？
+        # VBAでは置換前の bValue で判定しているので、それに合わせる
+        if "HUB" in b_value_str.upper(): # 大文字小文字区別せず
+            if "合格" not in d_value_str.lower(): # 大文字小文字区別せず
+                if str(d_cell.value).lower() != "合格": # 値が"合格"でない場合のみ更新
+                    d_old_value = d_cell.value
+                    d_cell.value = "合格"
+                    patch_writer.mark_value(d_cell)
+                    change_log.record(RULE_D_HUB_GOKAKU, d_cell, d_old_value, "合格")
+
+    # --- 罫線の設定 ---
+    # A列全体を一度に読み、罫線対象行の連続ブロックを求めてから範囲単位で罫線を設定する
+    a_values = [row[0] for row in sheet.iter_rows(min_row=1, max_row=MAX_ROWS_TO_PROCESS,
+                                                   min_col=1, max_col=1, values_only=True)]
+    border_blocks = find_border_blocks(a_values)
+    apply_block_borders(sheet, border_blocks, patch_writer)
+
+    # --- シートごとの結果メッセージ作成 ---
+    result_msg = f"シート '{sheet.title}' の処理結果:\n\n"
+    updated_count = change_log.count(sheet.title)
+    if updated_count:
+        # 範囲にまとめた要約だけを表示する (全セルの一覧は変更ログファイルに出力)
+        result_msg += "\n".join(change_log.summary_lines(sheet.title, RULE_LABELS)) + "\n"
+        result_msg += f"\n合計 {updated_count} 箇所のセルを更新しました。"
+    else:
+        result_msg += "更新対象となるデータが見つかりませんでした。"
+
+    return result_msg
+
 
-    target_range_str = f"A{start_row}:I{end_row}"
-    min_col, min_row, max_col, max_row = openpyxl.utils.cell.range_boundaries(target_range_str)
-
-    # 範囲内のすべてのセルをループし、各セルの4辺を決定して設定
-    for r_idx in range(min_row, max_row + 1):
-        for c_idx in range(min_col, max_col + 1):
-            cell = sheet.cell(row=r_idx, column=c_idx)
-
-            # 各辺のスタイルを決定
-            left_style = side_none
-            right_style = side_none
-            top_style = side_none
-            bottom_style = side_none
-
-            # 上辺
-            if r_idx == min_row:
-                top_style = side_thin  # 範囲の最上辺
-            else:
-                top_style = side_hair  # 内部横線 (上のセルの下辺に相当)
-
-            # 下辺
-            if r_idx == max_row:
-                bottom_style = side_thin # 範囲の最下辺
-            # else: # 内部の下辺は、下のセルの上辺(hair)で描画されるのでNoneのまま -> この考え方は間違い
-            # 各セルの下辺も設定する必要がある
-            elif r_idx < max_row: # 最下行でない場合
-                 bottom_style = side_hair # 内部横線
-
-            # 左辺
-            if c_idx == min_col:
-                left_style = side_thin  # 範囲の最左辺
-            else:
-                left_style = side_thin  # 内部縦線 (左のセルの右辺に相当)
-
-            # 右辺
-            if c_idx == max_col:
-                right_style = side_thin # 範囲の最右辺
-            # else: # 内部の右辺は、右のセルの左辺(thin)で描画されるのでNoneのまま -> この考え方は間違い
-            # 各セルの右辺も設定する必要がある
-            elif c_idx < max_col: # 最右列でない場合
-                right_style = side_thin # 内部縦線
-
-            # Borderオブジェクトを作成して適用
-            cell.border = Border(left=left_style, right=right_style, top=top_style, bottom=bottom_style)
+def write_change_log(filepath, change_log):
+    """
+    変更ログをブックと同じフォルダに書き出す。
+
+    Returns:
+        str: 書き出したファイルのパス。変更がない場合や書き出しに失敗した場合は None。
+    """
+    if not len(change_log):
+        return None
+    base = os.path.splitext(filepath)[0]
+    log_path = f"{base}_変更ログ_{datetime.datetime.now():%Y%m%d_%H%M%S}{CHANGE_LOG_EXTENSION}"
+    try:
+        count = change_log.write(log_path)
+    except OSError as e:
+        print(f"警告: 変更ログを書き出せませんでした: {log_path} ({e})")
+        return None
+    print(f"情報: 変更ログを書き出しました ({count} 件): {log_path}")
+    return log_path
+
+
+def save_rollback_snapshot(snapshot_path, filepath, originals, backup_path=None):
+    """
+    保存直後のブックに対するロールバック用スナップショットを書き出す。
+
+    Returns:
+        str: 書き出したスナップショットのパス。失敗した場合は None。
+    """
+    try:
+        size = write_snapshot(snapshot_path, filepath, originals, backup_path)
+    except OSError as e:
+        print(f"警告: ロールバック用スナップショットを書き出せませんでした: {snapshot_path} ({e})")
+        return None
+    if backup_path:
+        print(f"情報: ロールバック用に保存前のブックをコピーしました: {backup_path}")
+    else:
+        cell_count = sum(len(cells) for cells in originals.values())
+        print(f"情報: ロールバック用スナップショットを書き出しました ({cell_count} セル, {size:,} バイト): {snapshot_path}")
+    return snapshot_path
+
+
+def rollback_report_sheets(snapshot_path):
+    """スナップショットを指定してブックを処理前の状態に戻す"""
+    try:
+        if not acquire_target_file(snapshot_target(snapshot_path, read_snapshot(snapshot_path))):
+            return
+        filepath, cell_count = rollback(snapshot_path)
+    except (SnapshotError, PatchError) as e:
+        messagebox.showerror("ロールバックエラー", str(e))
+        return
+    except OSError as e:
+        messagebox.showerror("ロールバックエラー", f"ロールバック中にエラーが発生しました:\n{snapshot_path}\n\n詳細: {e}")
+        return
+    if cell_count is None:
+        messagebox.showinfo("ロールバック完了", f"保存前のブックのコピーから元に戻しました:\n{filepath}")
+    else:
+        messagebox.showinfo("ロールバック完了", f"{cell_count} セルを処理前の状態に戻しました:\n{filepath}")
 
 
 def process_report_sheets(filepath):
     """メインの処理関数"""
-    # --- ファイルを開く前に、Excelで開かれていれば閉じる ---
-    close_excel_if_open(filepath)
+    # --- ファイルを開く前に、Excelなどで開かれていれば解放されるまで待つ ---
+    if not acquire_target_file(filepath):
+        return
     # -------------------------------------------------
 
     try:
-        # 少し待機してからファイルを開く
-        time.sleep(0.5) # Excel終了待ちの後、ファイルハンドル解放のために少し待つ
-        workbook = openpyxl.load_workbook(filepath)
+        ip_remapper = load_ip_remapper()
+    except (OSError, RemapRuleError) as e:
+        messagebox.showerror("エラー", f"IPアドレス置換ルールを読み込めませんでした:\n{IP_REMAP_RULES_FILE}\n\n詳細: {e}")
+        return
+
+    try:
+        # 対象シートと名前付きセルの参照先シートだけを解析し、それ以外のシートは読み込まない
+        target_titles, required_titles, skipped_count = find_target_sheets(filepath)
+        workbook = load_workbook_partial(filepath, required_titles)
+        print(f"情報: {len(required_titles)} シートを読み込みました (対象外の {skipped_count} シートは読み込みをスキップ)")
     except FileNotFoundError:
         messagebox.showerror("エラー", f"ファイルが見つかりません:\n{filepath}")
         return
@@ -234,6 +455,9 @@ def process_report_sheets(filepath):
             messagebox.showerror("エラー", f"ファイルを開けませんでした:\n{filepath}\n\n詳細: {e}")
         return
 
+    # 変更したセルを記録し、保存時に対象シートのXMLだけを書き換える
+    patch_writer = XlsxPatchWriter(filepath)
+
     value_to_use = None
     found_value = False
 
@@ -319,165 +543,52 @@ def process_report_sheets(filepath):
          messagebox.showerror("エラー", "F列に入力するための値を取得できませんでした。")
          return
 
-    # 4. 名前に "L線番表" を含み、B6セルが空でないシートを検索して取得
-    target_sheets = []
-    for sheet in workbook.worksheets:
-        if TARGET_SHEET_KEYWORD in sheet.title:
-            b6_value = sheet["B6"].value
-            if b6_value is not None and b6_value != "":
-                target_sheets.append(sheet)
-
-    if not target_sheets:
+    # 4. 名前に "L線番表" を含み、B6セルが空でないシート (find_target_sheets で検索済み)
+    if not target_titles:
         messagebox.showerror("エラー", f"名前に '{TARGET_SHEET_KEYWORD}' を含み、かつB6セルに値があるシートが見つかりません。")
         return
     # VBA版では複数シートが見つかっても確認なしで処理していたので、Python版でもそのまま処理
 
     # 5. 対象シートの処理
     all_results = [] # 全シートの結果を格納
+    change_log = ChangeLog()
 
-    for sheet in target_sheets:
-        f_updated_address = []
-        d_gokaku_added_address = []
-        b_hub_replaced_address = []
-        b_ip_replaced_address = []
-        d_hub_gokaku_added_address = []
-        updated_count = 0
-        any_updates = False
-
-        border_start_row = 0
-        border_end_row = 0
-
-        # 1行目から指定行数までを処理
-        for i in range(1, MAX_ROWS_TO_PROCESS + 1):
-            # セルオブジェクト取得
-            a_cell = sheet.cell(row=i, column=1) # A列
-            b_cell = sheet.cell(row=i, column=2) # B列
-            d_cell = sheet.cell(row=i, column=4) # D列
-            f_cell = sheet.cell(row=i, column=6) # F列
-
-            # 値を取得 (文字列として扱い、前後の空白を削除)
-            # .valueがNoneの場合も考慮してstr()で変換
-            a_value = a_cell.value # 罫線判定用なので型はそのまま
-            b_value_str = str(b_cell.value).strip() if b_cell.value is not None else ""
-            d_value_str = str(d_cell.value).strip() if d_cell.value is not None else ""
-            f_value = f_cell.value # F列は空かどうかを直接判定
-
-            f_cell_is_empty = f_value is None or f_value == ""
-            d_cell_is_empty = d_value_str == "" # Trimして空文字なら空とみなす
-
-            # --- 条件1: D列が "合格" で F列が空の場合 ---
-            if d_value_str.lower() == "合格" and f_cell_is_empty:
-                if i not in EXCLUDED_ROWS_F:
-                    f_cell.value = value_to_use
-                    updated_count += 1
-                    f_updated_address.append(f_cell.coordinate)
-                    any_updates = True
-
-            # --- 条件2: D列が空白で F列が空の場合 ---
-            elif d_cell_is_empty and f_cell_is_empty:
-                # B列が3文字以下の空でない文字列で、かつ "ONU" や "HUB" でない場合
-                if 0 < len(b_value_str) <= 3:
-                    b_value_upper = b_value_str.upper()
-                    if b_value_upper != "ONU" and b_value_upper != "HUB":
-                        if i not in EXCLUDED_ROWS_F:
-                            f_cell.value = value_to_use
-                            d_cell.value = "合格"
-                            updated_count += 2 # FとDの2箇所更新
-                            f_updated_address.append(f_cell.coordinate)
-                            d_gokaku_added_address.append(d_cell.coordinate)
-                            any_updates = True
-
-            # --- HUB パターンの置換 ---
-            match = hub_pattern.search(b_value_str)
-            if match:
-                num_part = ""
-                # マッチした部分から数字を取得 (group(1) or group(2))
-                if match.group(1):
-                    num_part = match.group(1)
-                elif match.group(2):
-                    num_part = match.group(2)
-
-                # numPart が2桁の数字の場合のみ処理
-                if len(num_part) == 2 and num_part.isdigit():
-                    last_digit = num_part[-1]
-                    new_value = f"HUB-{last_digit}"
-                    if str(b_cell.value) != new_value: # 値が変わる場合のみ更新
-                        b_cell.value = new_value
-                        updated_count += 1
-                        b_hub_replaced_address.append(b_cell.coordinate)
-                        any_updates = True
-
-            # --- IPアドレス置換 ("10.32.0.1" -> "10.128.0.1") ---
-            if b_value_str == "10.32.0.1":
-                 if str(b_cell.value) != "10.128.0.1": # 値が変わる場合のみ更新
-                    b_cell.value = "10.128.0.1"
-                    updated_count += 1
-                    b_ip_replaced_address.append(b_cell.coordinate)
-                    any_updates = True
-
-            # --- B列に "HUB" が含まれ、かつD列に "合格" が含まれていない場合、D列に "合格" を追記 ---
-            # 注意: HUBパターン置換後の値で判定すべきか、元の値で判定すべきか？
-            # VBAでは置換前の bValue で判定しているので、それに合わせる
-            if "HUB" in b_value_str.upper(): # 大文字小文字区別せず
-                if "合格" not in d_value_str.lower(): # 大文字小文字区別せず
-                    if str(d_cell.value).lower() != "合格": # 値が"合格"でない場合のみ更新
-                        d_cell.value = "合格"
-                        updated_count += 1
-                        d_hub_gokaku_added_address.append(d_cell.coordinate)
-                        any_updates = True
-
-            # --- 罫線対象行か判定 ---
-            is_target_row = False
-            # A列が "G" で始まるかチェック
-            if isinstance(a_value, str) and a_value.strip().upper().startswith("G"):
-                is_target_row = True
-            # A列が 1 から 99 までの整数かチェック
-            elif isinstance(a_value, (int, float)) and 1 <= a_value <= 99 and int(a_value) == a_value:
-                 is_target_row = True
-
-            # --- 罫線対象ブロックの開始行と終了行を管理 ---
-            if is_target_row:
-                if border_start_row == 0:
-                    border_start_row = i # 新しいブロックの開始
-                border_end_row = i # ブロックの終了行を更新
-            else:
-                # 対象行でない場合 (またはブロックが終わった場合)
-                if border_start_row > 0:
-                    # 直前まで対象ブロックが続いていたので、罫線を設定
-                    set_borders_for_range(sheet, border_start_row, border_end_row)
-                    # ブロック情報をリセット
-                    border_start_row = 0
-                    border_end_row = 0
-
-        # --- ループ終了後、最後のブロックが残っている可能性があるので処理 ---
-        if border_start_row > 0:
-             set_borders_for_range(sheet, border_start_row, border_end_row)
-
-        # --- シートごとの結果メッセージ作成 ---
-        result_msg = f"シート '{sheet.title}' の処理結果:\n\n"
-        if any_updates:
-            if f_updated_address:
-                result_msg += f"F列に日付を入力 ({len(f_updated_address)}件): {', '.join(f_updated_address)}\n"
-            if d_gokaku_added_address:
-                result_msg += f"D列に'合格'を入力 (条件2, {len(d_gokaku_added_address)}件): {', '.join(d_gokaku_added_address)}\n"
-            if b_hub_replaced_address:
-                result_msg += f"B列のHUBパターンを置換 ({len(b_hub_replaced_address)}件): {', '.join(b_hub_replaced_address)}\n"
-            if b_ip_replaced_address:
-                result_msg += f"B列のIPアドレスを置換 ({len(b_ip_replaced_address)}件): {', '.join(b_ip_replaced_address)}\n"
-            if d_hub_gokaku_added_address:
-                result_msg += f"D列に'合格'を追記 (HUB行, {len(d_hub_gokaku_added_address)}件): {', '.join(d_hub_gokaku_added_address)}\n"
-            result_msg += f"\n合計 {updated_count} 箇所のセルを更新しました。"
-        else:
-            result_msg += "更新対象となるデータが見つかりませんでした。"
-
-        all_results.append(result_msg)
+    for title in target_titles:
+        all_results.append(format_target_sheet(workbook[title], value_to_use, ip_remapper, patch_writer, change_log))
 
-    # 6. 変更を保存
+    # 6. 変更を保存 (変更したシートと styles.xml だけを書き換え、他のパーツはそのままコピー)
     try:
-        workbook.save(filepath)
+        snapshot_path = None
+        if patch_writer.has_changes:
+            snapshot_path = snapshot_path_for(filepath)
+            try:
+                originals = {} # 書き換え前のセルXML (ロールバック用)
+                stats = patch_writer.save(workbook, snapshot=originals)
+                print(f"情報: 変更シートのみ書き換えて保存しました "
+                      f"(書き換え {stats['patched_parts']} パーツ / そのままコピー {stats['copied_members']} パーツ, {stats['seconds']:.2f}秒)")
+                backup_path = None
+            except PatchError as e_patch:
+                # 部分読み込みしたブックは対象外シートが空のため、全シートを読み込み直して処理をやり直す
+                print(f"情報: 部分保存できない変更が含まれるため、ブック全体を読み込み直して保存します: {e_patch}")
+                workbook = openpyxl.load_workbook(filepath)
+                full_writer = XlsxPatchWriter(filepath)
+                change_log = ChangeLog()
+                all_results = [format_target_sheet(workbook[title], value_to_use, ip_remapper, full_writer, change_log)
+                               for title in target_titles]
+                # ブック全体を書き直すとセル単位では戻せないため、保存前のブックをコピーしておく
+                originals = {}
+                backup_path = snapshot_path.removesuffix(SNAPSHOT_SUFFIX) + os.path.splitext(filepath)[1]
+                shutil.copy2(filepath, backup_path)
+                workbook.save(filepath)
+            snapshot_path = save_rollback_snapshot(snapshot_path, filepath, originals, backup_path)
+        log_path = write_change_log(filepath, change_log)
         # 全シートの結果をまとめて表示
         final_message = f"ファイル '{os.path.basename(filepath)}' の処理が完了しました。\n\n"
         final_message += "\n\n---\n\n".join(all_results)
+        if log_path:
+            final_message += f"\n\n変更の詳細は変更ログを参照してください:\n{log_path}"
+        if snapshot_path:
+            final_message += f"\n\n元に戻す場合は --rollback でスナップショットを指定して実行してください:\n{snapshot_path}"
         messagebox.showinfo("処理完了", final_message)
     except Exception as e:
         error_detail = str(e)
@@ -491,6 +602,16 @@ if __name__ == "__main__":
     root = tk.Tk()
     root.withdraw() # メインウィンドウは表示しない
 
+    # --rollback [スナップショット]: 処理前の状態に戻す
+    if len(sys.argv) > 1 and sys.argv[1] == "--rollback":
+        snapshot_file = sys.argv[2] if len(sys.argv) > 2 else filedialog.askopenfilename(
+            title="ロールバックするスナップショットを選択してください",
+            filetypes=[("スナップショット", f"*{SNAPSHOT_SUFFIX}")]
+        )
+        if snapshot_file:
+            rollback_report_sheets(snapshot_file)
+        sys.exit(0)
+
     # ファイル選択ダイアログを表示
     file_path = filedialog.askopenfilename(
         title="処理するExcelファイルを選択してください",
@@ -0,0 +1,244 @@
+"""
+線番表ブック横断の IPアドレス / HUB番号 重複チェック
+
+フォルダ内 (サブフォルダを含む) の全ブックから「L線番表」シートのB列を読み取り、
+(ファイル, シート, 行, B列の値, 正規化したキー) をインデックスに登録して、
+複数のファイルで同じ IPアドレス・HUB番号が使われている箇所を一覧にします。
+
+・ブックの読み取りはプロセスを分けて並列に行います (openpyxl は使わず、シートXMLのB列だけを読む)
+・インデックスはローカル保存領域 (local_store) に保存し、次回は更新されたファイルだけを読み直します
+  (更新日時とサイズが同じなら再利用、異なる場合も SHA-256 が同じなら再利用)
+
+実行方法:
+    python line_number_index.py [フォルダ] [--report 出力.csv] [--workers 並列数]
+    (フォルダを省略するとフォルダ選択ダイアログを表示)
+"""
+
+import csv
+import datetime
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from file_hash import file_sha256
+from ip_remap import format_ipv4, parse_ipv4
+from local_store import key_for_path, load_json, save_json, store_path
+from xlsx_parts import iter_column_values, read_sheet_parts
+
+INDEX_VERSION = 1
+TARGET_SHEET_KEYWORD = "L線番表"
+MAX_ROWS_TO_PROCESS = 1000 # line_number_formatter と同じ範囲を対象にする
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+# HUB表記 ("HUB-3", "HUB 3", "12HUB", "HUB12" など)。2桁の番号は line_number_formatter の置換と同じく下1桁を使う
+hub_key_pattern = re.compile(r"(\d{1,2})\s*HUB|HUB[\s-]*(\d{1,2})", re.IGNORECASE)
+
+
+def normalize_b_value(value):
+    """
+    B列の値を重複チェック用のキーに変換する。
+
+    Returns:
+        str: "IP:10.32.0.1" / "HUB:3" の形式のキー。IPアドレスでもHUBでもなければ None。
+    """
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    address = parse_ipv4(text)
+    if address is not None:
+        return f"IP:{format_ipv4(address)}"
+    match = hub_key_pattern.search(text)
+    if match:
+        number = match.group(1) or match.group(2)
+        return f"HUB:{int(number[-1] if len(number) == 2 else number)}"
+    return None
+
+
+def extract_entries(path):
+    """
+    1つのブックから L線番表 シート (B6セルに値があるもの) のB列を読み取る。
+
+    Returns:
+        list: [シート名, 行, B列の値, キー] のリスト。
+    """
+    entries = []
+    with zipfile.ZipFile(path) as zf:
+        for title, part, _ in read_sheet_parts(zf):
+            if TARGET_SHEET_KEYWORD not in title:
+                continue
+            values = list(iter_column_values(zf, part, "B", max_row=MAX_ROWS_TO_PROCESS))
+            if not any(row == 6 for row, _ in values):
+                continue # B6 が空のシートは line_number_formatter と同様に対象外
+            for row, value in values:
+                key = normalize_b_value(value)
+                if key is not None:
+                    entries.append([title, row, str(value).strip(), key])
+    return entries
+
+
+def _scan_file(path):
+    """ワーカープロセスで実行: (パス, SHA-256, エントリ, エラー) を返す"""
+    try:
+        return path, file_sha256(path), extract_entries(path), None
+    except (OSError, zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError,
+            ET.ParseError, KeyError, ValueError) as e:
+        return path, None, [], str(e)
+
+
+def find_workbooks(folder):
+    """フォルダ内の Excel ブックを相対パスの昇順で返す (Excelのオーナーファイル ~$ は除く)"""
+    paths = []
+    for dirpath, _, filenames in os.walk(folder):
+        for name in filenames:
+            if name.startswith("~$") or not name.lower().endswith(EXCEL_EXTENSIONS):
+                continue
+            paths.append(os.path.relpath(os.path.join(dirpath, name), folder))
+    return sorted(paths)
+
+
+def index_path_for(folder):
+    return store_path("line_number_index", f"{key_for_path(folder)}.json.gz")
+
+
+def update_index(folder, workers=None):
+    """
+    フォルダのインデックスを読み込み、変更されたファイルだけを読み直して保存する。
+
+    Returns:
+        tuple: (インデックス, 統計情報の辞書)
+    """
+    index_path = index_path_for(folder)
+    index = load_json(index_path)
+    if not index or index.get("version") != INDEX_VERSION:
+        index = {"version": INDEX_VERSION, "folder": os.path.abspath(folder), "files": {}}
+    old_files = index["files"]
+    files = {}
+    stats = {"files": 0, "reused": 0, "rehashed": 0, "scanned": 0, "errors": []}
+
+    candidates = []
+    for rel_path in find_workbooks(folder):
+        path = os.path.join(folder, rel_path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stats["files"] += 1
+        cached = old_files.get(rel_path)
+        if cached and cached["mtime"] == st.st_mtime and cached["size"] == st.st_size:
+            files[rel_path] = cached
+            stats["reused"] += 1
+        else:
+            candidates.append((rel_path, path, st, cached))
+
+    # 更新日時だけ変わったファイル (コピーや上書き保存で内容が同じ) はハッシュで判定する
+    to_scan = []
+    for rel_path, path, st, cached in candidates:
+        if cached and cached["size"] == st.st_size:
+            try:
+                digest = file_sha256(path)
+            except OSError:
+                digest = None
+            if digest == cached["sha256"]:
+                files[rel_path] = dict(cached, mtime=st.st_mtime)
+                stats["rehashed"] += 1
+                continue
+        to_scan.append((rel_path, path, st))
+
+    if to_scan:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_scan_file, [path for _, path, _ in to_scan], chunksize=4)
+            for (rel_path, _, st), (_, digest, entries, error) in zip(to_scan, results):
+                if error is not None:
+                    stats["errors"].append((rel_path, error))
+                    continue
+                files[rel_path] = {"mtime": st.st_mtime, "size": st.st_size, "sha256": digest, "entries": entries}
+                stats["scanned"] += 1
+
+    index["files"] = files
+    index["updated"] = datetime.datetime.now().isoformat(timespec="seconds")
+    save_json(index_path, index)
+    return index, stats
+
+
+def find_conflicts(index):
+    """
+    複数のファイルで使われているキーを求める。
+
+    Returns:
+        dict: {キー: [(ファイル, シート, 行, B列の値), ...]} (2ファイル以上に現れるキーのみ、キーの昇順)
+    """
+    by_key = {}
+    for rel_path, info in index["files"].items():
+        for sheet, row, value, key in info["entries"]:
+            by_key.setdefault(key, []).append((rel_path, sheet, row, value))
+    return {key: places for key, places in sorted(by_key.items())
+            if len({place[0] for place in places}) > 1}
+
+
+def write_conflict_report(conflicts, report_path):
+    """重複一覧をCSV (Excelで開けるよう UTF-8 BOM 付き) に書き出す"""
+    with open(report_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["種別", "キー", "ファイル", "シート", "行", "B列の値"])
+        for key, places in conflicts.items():
+            kind, normalized = key.split(":", 1)
+            for rel_path, sheet, row, value in places:
+                writer.writerow([kind, normalized, rel_path, sheet, row, value])
+
+
+def run_index(folder, report_path=None, workers=None):
+    """インデックスを更新して重複を調べ、結果をCSVに書き出す。重複の一覧を返す"""
+    start_time = time.perf_counter()
+    index, stats = update_index(folder, workers)
+    conflicts = find_conflicts(index)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"対象ブック: {stats['files']} 件 (再利用 {stats['reused']} / ハッシュ一致 {stats['rehashed']} / "
+          f"読み取り {stats['scanned']}) {elapsed:.2f}秒")
+    for rel_path, error in stats["errors"]:
+        print(f"警告: 読み取れませんでした: {rel_path} ({error})")
+
+    if conflicts:
+        if report_path is None:
+            report_path = store_path("reports", f"重複チェック_{datetime.datetime.now():%Y%m%d_%H%M%S}.csv")
+        write_conflict_report(conflicts, report_path)
+        ip_count = sum(1 for key in conflicts if key.startswith("IP:"))
+        print(f"重複: IPアドレス {ip_count} 件 / HUB番号 {len(conflicts) - ip_count} 件")
+        print(f"一覧を書き出しました: {report_path}")
+    else:
+        print("複数のファイルで重複している IPアドレス / HUB番号 はありません。")
+    return conflicts
+
+
+def _parse_args(argv):
+    folder = None
+    report_path = None
+    workers = None
+    args = iter(argv)
+    for arg in args:
+        if arg == "--report":
+            report_path = next(args, None)
+        elif arg == "--workers":
+            workers = int(next(args, "0")) or None
+        else:
+            folder = arg
+    return folder, report_path, workers
+
+
+if __name__ == "__main__":
+    target_folder, report_file, worker_count = _parse_args(sys.argv[1:])
+    if not target_folder:
+        import tkinter as tk
+        from tkinter import filedialog
+        root = tk.Tk()
+        root.withdraw()
+        target_folder = filedialog.askdirectory(title="線番表ブックのフォルダを選択してください")
+    if target_folder:
+        run_index(target_folder, report_file, worker_count)
+    else:
+        print("フォルダが選択されなかったため、処理をキャンセルしました。")
@@ -0,0 +1,73 @@
+"""
+スクリプト共通のローカル保存領域 (インデックスやキャッシュの保存先)
+
+Windows では %LOCALAPPDATA%\\excel_automation_scripts、それ以外では
+~/.local/share/excel_automation_scripts に保存します。
+環境変数 EXCEL_AUTOMATION_STORE で保存先を変更できます。
+
+書き込みは一時ファイルに書いてから置き換えるため、途中で失敗しても前回の内容が残ります。
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+APP_DIR_NAME = "excel_automation_scripts"
+STORE_ENV = "EXCEL_AUTOMATION_STORE"
+
+
+def store_dir():
+    """保存先フォルダのパス (無ければ作成する)"""
+    base = os.environ.get(STORE_ENV)
+    if not base:
+        if os.name == "nt":
+            base = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), APP_DIR_NAME)
+        else:
+            base = os.path.join(os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"), APP_DIR_NAME)
+    os.makedirs(base, exist_ok=True)
+    return base
+
+
+def store_path(*parts):
+    """保存先フォルダ内のパス (途中のフォルダは作成する)"""
+    path = os.path.join(store_dir(), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def key_for_path(path):
+    """フォルダやファイルのパスから、保存ファイル名に使える短いキーを作る"""
+    normalized = os.path.normcase(os.path.abspath(path))
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def load_json(path, default=None):
+    """JSON (拡張子が .gz なら gzip 圧縮) を読み込む。無い・壊れている場合は default を返す"""
+    opener = gzip.open if path.endswith(".gz") else open
+    try:
+        with opener(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        print(f"警告: 保存データを読み込めなかったため作り直します: {path} ({e})")
+        return default
+
+
+def save_json(path, data):
+    """JSON (拡張子が .gz なら gzip 圧縮) を一時ファイル経由で書き込む"""
+    fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            if path.endswith(".gz"):
+                with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                    gz.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            else:
+                raw.write(json.dumps(data, ensure_ascii=False, indent=1).encode("utf-8"))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
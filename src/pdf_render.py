@@ -0,0 +1,663 @@
+"""
+保存済みの星つきxlsxから、Excel を使わずに格納用の PDF を作成する
+
+save_starred_xlsx の PDF は ExportAsFixedFormat (Excel の COM) で出力するため、一括格納では
+Excel 1つで順番に出力するしかありません。このモジュールはブックを openpyxl で読み、印刷範囲の
+
+    ・セルの値 (表示形式のうち、桁区切り・小数点以下の桁数・パーセント・日付/時刻に対応)
+    ・結合セル、罫線 (線の太さと破線・点線)、塗りつぶし (単色)
+    ・フォント (サイズ・太字・色)、配置 (左右・上下)、折り返し
+
+を描画した PDF を、外部ライブラリを使わずに書き出します。
+
+・文字は PDF 標準の日本語フォント (HeiseiKakuGo-W5) で描画し、フォントは埋め込みません
+  (表示するPCのフォントで代替されるため、Excel の出力とは字形・文字幅が少し異なります)
+・用紙サイズ・向き・余白・拡大縮小 (倍率 / 1ページに収める)・改ページ・水平方向の中央揃えを反映します
+・印刷範囲が用紙の幅を超える場合は、横に分割せず幅に合わせて縮小します
+・ブックごとに別プロセスで出力できるため、Linux でも複数のブックを並列に処理できます
+
+実行方法:
+    python pdf_render.py ブック.xlsx [...] [--out 出力フォルダ] [--workers N]
+"""
+
+import datetime
+import decimal
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import openpyxl
+from openpyxl.utils import range_boundaries
+
+DEFAULT_WORKERS = os.cpu_count() or 4
+
+FONT_NAME = "HeiseiKakuGo-W5"
+POINTS_PER_INCH = 72.0
+CELL_PADDING = 2.0     # セルの左右の余白 (pt)
+LINE_SPACING = 1.2     # 行の高さ / フォントサイズ
+DEFAULT_FONT_SIZE = 11.0
+
+# 用紙サイズ (pageSetup の paperSize -> (幅, 高さ) pt)
+PAPER_SIZES = {
+    1: (612.0, 792.0),      # Letter
+    8: (841.89, 1190.55),   # A3
+    9: (595.28, 841.89),    # A4
+    11: (419.53, 595.28),   # A5
+    12: (728.5, 1031.81),   # B4 (JIS)
+    13: (515.91, 728.5),    # B5 (JIS)
+}
+DEFAULT_PAPER_SIZE = 9
+
+# 罫線の種類 -> (線の太さ pt, 破線のパターン)
+BORDER_STYLES = {
+    "hair": (0.25, None),
+    "thin": (0.5, None),
+    "medium": (1.0, None),
+    "thick": (1.5, None),
+    "double": (1.5, None),
+    "dashed": (0.5, (3, 2)),
+    "dotted": (0.5, (1, 1)),
+    "dashDot": (0.5, (3, 1, 1, 1)),
+    "dashDotDot": (0.5, (3, 1, 1, 1, 1, 1)),
+    "mediumDashed": (1.0, (4, 2)),
+    "mediumDashDot": (1.0, (4, 2, 1, 2)),
+    "mediumDashDotDot": (1.0, (4, 2, 1, 2, 1, 2)),
+    "slantDashDot": (1.0, (4, 1, 2, 1)),
+}
+
+WEEKDAYS = "月火水木金土日"
+
+
+class RenderReport:
+    """1ブック分の出力結果"""
+
+    def __init__(self, xlsx_path, pdf_path):
+        self.xlsx_path = xlsx_path
+        self.pdf_path = pdf_path
+        self.pages = 0
+        self.cells = 0     # 描画した (値・罫線・塗りつぶしのいずれかがある) セルの数
+        self.elapsed = 0.0
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def summary(self):
+        name = os.path.basename(self.xlsx_path)
+        if self.error:
+            return f"{name}: PDFを作成できませんでした ({self.error})"
+        return f"{name}: {self.pages} ページ / {self.cells} セル ({self.elapsed:.2f}秒)"
+
+
+# ---------------------------------------------------------------- PDF の書き出し
+
+class PdfWriter:
+    """ページの描画命令 (content stream) を受け取り、PDF ファイルを組み立てる"""
+
+    def __init__(self):
+        self.objects = [] # オブジェクト番号 - 1 -> 内容 (bytes)
+        self.page_ids = []
+        self.pages_id = self._reserve()
+        self.font_id = self._add_font()
+
+    def _reserve(self):
+        self.objects.append(None)
+        return len(self.objects)
+
+    def _add(self, data):
+        self.objects.append(data if isinstance(data, bytes) else data.encode("ascii"))
+        return len(self.objects)
+
+    def _add_font(self):
+        # 埋め込まない日本語フォント (Adobe-Japan1)。半角の英数字・カナ (CID 231-389) は幅 500、それ以外は 1000
+        descriptor = self._add(f"<</Type/FontDescriptor/FontName/{FONT_NAME}/Flags 4/FontBBox[-92 -250 1010 922]"
+                               "/ItalicAngle 0/Ascent 752/Descent -221/CapHeight 737/StemV 114>>")
+        cid_font = self._add(f"<</Type/Font/Subtype/CIDFontType0/BaseFont/{FONT_NAME}"
+                             "/CIDSystemInfo<</Registry(Adobe)/Ordering(Japan1)/Supplement 2>>"
+                             f"/FontDescriptor {descriptor} 0 R/DW 1000/W[231 389 500]>>")
+        return self._add(f"<</Type/Font/Subtype/Type0/BaseFont/{FONT_NAME}/Encoding/UniJIS-UCS2-HW-H"
+                         f"/DescendantFonts[{cid_font} 0 R]>>")
+
+    def add_page(self, width, height, content):
+        stream = zlib.compress(content)
+        content_id = self._add(f"<</Length {len(stream)}/Filter/FlateDecode>>stream\n".encode("ascii")
+                               + stream + b"\nendstream")
+        self.page_ids.append(self._add(
+            f"<</Type/Page/Parent {self.pages_id} 0 R/MediaBox[0 0 {width:.2f} {height:.2f}]"
+            f"/Resources<</Font<</F1 {self.font_id} 0 R>>>>/Contents {content_id} 0 R>>"))
+
+    def write(self, path):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self.objects[self.pages_id - 1] = f"<</Type/Pages/Kids[{kids}]/Count {len(self.page_ids)}>>".encode("ascii")
+        catalog_id = self._add(f"<</Type/Catalog/Pages {self.pages_id} 0 R>>")
+
+        chunks = [b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"]
+        offsets = []
+        position = len(chunks[0])
+        for number, data in enumerate(self.objects, start=1):
+            offsets.append(position)
+            chunk = f"{number} 0 obj\n".encode("ascii") + data + b"\nendobj\n"
+            chunks.append(chunk)
+            position += len(chunk)
+        xref = [f"xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n"]
+        xref.extend(f"{offset:010d} 00000 n \n" for offset in offsets)
+        xref.append(f"trailer\n<</Size {len(self.objects) + 1}/Root {catalog_id} 0 R>>\nstartxref\n{position}\n%%EOF\n")
+        chunks.append("".join(xref).encode("ascii"))
+        with open(path, "wb") as f:
+            f.write(b"".join(chunks))
+
+
+def _pdf_text(text):
+    """文字列を UniJIS-UCS2 の16進文字列にする (BMP 外の文字は 〓 にする)"""
+    text = "".join(ch if ord(ch) <= 0xFFFF else "〓" for ch in text)
+    return "<" + text.encode("utf-16-be").hex() + ">"
+
+
+def _char_width(ch):
+    """文字幅 (フォントサイズに対する割合)"""
+    code = ord(ch)
+    return 0.5 if code < 0x7F or 0xFF61 <= code <= 0xFF9F else 1.0
+
+
+def text_width(text, size):
+    return sum(_char_width(ch) for ch in text) * size
+
+
+def _wrap_lines(text, width, size):
+    """折り返しありのセルの文字列を、幅に収まる行に分ける (1文字ずつ詰める)"""
+    lines = []
+    for paragraph in text.split("\n"):
+        line, line_width = "", 0.0
+        for ch in paragraph:
+            w = _char_width(ch) * size
+            if line and line_width + w > width:
+                lines.append(line)
+                line, line_width = "", 0.0
+            line += ch
+            line_width += w
+        lines.append(line)
+    return lines
+
+
+def _rgb(color):
+    """openpyxl の Color (ARGB) を PDF の (r, g, b) にする。テーマ色などは None"""
+    if color is None or color.type != "rgb" or not isinstance(color.rgb, str) or len(color.rgb) < 6:
+        return None
+    value = color.rgb[-6:]
+    try:
+        return tuple(int(value[i:i + 2], 16) / 255 for i in (0, 2, 4))
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------- 表示形式
+
+_DATE_TOKEN = re.compile(r'"[^"]*"|\\.|\[[^\]]*\]|yyyy|yy|mmmm|mmm|mm|m|dd|d|hh|h|ss|s|aaaa|aaa|AM/PM|.',
+                         re.IGNORECASE)
+_DATE_CODES = re.compile(r'(?<![A-Za-z])(y+|m+|d+|h+|s+|a{3,4})', re.IGNORECASE)
+
+
+def _strip_literals(section):
+    return re.sub(r'"[^"]*"|\\.|\[[^\]]*\]|_.|\*.', "", section)
+
+
+def _format_date(value, number_format):
+    if not _DATE_CODES.search(_strip_literals(number_format)):
+        if isinstance(value, datetime.datetime) and value.time() != datetime.time(0):
+            number_format = "yyyy/m/d h:mm"
+        elif isinstance(value, datetime.time):
+            number_format = "h:mm:ss"
+        else:
+            number_format = "yyyy/m/d"
+    if isinstance(value, datetime.time):
+        value = datetime.datetime.combine(datetime.date(1899, 12, 31), value)
+    elif not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time(0))
+
+    tokens = _DATE_TOKEN.findall(number_format.split(";")[0])
+    twelve_hour = any(token.upper() == "AM/PM" for token in tokens)
+    parts = []
+    for index, token in enumerate(tokens):
+        lower = token.lower()
+        if token.startswith('"'):
+            parts.append(token[1:-1])
+        elif token.startswith("\\"):
+            parts.append(token[1:])
+        elif token.startswith("["):
+            continue
+        elif lower == "yyyy":
+            parts.append(f"{value.year:04d}")
+        elif lower == "yy":
+            parts.append(f"{value.year % 100:02d}")
+        elif lower in ("mm", "m"):
+            # 時の直後・秒の直前の m は分
+            previous = next((t.lower() for t in reversed(tokens[:index]) if t.isalpha()), "")
+            following = next((t.lower() for t in tokens[index + 1:] if t.isalpha()), "")
+            minute = previous.startswith("h") or following.startswith("s")
+            number = value.minute if minute else value.month
+            parts.append(f"{number:02d}" if lower == "mm" else str(number))
+        elif lower in ("mmm", "mmmm"):
+            parts.append(f"{value.month}月")
+        elif lower == "dd":
+            parts.append(f"{value.day:02d}")
+        elif lower == "d":
+            parts.append(str(value.day))
+        elif lower in ("hh", "h"):
+            hour = (value.hour % 12 or 12) if twelve_hour else value.hour
+            parts.append(f"{hour:02d}" if lower == "hh" else str(hour))
+        elif lower == "ss":
+            parts.append(f"{value.second:02d}")
+        elif lower == "s":
+            parts.append(str(value.second))
+        elif lower == "aaa":
+            parts.append(WEEKDAYS[value.weekday()])
+        elif lower == "aaaa":
+            parts.append(WEEKDAYS[value.weekday()] + "曜日")
+        elif token.upper() == "AM/PM":
+            parts.append("AM" if value.hour < 12 else "PM")
+        else:
+            parts.append(token)
+    return "".join(parts)
+
+
+def _format_number(value, number_format):
+    sections = number_format.split(";")
+    section = sections[0]
+    if value < 0 and len(sections) > 1 and sections[1]:
+        section, value = sections[1], -value
+    elif value == 0 and len(sections) > 2 and sections[2]:
+        section = sections[2]
+    if section.lower() in ("general", "@", ""):
+        if float(value).is_integer():
+            return str(int(value))
+        return f"{value:.10g}"
+
+    plain = _strip_literals(section)
+    digits = re.search(r"[0#?][0#?,.]*", plain)
+    if not digits:
+        return re.sub(r'"([^"]*)"|\\(.)|\[[^\]]*\]|_.|\*.', lambda m: m.group(1) or m.group(2) or "", section)
+    pattern = digits.group(0)
+    # Excel と同じく四捨五入する (f"{value:.0f}" は偶数への丸めで 2.5 -> "2" になる)。
+    # % の100倍も10進数で計算する (0.285 * 100 は float では 28.499...)
+    number = decimal.Decimal(str(value))
+    if "%" in plain:
+        number *= 100
+    decimals = len(pattern.split(".", 1)[1].rstrip(",")) if "." in pattern else 0
+    if not number.is_finite():
+        return str(value)
+    context = decimal.Context(prec=max(28, number.adjusted() + decimals + 2)) # 桁数の大きい値でも丸められるように
+    rounded = number.quantize(decimal.Decimal(1).scaleb(-decimals), rounding=decimal.ROUND_HALF_UP, context=context)
+    text = f"{rounded:,.{decimals}f}" if "," in pattern.split(".")[0] else f"{rounded:.{decimals}f}"
+
+    # 数値の前後の文字 (円・個・% など) はそのまま残す
+    literal = re.sub(r'"([^"]*)"|\\(.)|\[[^\]]*\]|_.|\*.', lambda m: m.group(1) or m.group(2) or "", section)
+    match = re.search(r"[0#?][0#?,.]*", literal)
+    if match is None:
+        return text
+    return literal[:match.start()] + text + literal[match.end():]
+
+
+def format_value(value, number_format="General"):
+    """セルの値を表示形式に従って文字列にする"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return _format_date(value, number_format or "General")
+    if isinstance(value, (int, float)):
+        return _format_number(value, number_format or "General")
+    return str(value)
+
+
+# ---------------------------------------------------------------- レイアウト
+
+def _column_widths(ws, min_col, max_col):
+    """列幅 (pt) のリスト。非表示の列は 0"""
+    default = ws.sheet_format.defaultColWidth or (ws.sheet_format.baseColWidth or 8) + 0.43
+    widths = {}
+    for dimension in ws.column_dimensions.values():
+        if dimension.min is None:
+            continue
+        for col in range(dimension.min, (dimension.max or dimension.min) + 1):
+            if dimension.hidden:
+                widths[col] = 0.0
+            elif dimension.customWidth or dimension.width:
+                widths[col] = dimension.width
+    # 文字数 -> ピクセル (最大の数字の幅 7px + 余白 5px) -> pt
+    return [int(widths.get(col, default) * 7 + 5) * 0.75 if widths.get(col, default) else 0.0
+            for col in range(min_col, max_col + 1)]
+
+
+def _row_heights(ws, min_row, max_row):
+    """行の高さ (pt) のリスト。非表示の行は 0"""
+    default = ws.sheet_format.defaultRowHeight or 15.0
+    heights = []
+    for row in range(min_row, max_row + 1):
+        dimension = ws.row_dimensions.get(row)
+        if dimension is not None and dimension.hidden:
+            heights.append(0.0)
+        else:
+            heights.append(dimension.ht if dimension is not None and dimension.ht else default)
+    return heights
+
+
+def print_areas(ws):
+    """印刷範囲 (min_col, min_row, max_col, max_row) のリスト。未設定ならデータのある範囲"""
+    areas = []
+    if ws.print_area:
+        for part in ws.print_area.split(","):
+            reference = part.rsplit("!", 1)[-1].replace("$", "")
+            areas.append(range_boundaries(reference))
+    if not areas:
+        areas.append(range_boundaries(ws.calculate_dimension()))
+    return areas
+
+
+def _page_geometry(ws):
+    """(用紙の幅, 高さ, 左余白, 上余白, 印刷できる幅, 高さ) を pt で返す"""
+    try:
+        paper = PAPER_SIZES.get(int(ws.page_setup.paperSize or DEFAULT_PAPER_SIZE), PAPER_SIZES[DEFAULT_PAPER_SIZE])
+    except ValueError:
+        paper = PAPER_SIZES[DEFAULT_PAPER_SIZE]
+    width, height = paper
+    if ws.page_setup.orientation == "landscape":
+        width, height = height, width
+    margins = ws.page_margins
+    left, right = margins.left * POINTS_PER_INCH, margins.right * POINTS_PER_INCH
+    top, bottom = margins.top * POINTS_PER_INCH, margins.bottom * POINTS_PER_INCH
+    return width, height, left, top, width - left - right, height - top - bottom
+
+
+def _scale_for(ws, total_width, total_height, printable_width, printable_height):
+    """拡大縮小率。1ページに収める設定 (fitToPage) を優先し、幅を超える場合は幅に合わせて縮小する"""
+    setup = ws.page_setup
+    fit = ws.sheet_properties.pageSetUpPr is not None and ws.sheet_properties.pageSetUpPr.fitToPage
+    scale = 1.0 if fit else (setup.scale or 100) / 100
+    if fit:
+        fit_height = 1 if setup.fitToHeight is None else int(setup.fitToHeight)
+        if fit_height == 1 and total_height > 0:
+            scale = min(scale, printable_height / total_height)
+    if total_width > 0:
+        scale = min(scale, printable_width / total_width)
+    return scale
+
+
+def _paginate(heights, first_row, breaks, limit):
+    """行の高さから各ページの (開始行の位置, 終了行の位置 + 1) を決める (改ページの指定を優先)"""
+    pages = []
+    start, used = 0, 0.0
+    for index, height in enumerate(heights):
+        if index > start and used + height > limit:
+            pages.append((start, index))
+            start, used = index, 0.0
+        used += height
+        if first_row + index in breaks and index + 1 < len(heights):
+            pages.append((start, index + 1))
+            start, used = index + 1, 0.0
+    pages.append((start, len(heights)))
+    return pages
+
+
+def _merged_ranges(ws):
+    """結合セルの左上 (行, 列) -> (最終行, 最終列) と、左上以外のセルの集合"""
+    anchors, covered = {}, set()
+    for merged in ws.merged_cells.ranges:
+        anchors[(merged.min_row, merged.min_col)] = (merged.max_row, merged.max_col)
+        for row in range(merged.min_row, merged.max_row + 1):
+            for col in range(merged.min_col, merged.max_col + 1):
+                if (row, col) != (merged.min_row, merged.min_col):
+                    covered.add((row, col))
+    return anchors, covered
+
+
+def _border_commands(x0, y0, x1, y1, border):
+    """セルの罫線の描画命令 (座標は下向きを負にした pt)"""
+    commands = []
+    for side, (ax, ay, bx, by) in (("left", (x0, y0, x0, y1)), ("right", (x1, y0, x1, y1)),
+                                   ("top", (x0, y0, x1, y0)), ("bottom", (x0, y1, x1, y1))):
+        edge = getattr(border, side)
+        if edge is None or edge.style not in BORDER_STYLES:
+            continue
+        width, dash = BORDER_STYLES[edge.style]
+        color = _rgb(edge.color) or (0, 0, 0)
+        dash_text = f"[{' '.join(str(d) for d in dash)}] 0 d" if dash else "[] 0 d"
+        commands.append(f"{width} w {dash_text} {color[0]:.3f} {color[1]:.3f} {color[2]:.3f} RG "
+                        f"{ax:.2f} {-ay:.2f} m {bx:.2f} {-by:.2f} l S")
+    return commands
+
+
+def _text_commands(x0, y0, x1, y1, text, cell, is_number):
+    """セルの文字の描画命令 (セルの範囲で切り取る)"""
+    font = cell.font
+    size = float(font.sz or DEFAULT_FONT_SIZE)
+    alignment = cell.alignment
+    horizontal = alignment.horizontal
+    if horizontal in (None, "general"):
+        horizontal = "center" if isinstance(cell.value, bool) else "right" if is_number else "left"
+    vertical = alignment.vertical or "bottom"
+    inner_width = x1 - x0 - CELL_PADDING * 2
+    if alignment.wrap_text:
+        lines = _wrap_lines(text, inner_width, size)
+    else:
+        lines = [text.replace("\n", " ")]
+    line_height = size * LINE_SPACING
+    block_height = line_height * len(lines)
+    if vertical == "top":
+        top = y0 + 1
+    elif vertical in ("center", "centerContinuous", "distributed", "justify"):
+        top = (y0 + y1 - block_height) / 2
+    else:
+        top = y1 - 1 - block_height
+    color = _rgb(font.color) or (0, 0, 0)
+
+    commands = [f"q {x0:.2f} {-y1:.2f} {x1 - x0:.2f} {y1 - y0:.2f} re W n",
+                f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg"]
+    if font.b:
+        # 太字は輪郭も描いて太く見せる (埋め込まないフォントのため)
+        commands.append(f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} RG 2 Tr {size * 0.03:.2f} w [] 0 d")
+    commands.append(f"BT /F1 {size:.1f} Tf")
+    for index, line in enumerate(lines):
+        width = text_width(line, size)
+        if horizontal in ("right",):
+            x = x1 - CELL_PADDING - width
+        elif horizontal in ("center", "centerContinuous", "distributed"):
+            x = (x0 + x1 - width) / 2
+        else:
+            x = x0 + CELL_PADDING + (alignment.indent or 0) * size
+        baseline = top + line_height * index + size * 0.95
+        commands.append(f"1 0 0 1 {x:.2f} {-baseline:.2f} Tm {_pdf_text(line)} Tj")
+    commands.append("ET Q")
+    return commands
+
+
+def _render_area(ws, area, writer, geometry, anchors, covered):
+    """印刷範囲1つをページに分けて描画する。描画したセルの数を返す"""
+    min_col, min_row, max_col, max_row = area
+    page_width, page_height, left, top, printable_width, printable_height = geometry
+    widths = _column_widths(ws, min_col, max_col)
+    heights = _row_heights(ws, min_row, max_row)
+    scale = _scale_for(ws, sum(widths), sum(heights), printable_width, printable_height)
+    if ws.print_options.horizontalCentered:
+        left += (printable_width - sum(widths) * scale) / 2
+    breaks = {brk.id for brk in ws.row_breaks.brk}
+
+    col_x = [0.0]
+    for width in widths:
+        col_x.append(col_x[-1] + width)
+    cells = 0
+    for start, end in _paginate(heights, min_row, breaks, printable_height / scale):
+        row_y = {start: 0.0}
+        for index in range(start, end):
+            row_y[index + 1] = row_y[index] + heights[index]
+        fills, borders, texts = [], [], []
+        for index in range(start, end):
+            row = min_row + index
+            if not heights[index]:
+                continue
+            for col_index in range(max_col - min_col + 1):
+                col = min_col + col_index
+                cell = ws._cells.get((row, col))
+                if cell is None or not widths[col_index]:
+                    continue
+                x0, x1 = col_x[col_index], col_x[col_index + 1]
+                y0, y1 = row_y[index], row_y[index + 1]
+                drawn = False
+                if cell.has_style and cell.border is not None:
+                    border_commands = _border_commands(x0, y0, x1, y1, cell.border)
+                    borders.extend(border_commands)
+                    drawn = bool(border_commands)
+                if (row, col) in covered:
+                    cells += drawn
+                    continue
+                if (row, col) in anchors:
+                    last_row, last_col = anchors[(row, col)]
+                    x1 = col_x[min(last_col, max_col) - min_col + 1]
+                    y1 = row_y[min(last_row - min_row, end - 1) + 1]
+                text = format_value(cell.value, cell.number_format)
+                text_x1 = x1
+                if text and (row, col) not in anchors and not cell.alignment.wrap_text \
+                        and cell.alignment.horizontal in (None, "left", "general") and isinstance(cell.value, str):
+                    # 左詰めの文字列は、右の空いているセルにはみ出して表示する (Excel と同じ)
+                    size = float(cell.font.sz or DEFAULT_FONT_SIZE)
+                    next_index = col_index + 1
+                    while text_width(text, size) + CELL_PADDING * 2 > text_x1 - x0 and next_index < len(widths):
+                        neighbour = ws._cells.get((row, min_col + next_index))
+                        if (row, min_col + next_index) in covered or (row, min_col + next_index) in anchors \
+                                or (neighbour is not None and neighbour.value not in (None, "")):
+                            break
+                        text_x1 = col_x[next_index + 1]
+                        next_index += 1
+                if cell.has_style and cell.fill is not None and cell.fill.fill_type == "solid":
+                    color = _rgb(cell.fill.fgColor)
+                    if color and color != (1.0, 1.0, 1.0):
+                        fills.append(f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg "
+                                     f"{x0:.2f} {-y1:.2f} {x1 - x0:.2f} {y1 - y0:.2f} re f")
+                        drawn = True
+                if text:
+                    is_number = isinstance(cell.value, (int, float, datetime.date, datetime.time)) \
+                        and not isinstance(cell.value, bool)
+                    if is_number and not cell.alignment.wrap_text:
+                        # 列幅に収まらない数値・日付は Excel と同じく # で埋める
+                        size = float(cell.font.sz or DEFAULT_FONT_SIZE)
+                        if text_width(text, size) + CELL_PADDING * 2 > x1 - x0:
+                            text = "#" * max(1, int((x1 - x0 - CELL_PADDING * 2) / (size * 0.5)))
+                    texts.extend(_text_commands(x0, y0, text_x1, y1, text, cell, is_number))
+                    drawn = True
+                cells += drawn
+        content = "\n".join([f"q {scale:.5f} 0 0 {scale:.5f} {left:.2f} {page_height - top:.2f} cm",
+                             *fills, *borders, *texts, "Q"])
+        writer.add_page(page_width, page_height, content.encode("ascii"))
+    return cells
+
+
+def render_xlsx_to_pdf(xlsx_path, pdf_path, sheet_name=None):
+    """
+    ブックのシート (省略時はアクティブシート) の印刷範囲を PDF に出力する。
+
+    Returns:
+        RenderReport
+    """
+    report = RenderReport(xlsx_path, pdf_path)
+    start_time = time.perf_counter()
+    wb = openpyxl.load_workbook(xlsx_path, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.active
+        writer = PdfWriter()
+        geometry = _page_geometry(ws)
+        anchors, covered = _merged_ranges(ws)
+        for area in print_areas(ws):
+            report.cells += _render_area(ws, area, writer, geometry, anchors, covered)
+        writer.write(pdf_path)
+        report.pages = len(writer.page_ids)
+    finally:
+        wb.close()
+    report.elapsed = time.perf_counter() - start_time
+    return report
+
+
+def _render_job(job):
+    """プロセスプールから呼ばれる (例外は RenderReport.error にして返す)"""
+    xlsx_path, pdf_path = job
+    try:
+        return render_xlsx_to_pdf(xlsx_path, pdf_path)
+    except Exception as e:
+        report = RenderReport(xlsx_path, pdf_path)
+        report.error = f"{type(e).__name__}: {e}"
+        return report
+
+
+def render_many(jobs, workers=None):
+    """
+    複数のブックを別々のプロセスで並列に PDF にする。
+
+    Args:
+        jobs (list): (xlsx のパス, PDF のパス) のリスト
+    Returns:
+        list: RenderReport のリスト (jobs と同じ順)
+    """
+    with ProcessPoolExecutor(max_workers=workers or DEFAULT_WORKERS) as executor:
+        return list(executor.map(_render_job, jobs))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pooled_pdf_exporter(xlsx_path, pdf_path):
+    """
+    batch_filing の PDF 出力 (--pdf python) 用。スレッドから呼ばれ、出力は共有のプロセスプールで行う。
+
+    Returns:
+        RenderReport
+    Raises:
+        RuntimeError: PDF を作成できなかった場合。
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=DEFAULT_WORKERS)
+    report = _pool.submit(_render_job, (xlsx_path, pdf_path)).result()
+    if not report.ok:
+        raise RuntimeError(report.error)
+    return report
+
+
+def _parse_args(argv):
+    paths, out_dir, workers = [], None, None
+    args = iter(argv)
+    for arg in args:
+        if arg == "--out":
+            out_dir = next(args, None)
+        elif arg == "--workers":
+            workers = int(next(args, "0")) or None
+        else:
+            paths.append(arg)
+    return paths, out_dir, workers
+
+
+if __name__ == "__main__":
+    xlsx_paths, output_dir, worker_count = _parse_args(sys.argv[1:])
+    if not xlsx_paths:
+        print("使い方: python pdf_render.py ブック.xlsx [...] [--out 出力フォルダ] [--workers N]")
+        sys.exit(1)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    render_jobs = [(path, os.path.join(output_dir or os.path.dirname(os.path.abspath(path)),
+                                       os.path.splitext(os.path.basename(path))[0] + ".pdf"))
+                   for path in xlsx_paths]
+    batch_start = time.perf_counter()
+    results = render_many(render_jobs, worker_count)
+    batch_elapsed = time.perf_counter() - batch_start
+    for result in results:
+        print(result.summary())
+    rendered = [result for result in results if result.ok]
+    total = sum(result.elapsed for result in rendered)
+    print(f"{len(rendered)} / {len(results)} 件を出力しました ({batch_elapsed:.2f}秒、1件あたり平均 "
+          f"{total / len(rendered) if rendered else 0:.2f}秒)")
+    sys.exit(0 if len(rendered) == len(results) else 1)
@@ -0,0 +1,204 @@
+"""
+写真ZIPの検証と詰め直し
+
+ダウンロードした写真ZIP ({BuildingNo}_*.zip) を格納する前に、
+
+    verify_zip(path)           ... 全メンバーを順に読み、CRC を確認する (同時に内容の SHA-256 を計算)
+    repack_zip(path, dest)     ... 同じ内容の写真を1つにまとめ、指定した圧縮レベルで詰め直す
+
+を行います。どちらもメンバーを CHUNK_SIZE ごとに読み書きするため、ZIP や写真の大きさによらず
+メモリ使用量は一定です。詰め直しで除いた写真は、残した写真の名前と合わせて DUPLICATES_NAME に記録します。
+
+実行方法:
+    python photo_zip.py 写真.zip [--repack 出力.zip] [--level 0-9]
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_COMPRESS_LEVEL = 6
+DUPLICATES_NAME = "重複していた写真.txt"
+
+
+class ZipReport:
+    """検証・詰め直しの結果"""
+
+    def __init__(self, path):
+        self.path = path
+        self.members = 0
+        self.uncompressed_bytes = 0
+        self.errors = []           # (メンバー名, エラー)
+        self.digests = {}          # メンバー名 -> SHA-256 (ディレクトリは含まない)
+        self.duplicates = {}       # 除いたメンバー名 -> 残したメンバー名
+        self.elapsed = 0.0
+        self.original_size = None
+        self.repacked_size = None
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def throughput(self):
+        """検証で読んだ (展開後の) バイト数 / 秒"""
+        return self.uncompressed_bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def saved_bytes(self):
+        return self.original_size - self.repacked_size if self.repacked_size is not None else 0
+
+    def summary(self):
+        text = (f"{os.path.basename(self.path)}: {self.members} ファイル / {self.uncompressed_bytes / 1e6:.1f}MB "
+                f"を検証 ({self.elapsed:.2f}秒, {self.throughput / 1e6:.1f}MB/秒)")
+        if self.errors:
+            text += f" 破損 {len(self.errors)} 件"
+        if self.duplicates:
+            text += f" 重複 {len(self.duplicates)} 件"
+        if self.repacked_size is not None:
+            text += f" 詰め直し {self.original_size / 1e6:.1f}MB -> {self.repacked_size / 1e6:.1f}MB"
+        return text
+
+
+def verify_zip(path):
+    """
+    ZIP の全メンバーを読み、CRC を確認する。
+
+    Returns:
+        ZipReport: errors が空なら正常。同じ内容のメンバーは duplicates に記録される。
+    Raises:
+        OSError: ZIP を開けない場合 (ダウンロード中・他のプロセスが使用中など。破損としては記録しない)。
+    """
+    report = ZipReport(path)
+    start_time = time.perf_counter()
+    first_by_digest = {}
+    report.original_size = os.path.getsize(path)
+    try:
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                report.members += 1
+                digest = hashlib.sha256()
+                try:
+                    # 最後まで読むと zipfile が CRC を確認する (不一致なら BadZipFile)
+                    with zf.open(info) as member:
+                        for chunk in iter(lambda: member.read(CHUNK_SIZE), b""):
+                            digest.update(chunk)
+                            report.uncompressed_bytes += len(chunk)
+                except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError) as e:
+                    report.errors.append((info.filename, str(e)))
+                    continue
+                hexdigest = digest.hexdigest()
+                report.digests[info.filename] = hexdigest
+                if hexdigest in first_by_digest:
+                    report.duplicates[info.filename] = first_by_digest[hexdigest]
+                else:
+                    first_by_digest[hexdigest] = info.filename
+    except (zipfile.BadZipFile, EOFError) as e:
+        report.errors.append(("", str(e)))
+    report.elapsed = time.perf_counter() - start_time
+    return report
+
+
+def repack_zip(path, dest=None, compresslevel=DEFAULT_COMPRESS_LEVEL, dedupe=True, report=None):
+    """
+    ZIP を詰め直す (同じ内容のメンバーは最初の1つだけを残す)。
+
+    Args:
+        dest (str, optional): 出力先。省略時は path を置き換える。
+        compresslevel (int): 0 なら無圧縮 (ZIP_STORED)、1-9 なら ZIP_DEFLATED の圧縮レベル。
+        report (ZipReport, optional): verify_zip の結果 (省略時は検証から行う)。
+    Returns:
+        ZipReport
+    Raises:
+        zipfile.BadZipFile: 破損したメンバーがある場合 (詰め直さない)。
+    """
+    report = report or verify_zip(path)
+    if not report.ok:
+        raise zipfile.BadZipFile(f"破損したファイルがあるため詰め直しません: {report.errors[0][0]} ({report.errors[0][1]})")
+    dest = dest or path
+    compression = zipfile.ZIP_STORED if compresslevel == 0 else zipfile.ZIP_DEFLATED
+    skipped = report.duplicates if dedupe else {}
+
+    fd, temp_path = tempfile.mkstemp(suffix=".zip", dir=os.path.dirname(os.path.abspath(dest)))
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(path) as zin, \
+                zipfile.ZipFile(temp_path, "w", compression, compresslevel=compresslevel or None) as zout:
+            previous = ""
+            for info in zin.infolist():
+                if info.filename in skipped:
+                    continue
+                out_info = zipfile.ZipInfo(info.filename, info.date_time)
+                out_info.external_attr = info.external_attr
+                if info.is_dir():
+                    zout.writestr(out_info, b"")
+                    continue
+                if skipped and info.filename == DUPLICATES_NAME:
+                    # 前回の詰め直しの記録は、今回の記録の先頭に引き継ぐ
+                    previous = zin.read(info).decode("utf-8").split("\n", 1)[1]
+                    continue
+                out_info.compress_type = compression
+                out_info.file_size = info.file_size
+                with zin.open(info) as src, zout.open(out_info, "w", force_zip64=info.file_size > 2 ** 31) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            if skipped:
+                lines = [f"{removed}\t{kept}" for removed, kept in skipped.items()]
+                zout.writestr(DUPLICATES_NAME, "除いた写真\t同じ内容の写真\n" + previous + "\n".join(lines) + "\n")
+        if os.path.exists(dest):
+            shutil.copymode(dest, temp_path) # mkstemp の権限 (0600) のままにしない
+        os.replace(temp_path, dest)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    report.repacked_size = os.path.getsize(dest)
+    return report
+
+
+def check_photo_zip(path, repack_level=None):
+    """
+    格納前の写真ZIPを検証し、repack_level を指定した場合は重複を除いて詰め直す (path を置き換える)。
+
+    Returns:
+        ZipReport
+    """
+    report = verify_zip(path)
+    if report.ok and repack_level is not None:
+        report = repack_zip(path, compresslevel=repack_level, report=report)
+    return report
+
+
+def _parse_args(argv):
+    path, dest, level = None, None, None
+    args = iter(argv)
+    for arg in args:
+        if arg == "--repack":
+            dest = next(args, None)
+        elif arg == "--level":
+            level = int(next(args, str(DEFAULT_COMPRESS_LEVEL)))
+        else:
+            path = arg
+    return path, dest, level
+
+
+if __name__ == "__main__":
+    zip_path, repack_dest, level = _parse_args(sys.argv[1:])
+    if not zip_path:
+        print("使い方: python photo_zip.py 写真.zip [--repack 出力.zip] [--level 0-9]")
+        sys.exit(1)
+    result = verify_zip(zip_path)
+    for name, error in result.errors:
+        print(f"破損: {name} ({error})")
+    if result.ok and (repack_dest or level is not None):
+        result = repack_zip(zip_path, repack_dest,
+                            DEFAULT_COMPRESS_LEVEL if level is None else level, report=result)
+    print(result.summary())
+    sys.exit(0 if result.ok else 1)
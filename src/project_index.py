@@ -0,0 +1,350 @@
+"""
+格納済みの案件 (星つきxlsx) のメタデータの検索用インデックス (SQLite / FTS5)
+
+案件を探すには、これまで 新規案件 / 既存案件 / 中部地方 / 関西案件 などの格納先を
+フォルダ名の前方一致でたどるしかありませんでした。このモジュールは格納先 (default_folder_map) の
+案件フォルダ直下にある xlsx から save_starred_xlsx と同じ名前定義
+(HOUSES.BUILDING_NO / BUILDING_NAME / ADDRESS / SERVICE_ID / BUILDING_STATE / TENTATIVE_NAME) を読み、
+ローカル保存領域の SQLite データベースに保存します。
+
+・更新 (update) はファイルの (更新日時, サイズ) が前回と同じブックを読み直しません。削除されたブックは除きます
+  (一覧できなかった格納先・案件フォルダのブックは、共有フォルダに接続できない間も削除扱いにしません)
+・フォルダの一覧はスレッドで、ブックの読み込みはプロセスで並列に行います (xlsx は名前定義と参照先のセルだけを読む)
+・建物名・住所・パスは FTS5 (trigram) で部分一致検索できます (2文字以下の検索語は LIKE で検索)
+・格納先の決定 (find_project_folders) は従来どおりフォルダ名の前方一致 (folder_index) で検索し、
+  見つからない場合は格納先フォルダと BuildingNo でデータベースを引きます
+  (フォルダ名が BuildingNo で始まらない案件フォルダも見つかる。前方一致の結果や「複数該当」の判定は変わらない)
+
+実行方法:
+    python project_index.py --update [--workers N]   ... インデックスを更新する
+    python project_index.py 検索語                   ... BuildingNo・建物名・住所・パスで検索する
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from filing_ops import FILING_DEFINED_NAMES, filing_metadata
+from filing_routes import default_folder_map
+from folder_index import folder_index_for
+from local_store import store_path
+from xlsx_parts import read_defined_name_values
+
+SCHEMA_VERSION = 1
+DEFAULT_WORKERS = os.cpu_count() or 4
+SCAN_THREADS = 16       # フォルダの一覧を並列に取得するスレッド数 (ネットワーク共有の待ち時間を重ねる)
+OLD_FOLDER_SUFFIX = "_old"
+SEARCH_LIMIT = 50
+
+METADATA_COLUMNS = ("building_no", "building_name", "address", "service_id", "building_state", "tentative_name")
+
+_SCHEMA = """
+CREATE TABLE files (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,       -- 案件フォルダ
+    root TEXT NOT NULL,         -- 格納先フォルダ (os.path.normcase 済み)
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    building_no TEXT,
+    building_name TEXT,
+    address TEXT,
+    service_id TEXT,
+    building_state TEXT,
+    tentative_name TEXT,
+    error TEXT                  -- 読み込めなかった場合のエラー
+);
+CREATE INDEX files_root_no ON files(root, building_no);
+CREATE INDEX files_no ON files(building_no);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE files_fts USING fts5(
+    building_no, building_name, address, path, content='files', content_rowid='rowid', tokenize='trigram');
+CREATE TRIGGER files_ai AFTER INSERT ON files BEGIN
+    INSERT INTO files_fts(rowid, building_no, building_name, address, path)
+    VALUES (new.rowid, new.building_no, new.building_name, new.address, new.path);
+END;
+CREATE TRIGGER files_ad AFTER DELETE ON files BEGIN
+    INSERT INTO files_fts(files_fts, rowid, building_no, building_name, address, path)
+    VALUES ('delete', old.rowid, old.building_no, old.building_name, old.address, old.path);
+END;
+CREATE TRIGGER files_au AFTER UPDATE ON files BEGIN
+    INSERT INTO files_fts(files_fts, rowid, building_no, building_name, address, path)
+    VALUES ('delete', old.rowid, old.building_no, old.building_name, old.address, old.path);
+    INSERT INTO files_fts(rowid, building_no, building_name, address, path)
+    VALUES (new.rowid, new.building_no, new.building_name, new.address, new.path);
+END;
+"""
+
+
+class UpdateStats:
+    """インデックスの更新結果"""
+
+    def __init__(self):
+        self.files = 0      # 見つかったブック
+        self.parsed = 0     # 読み込んだ (新規・変更された) ブック
+        self.removed = 0    # 削除されたブック
+        self.errors = 0     # 名前定義を読み込めなかったブック
+        self.unavailable = [] # 一覧できなかった格納先・案件フォルダ (中のブックは削除扱いにしない)
+        self.elapsed = 0.0
+
+    def summary(self):
+        text = (f"ブック {self.files} 件 (読み込み {self.parsed} 件 / 削除 {self.removed} 件 / "
+                f"読み込めなかったもの {self.errors} 件) {self.elapsed:.2f}秒")
+        if self.unavailable:
+            text += f" 一覧できなかったフォルダ {len(self.unavailable)} 件 (前回の内容のまま)"
+        return text
+
+
+def _root_key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def read_project_metadata(path):
+    """
+    ブックの名前定義から案件のメタデータを読む (プロセスプールから呼ばれる)。
+
+    Returns:
+        tuple: (パス, メタデータの辞書 または None, エラー または None)
+    """
+    try:
+        with zipfile.ZipFile(path) as zf:
+            values = read_defined_name_values(zf, FILING_DEFINED_NAMES)
+        metadata = filing_metadata(values)
+        return path, {column: None if metadata[column] is None else str(metadata[column])
+                      for column in METADATA_COLUMNS}, None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def _list_project_files(folder):
+    """
+    案件フォルダ直下の xlsx を (パス, 更新日時, サイズ) のリストで返す (old フォルダ・一時ファイルは除く)。
+
+    Returns:
+        tuple: (リスト, フォルダを一覧できなかった場合のエラー または None)
+    """
+    files = []
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                name = entry.name
+                if not name.lower().endswith(".xlsx") or name.startswith("~$"):
+                    continue
+                try:
+                    if entry.is_file():
+                        st = entry.stat()
+                        files.append((entry.path, st.st_mtime_ns, st.st_size))
+                except OSError:
+                    continue
+    except OSError as e:
+        return files, e
+    return files, None
+
+
+def _list_project_folders(root, skip):
+    """
+    格納先フォルダ直下の案件フォルダ (別の格納先と old フォルダは除く)。
+
+    Returns:
+        tuple: (リスト, フォルダを一覧できなかった場合のエラー または None)
+    """
+    folders = []
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir() and not entry.name.endswith(OLD_FOLDER_SUFFIX) \
+                            and _root_key(entry.path) not in skip:
+                        folders.append(entry.path)
+                except OSError:
+                    continue
+    except OSError as e:
+        return folders, e
+    return folders, None
+
+
+class ProjectIndex:
+    """格納済みブックのメタデータを保持する SQLite データベース"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or store_path("project_index.sqlite3")
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.has_fts = False
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        tables = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        if version == SCHEMA_VERSION and "files" in tables:
+            self.has_fts = "files_fts" in tables
+            return
+        with self.conn:
+            for name in ("files_fts", "files"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {name}")
+            self.conn.executescript(_SCHEMA)
+            try:
+                self.conn.executescript(_FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                # trigram に対応していない SQLite (3.34 より前) では LIKE だけで検索する
+                self.has_fts = False
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def update(self, folder_map=None, workers=None):
+        """
+        格納先のブックを走査し、新規・変更されたブックを読み込み、削除されたブックを除く。
+
+        Returns:
+            UpdateStats
+        """
+        stats = UpdateStats()
+        start_time = time.perf_counter()
+        if folder_map is None:
+            folder_map = default_folder_map(os.environ.get("USERPROFILE") or os.path.expanduser("~"))
+        roots = {_root_key(path): path for path in folder_map.values()}
+
+        # 案件フォルダとブックの一覧 (ネットワーク共有の待ち時間を重ねるためスレッドで並列に取得する)
+        with ThreadPoolExecutor(max_workers=SCAN_THREADS) as executor:
+            folder_lists = list(executor.map(lambda key: _list_project_folders(roots[key], roots.keys() - {key}),
+                                             roots))
+            project_folders = [(key, folder) for key, (folders, _) in zip(roots, folder_lists) for folder in folders]
+            file_lists = list(executor.map(lambda item: _list_project_files(item[1]), project_folders))
+
+        # 一覧できなかった格納先・案件フォルダ (共有フォルダに接続できないなど) のブックは削除扱いにしない
+        unavailable_roots = set()
+        unavailable_folders = set()
+        for key, (_, error) in zip(roots, folder_lists):
+            if error is not None:
+                unavailable_roots.add(key)
+                stats.unavailable.append((roots[key], str(error)))
+        found = {}
+        for (root, folder), (files, error) in zip(project_folders, file_lists):
+            if error is not None:
+                unavailable_folders.add(folder)
+                stats.unavailable.append((folder, str(error)))
+            for path, mtime_ns, size in files:
+                found[path] = (folder, root, mtime_ns, size)
+        stats.files = len(found)
+
+        with self.lock:
+            indexed = {path: (folder, root, mtime_ns, size) for path, folder, root, mtime_ns, size
+                       in self.conn.execute("SELECT path, folder, root, mtime_ns, size FROM files")}
+        changed = [path for path, (_, _, mtime_ns, size) in found.items()
+                   if indexed.get(path, (None, None, None, None))[2:] != (mtime_ns, size)]
+        removed = [path for path, (folder, root, _, _) in indexed.items()
+                   if path not in found and root not in unavailable_roots and folder not in unavailable_folders]
+
+        rows = []
+        if changed:
+            if len(changed) == 1 or workers == 1:
+                results = [read_project_metadata(path) for path in changed]
+            else:
+                with ProcessPoolExecutor(max_workers=workers or DEFAULT_WORKERS) as executor:
+                    results = list(executor.map(read_project_metadata, changed, chunksize=8))
+            for path, metadata, error in results:
+                folder, root, mtime_ns, size = found[path]
+                metadata = metadata or dict.fromkeys(METADATA_COLUMNS)
+                rows.append((path, folder, root, mtime_ns, size, *(metadata[c] for c in METADATA_COLUMNS), error))
+                stats.errors += error is not None
+
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO files (path, folder, root, mtime_ns, size, {', '.join(METADATA_COLUMNS)}, error) "
+                f"VALUES ({', '.join('?' * (len(METADATA_COLUMNS) + 6))})", rows)
+        stats.parsed = len(rows)
+        stats.removed = len(removed)
+        stats.elapsed = time.perf_counter() - start_time
+        return stats
+
+    def folders_for(self, root, building_no):
+        """格納先フォルダ root の中で、BuildingNo が一致するブックがある案件フォルダ (名前順)"""
+        with self.lock:
+            rows = self.conn.execute("SELECT DISTINCT folder FROM files WHERE root = ? AND building_no = ? "
+                                     "ORDER BY folder", (_root_key(root), building_no)).fetchall()
+        return [row[0] for row in rows]
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """
+        BuildingNo (完全一致) または 建物名・住所・パス (部分一致) で検索する。
+
+        Returns:
+            list: 辞書 (path, folder と METADATA_COLUMNS) のリスト
+        """
+        columns = ["path", "folder", *METADATA_COLUMNS]
+        select = ", ".join(columns)
+        with self.lock:
+            if self.has_fts and len(query) >= 3:
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = self.conn.execute(
+                    f"SELECT {select} FROM files WHERE rowid IN (SELECT rowid FROM files_fts WHERE files_fts MATCH ?) "
+                    "OR building_no = ? ORDER BY path LIMIT ?",
+                    (phrase, query, limit)).fetchall()
+            else:
+                pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                rows = self.conn.execute(
+                    f"SELECT {select} FROM files WHERE building_no = ? OR building_name LIKE ? ESCAPE '\\' "
+                    "OR address LIKE ? ESCAPE '\\' OR path LIKE ? ESCAPE '\\' ORDER BY path LIMIT ?",
+                    (query, pattern, pattern, pattern, limit)).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def project_index():
+    """プロセスで1つの ProjectIndex を返す"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ProjectIndex()
+        return _index
+
+
+def find_project_folders(base_path, building_no):
+    """
+    格納先フォルダ base_path の中から BuildingNo の案件フォルダを探す (execute_plan の find_folders)。
+
+    従来どおりフォルダ名の前方一致 (folder_index) を優先する (複数あれば呼び出し元で「該当フォルダが複数」になる)。
+    前方一致するフォルダが無い場合だけ、インデックスで BuildingNo が一致したフォルダ (現在も存在するもの) を返す。
+    """
+    folders = folder_index_for(base_path).find(building_no)
+    if folders:
+        return folders
+    try:
+        return [folder for folder in project_index().folders_for(base_path, building_no) if os.path.isdir(folder)]
+    except sqlite3.Error as e:
+        print(f"警告: 案件インデックスを検索できませんでした ({e})")
+        return []
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--update" in args:
+        worker_count = None
+        if "--workers" in args:
+            worker_count = int(args[args.index("--workers") + 1])
+        update_stats = project_index().update(workers=worker_count)
+        for unavailable_folder, error in update_stats.unavailable:
+            print(f"一覧できませんでした: {unavailable_folder} ({error})")
+        print(update_stats.summary())
+    elif args:
+        search_start = time.perf_counter()
+        matches = project_index().search(" ".join(args))
+        for match in matches:
+            print(f"{match['building_no']}\t{match['building_name']}\t{match['address']}\t{match['service_id']}"
+                  f"\t{match['building_state']}\t{match['path']}")
+        print(f"{len(matches)} 件 ({(time.perf_counter() - search_start) * 1000:.1f}ミリ秒)")
+    else:
+        print("使い方: python project_index.py --update [--workers N] / python project_index.py 検索語")
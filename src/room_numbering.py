@@ -0,0 +1,140 @@
+"""
+部屋番号の生成 (RoomGenerator と部屋番号の図形作成で共通。GUI を使わない)
+
+    room_numbers(部屋数, 階)                 ... 1フロア分の部屋番号 ("101", "102", ...)
+    alphabet_rooms(部屋数, 階)               ... 1フロア分のアルファベットの部屋 ("1A", "1B", ..., "1Z", "1AA", ...)
+    floor_lines(部屋数, 階数)                ... 1フロア1行の文字列 (部屋番号は半角スペース区切り)
+    building_blocks(棟の一覧)                ... 1棟分の文字列 (複数行)
+    format_rooms / format_buildings         ... クリップボードに出力する文字列 (最後に1回だけ join する)
+
+部屋番号は「階 × 100 + 階内の番号」で、階内の番号が 4 / 9 で終わるものは指定に応じて飛ばします。
+n 番目の番号は、1の位として使える数字の一覧から割り算で直接求めるため、飛ばす番号を1つずつ数えません。
+どの関数も生成器を返すので、必要な分だけ順に取り出せます。
+"""
+
+import itertools
+import string
+
+DIGITS = tuple(range(10))
+
+
+def allowed_last_digits(include_4=False, include_9=False):
+    """部屋番号の1の位として使える数字"""
+    return tuple(d for d in DIGITS if (d != 4 or include_4) and (d != 9 or include_9))
+
+
+def nth_room_counter(n, start=1, digits=None):
+    """
+    start 以上で、1の位が digits に含まれる n 番目 (0 始まり) の階内の番号を返す。
+
+    例: digits が 4・9 以外で start=1 の場合、0→1, 2→3, 3→5, 7→10 (4 と 9 を飛ばす)
+    """
+    digits = digits if digits is not None else allowed_last_digits()
+    if not digits:
+        raise ValueError("部屋番号の1の位に使える数字がありません。")
+    decade, first_digit = divmod(start, 10)
+    first = [d for d in digits if d >= first_digit] # start の属する10の位で使える数字
+    if n < len(first):
+        return decade * 10 + first[n]
+    n -= len(first)
+    quotient, remainder = divmod(n, len(digits))
+    return (decade + 1 + quotient) * 10 + digits[remainder]
+
+
+def room_counters(count, start=1, include_4=False, include_9=False):
+    """
+    階内の番号を count 個返す (4 / 9 で終わるものは指定に応じて飛ばす)。
+
+    nth_room_counter と同じ番号を、10の位ごとに使える数字を並べて順に作る (1つずつ判定しない)。
+    """
+    digits = allowed_last_digits(include_4, include_9)
+    if not digits:
+        raise ValueError("部屋番号の1の位に使える数字がありません。")
+    decade, first_digit = divmod(start, 10)
+    first = (decade * 10 + d for d in digits if d >= first_digit)
+    rest = (tens + d for tens in itertools.count((decade + 1) * 10, 10) for d in digits)
+    return itertools.islice(itertools.chain(first, rest), count)
+
+
+def room_numbers(rooms, floor, start=1, include_4=False, include_9=False, prefix=""):
+    """1フロア分の部屋番号 (prefix + 階 × 100 + 階内の番号) を返す"""
+    base = floor * 100
+    return (f"{prefix}{base + counter}" for counter in room_counters(rooms, start, include_4, include_9))
+
+
+def alphabet_label(index, lowercase=False):
+    """0 始まりの番号を A, B, ..., Z, AA, AB, ... (Excel の列名と同じ数え方) にする"""
+    if index < 0:
+        raise ValueError("番号は0以上を指定してください。")
+    letters = string.ascii_lowercase if lowercase else string.ascii_uppercase
+    label = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = letters[remainder] + label
+    return label
+
+
+def alphabet_index(label):
+    """alphabet_label の逆 ("A" → 0, "AA" → 26)。大文字・小文字は区別しない"""
+    index = 0
+    for ch in label.upper():
+        if ch not in string.ascii_uppercase:
+            raise ValueError(f"アルファベットではありません: {label}")
+        index = index * 26 + (ord(ch) - ord("A") + 1)
+    return index - 1
+
+
+def alphabet_labels(count, start="A"):
+    """start から順に count 個のアルファベットを返す (start が英字以外の場合は文字コードを1つずつ進める)"""
+    if start and start.isascii() and start.isalpha():
+        first = alphabet_index(start)
+        lowercase = start.islower()
+        return (alphabet_label(first + i, lowercase) for i in range(count))
+    return (chr(ord(start) + i) for i in range(count))
+
+
+def alphabet_rooms(rooms, floor=None, start="A"):
+    """1フロア分のアルファベットの部屋 (floor を指定した場合は先頭に階を付ける)"""
+    prefix = "" if floor is None else str(floor)
+    return (prefix + label for label in alphabet_labels(rooms, start))
+
+
+def floor_lines(rooms, floors, start=1, include_4=False, include_9=False, prefix=""):
+    """1階から順に、1フロア分の部屋番号を半角スペースで区切った行を返す"""
+    return (" ".join(room_numbers(rooms, floor, start, include_4, include_9, prefix))
+            for floor in range(1, floors + 1))
+
+
+def alphabet_floor_lines(rooms, floors, add_floor=True, start="A"):
+    """1階から順に、1フロア分のアルファベットの部屋を半角スペースで区切った行を返す"""
+    return (" ".join(alphabet_rooms(rooms, floor if add_floor else None, start))
+            for floor in range(1, floors + 1))
+
+
+def building_blocks(buildings, include_4=False, include_9=False):
+    """
+    棟ごとに、全フロアの行を改行でつないだ文字列を返す。
+
+    Args:
+        buildings (iterable): (棟名, 部屋数, 階数) または (棟名, 部屋数, 階数, 開始番号)
+    """
+    for building in buildings:
+        name, rooms, floors = building[:3]
+        start = building[3] if len(building) > 3 else 1
+        yield "\n".join(floor_lines(rooms, floors, start, include_4, include_9, prefix=name or ""))
+
+
+def format_rooms(rooms, floors, include_4=False, include_9=False, start=1):
+    """通常モードの出力 (1フロア1行)"""
+    return "\n".join(floor_lines(rooms, floors, start, include_4, include_9))
+
+
+def format_alphabet(rooms, floors, add_floor=True, start="A"):
+    """アルファベットモードの出力 (1フロア1行)"""
+    return "\n".join(alphabet_floor_lines(rooms, floors, add_floor, start))
+
+
+def format_buildings(buildings, include_4=False, include_9=False):
+    """連棟モードの出力 (棟の間は空行)"""
+    return "\n\n".join(building_blocks(buildings, include_4, include_9))
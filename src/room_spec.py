@@ -0,0 +1,263 @@
+"""
+棟の一覧 (仕様ファイル) から部屋番号を一括で出力する
+
+連棟部屋作成 (RoomGenerator) は6棟分の入力欄しかないため、棟数の多い団地などは
+CSV / JSON の仕様ファイルに棟を並べ、このモードで出力します。
+
+仕様ファイルの列 (CSV は1行目に見出し。日本語・英語どちらの見出しでもよい):
+    棟名 (name)  部屋数 (rooms)  階数 (floors)  4の部屋 (include_4)  9の部屋 (include_9)  開始番号 (start)
+    ・4の部屋 / 9の部屋 は 1, true, yes, ○ などで「入れる」。空欄はコマンドの既定値
+      (既定は連棟部屋作成と同じく 4 を飛ばし 9 は入れる)
+    ・開始番号は階内の番号 (空欄は 1)
+CSV の文字コードは UTF-8 (BOM 付きも可) と Shift_JIS (cp932。Excel の「CSV (カンマ区切り)」) を自動で判別します
+(--encoding で指定も可)。JSON は棟のオブジェクトの配列、または1行に1棟の JSON Lines (.jsonl) で、UTF-8 です。
+
+・仕様ファイルは1棟ずつ読み、部屋番号は1フロアずつ書き出すため、棟数によらずメモリ使用量は一定です
+  (.json の配列だけはファイル全体を読み込みます。大きな仕様は CSV か .jsonl を使ってください)
+・出力の形式は連棟部屋作成と同じです (1フロア1行、棟の間は空行)
+・部屋数・階数が不正な行は飛ばし、行番号を表示します
+
+実行方法:
+    python room_spec.py 仕様.csv [--out 出力.txt] [--include-4] [--skip-9] [--encoding cp932]
+    (--out を省略すると標準出力に書き出し、件数と処理速度は標準エラー出力に表示します)
+"""
+
+import codecs
+import csv
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+from room_numbering import floor_lines
+
+BuildingSpec = namedtuple("BuildingSpec", ["name", "rooms", "floors", "include_4", "include_9", "start"])
+
+# 見出し -> 項目名
+COLUMN_ALIASES = {
+    "棟名": "name", "name": "name",
+    "部屋数": "rooms", "rooms": "rooms",
+    "階数": "floors", "floors": "floors",
+    "4の部屋": "include_4", "include_4": "include_4",
+    "9の部屋": "include_9", "include_9": "include_9",
+    "開始番号": "start", "start": "start",
+}
+TRUE_VALUES = {"1", "true", "yes", "y", "on", "○", "〇", "入れる", "あり"}
+FALSE_VALUES = {"0", "false", "no", "n", "off", "×", "入れない", "なし"}
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+READ_CHUNK_SIZE = 1024 * 1024
+CSV_FALLBACK_ENCODING = "cp932" # 日本語版 Excel の「CSV (カンマ区切り)」
+
+
+class SpecError(ValueError):
+    """仕様ファイルの行が不正"""
+
+
+class StreamStats:
+    """一括出力の件数と処理速度"""
+
+    def __init__(self):
+        self.buildings = 0
+        self.rooms = 0
+        self.bytes = 0
+        self.skipped = [] # (行番号, エラー)
+        self.elapsed = 0.0
+
+    def summary(self):
+        rate = self.rooms / self.elapsed if self.elapsed > 0 else 0.0
+        text = (f"{self.buildings} 棟 / {self.rooms} 部屋 / {self.bytes / 1e6:.1f}MB を出力 "
+                f"({self.elapsed:.2f}秒, {rate:,.0f} 部屋/秒)")
+        if self.skipped:
+            text += f" 飛ばした行 {len(self.skipped)} 件"
+        return text
+
+
+def _parse_flag(value, default):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise SpecError(f"4の部屋 / 9の部屋 の値が不正です: {value}")
+
+
+def _parse_positive(value, label, minimum=1):
+    try:
+        number = int(str(value).strip())
+    except (TypeError, ValueError):
+        raise SpecError(f"{label}が数字ではありません: {value!r}") from None
+    if number < minimum:
+        raise SpecError(f"{label}は{minimum}以上を指定してください: {number}")
+    return number
+
+
+def parse_building(record, include_4=False, include_9=True):
+    """
+    仕様ファイルの1行 (見出し -> 値) を BuildingSpec にする。
+
+    Raises:
+        SpecError: 部屋数・階数などが不正な場合、または行が見出し -> 値 の形式でない場合。
+    """
+    if not isinstance(record, dict):
+        raise SpecError(f"棟の情報 (見出しと値の組) ではありません: {record!r}")
+    fields = {}
+    for key, value in record.items():
+        field = COLUMN_ALIASES.get(str(key).strip()) if key is not None else None
+        if field:
+            fields[field] = value
+    start = fields.get("start")
+    return BuildingSpec(
+        name=str(fields.get("name") or "").strip(),
+        rooms=_parse_positive(fields.get("rooms"), "部屋数"),
+        floors=_parse_positive(fields.get("floors"), "階数"),
+        include_4=_parse_flag(fields.get("include_4"), include_4),
+        include_9=_parse_flag(fields.get("include_9"), include_9),
+        start=1 if start is None or not str(start).strip() else _parse_positive(start, "開始番号", minimum=0),
+    )
+
+
+def detect_csv_encoding(path):
+    """
+    CSV の文字コードを返す。UTF-8 として最後まで読めれば utf-8-sig、読めなければ cp932。
+
+    出力を書き始めてから途中で読めなくならないよう、先にファイル全体を確認する (少しずつ読むためメモリ使用量は一定)。
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        try:
+            for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+                decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return CSV_FALLBACK_ENCODING
+    return "utf-8-sig"
+
+
+def iter_spec_records(path, encoding=None):
+    """
+    仕様ファイルの行を (行番号, 見出し -> 値) で1行ずつ返す。
+
+    JSON Lines で読めない行は、見出し -> 値 の代わりに SpecError を返す (iter_buildings で飛ばす)。
+
+    Args:
+        encoding (str, optional): CSV の文字コード。省略時は detect_csv_encoding で判別する。
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".jsonl":
+        with open(path, encoding="utf-8-sig") as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    record = SpecError(f"JSON として読めません: {e}")
+                yield line_no, record
+    elif extension == ".json":
+        with open(path, encoding="utf-8-sig") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("buildings", [])
+        if not isinstance(data, list):
+            raise SpecError("JSON の仕様ファイルは棟の配列 (または buildings に棟の配列を持つオブジェクト) にしてください。")
+        for index, record in enumerate(data, start=1):
+            yield index, record
+    else:
+        # Excel で保存した CSV (UTF-8 BOM 付き / cp932) もそのまま読む
+        with open(path, newline="", encoding=encoding or detect_csv_encoding(path)) as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+
+
+def iter_buildings(path, include_4=False, include_9=True, stats=None, encoding=None):
+    """仕様ファイルの有効な棟を BuildingSpec で1棟ずつ返す (不正な行は stats.skipped に記録して飛ばす)"""
+    for line_no, record in iter_spec_records(path, encoding):
+        try:
+            if isinstance(record, SpecError):
+                raise record
+            yield parse_building(record, include_4, include_9)
+        except SpecError as e:
+            if stats is not None:
+                stats.skipped.append((line_no, str(e)))
+
+
+def stream_rooms(buildings, out, stats=None):
+    """
+    棟ごとの部屋番号を out (テキストのファイルオブジェクト) に1フロアずつ書き出す。
+
+    Returns:
+        StreamStats
+    """
+    stats = stats or StreamStats()
+    start_time = time.perf_counter()
+    for building in buildings:
+        if stats.buildings:
+            out.write("\n") # 棟の間は空行
+            stats.bytes += 1
+        for line in floor_lines(building.rooms, building.floors, building.start,
+                                building.include_4, building.include_9, prefix=building.name):
+            out.write(line)
+            out.write("\n")
+            stats.bytes += len(line.encode("utf-8")) + 1
+        stats.buildings += 1
+        stats.rooms += building.rooms * building.floors
+    stats.elapsed = time.perf_counter() - start_time
+    return stats
+
+
+def generate_from_spec(spec_path, out_path=None, include_4=False, include_9=True, encoding=None):
+    """
+    仕様ファイルの全棟の部屋番号を out_path (省略時は標準出力) に書き出す。
+
+    Returns:
+        StreamStats
+    """
+    stats = StreamStats()
+    buildings = iter_buildings(spec_path, include_4, include_9, stats=stats, encoding=encoding)
+    if out_path:
+        with open(out_path, "w", encoding="utf-8", newline="\n", buffering=WRITE_BUFFER_SIZE) as out:
+            stream_rooms(buildings, out, stats)
+    else:
+        stream_rooms(buildings, sys.stdout, stats)
+        sys.stdout.flush()
+    return stats
+
+
+def _parse_args(argv):
+    spec_path, out_path, include_4, include_9, encoding = None, None, False, True, None
+    args = iter(argv)
+    for arg in args:
+        if arg == "--out":
+            out_path = next(args, None)
+        elif arg == "--include-4":
+            include_4 = True
+        elif arg == "--skip-9":
+            include_9 = False
+        elif arg == "--encoding":
+            encoding = next(args, None)
+        else:
+            spec_path = arg
+    return spec_path, out_path, include_4, include_9, encoding
+
+
+if __name__ == "__main__":
+    spec, output_path, default_4, default_9, spec_encoding = _parse_args(sys.argv[1:])
+    if not spec:
+        print("使い方: python room_spec.py 仕様.csv [--out 出力.txt] [--include-4] [--skip-9] [--encoding cp932]",
+              file=sys.stderr)
+        sys.exit(1)
+    try:
+        result = generate_from_spec(spec, output_path, default_4, default_9, spec_encoding)
+    except (OSError, ValueError) as e:
+        print(f"エラー: 出力できませんでした: {e}", file=sys.stderr)
+        sys.exit(1)
+    for skipped_line, error in result.skipped:
+        print(f"{skipped_line} 行目を飛ばしました: {error}", file=sys.stderr)
+    print(result.summary(), file=sys.stderr)
@@ -0,0 +1,188 @@
+"""
+依存関係のある処理 (ステップ) を、依存していないもの同士は同時に実行する小さな実行器
+
+    graph = StepGraph()
+    graph.add("save_xlsx", save, main_thread=True)          # COM を使う処理は呼び出し元のスレッドで実行
+    graph.add("resolve_folder", resolve)                    # それ以外はスレッドプールで実行
+    graph.add("queue", queue, deps=["save_xlsx", "resolve_folder"])
+    run = graph.run()
+    run.results["resolve_folder"], run.errors, run.summary()
+
+・ステップの関数は依存先の結果を {ステップ名: 結果} の辞書で受け取ります
+・失敗したステップに依存するステップは実行しません (run.skipped)
+・各ステップの開始・終了時刻を記録し、最も時間のかかった依存の経路 (クリティカルパス) を summary() で表示します
+・executor には concurrent.futures.Executor と同じ submit() を持つオブジェクトを渡せます
+  (InlineExecutor を渡すとすべて呼び出し元のスレッドで順に実行します。テストや切り分け用)
+"""
+
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_WORKERS = 4
+
+Step = namedtuple("Step", ["name", "func", "deps", "main_thread"])
+
+
+class InlineExecutor:
+    """submit() した時点で呼び出し元のスレッドで実行する executor"""
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class GraphRun:
+    """StepGraph.run() の結果"""
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.results = {}
+        self.errors = {}   # ステップ名 -> 例外
+        self.skipped = []  # 依存先が失敗したため実行しなかったステップ
+        self.timings = {}  # ステップ名 -> (開始, 終了) (time.perf_counter、run() の開始からの秒数)
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return not self.errors and not self.skipped
+
+    def critical_path(self):
+        """
+        終了が最も遅いステップから、終了が最も遅い依存先を順にたどった経路を返す。
+
+        Returns:
+            list: ステップ名のリスト (開始側から)。
+        """
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n][1])
+        path = [name]
+        while True:
+            deps = [dep for dep in self.steps[name].deps if dep in self.timings]
+            if not deps:
+                break
+            name = max(deps, key=lambda n: self.timings[n][1])
+            path.append(name)
+        return path[::-1]
+
+    def summary(self):
+        parts = []
+        for name in self.critical_path():
+            start, end = self.timings[name]
+            parts.append(f"{name} {end - start:.2f}秒")
+        text = f"所要時間 {self.elapsed:.2f}秒 (クリティカルパス: {' → '.join(parts)})"
+        total = sum(end - start for start, end in self.timings.values())
+        if total > 0:
+            text += f" / 各ステップの合計 {total:.2f}秒"
+        return text
+
+
+class StepGraph:
+    """ステップと依存関係の一覧"""
+
+    def __init__(self):
+        self.steps = {}
+
+    def add(self, name, func, deps=(), main_thread=False):
+        """
+        ステップを追加する。
+
+        Args:
+            func (callable): func(依存先の結果の辞書) を呼ぶ。
+            deps (iterable): 依存するステップ名 (先に add しておく)。
+            main_thread (bool): True の場合は run() を呼んだスレッドで実行する (COM など)。
+        """
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self.steps:
+                raise ValueError(f"依存先のステップがありません: {name} -> {dep}")
+        if name in self.steps:
+            raise ValueError(f"同じ名前のステップがあります: {name}")
+        self.steps[name] = Step(name, func, deps, main_thread)
+
+    def run(self, executor=None, workers=DEFAULT_WORKERS):
+        """
+        すべてのステップを依存関係の順に実行する (依存していないもの同士は同時に実行する)。
+
+        プールのステップが終わると、その時点で実行できるようになったステップをすぐに開始します
+        (呼び出し元のスレッドで別のステップを実行している間も止まりません)。
+
+        Returns:
+            GraphRun
+        """
+        run = GraphRun(self.steps)
+        own_executor = executor is None
+        executor = executor or ThreadPoolExecutor(max_workers=workers)
+        origin = time.perf_counter()
+        lock = threading.RLock()
+        waiting = dict(self.steps)
+        main_queue = queue.Queue()  # 呼び出し元のスレッドで実行するステップ (None で終了)
+
+        def timed(step, inputs):
+            start = time.perf_counter() - origin
+            try:
+                return step.func(inputs)
+            finally:
+                run.timings[step.name] = (start, time.perf_counter() - origin)
+
+        def take_ready():
+            """実行できるようになったステップを waiting から取り出す (依存先が失敗したものはスキップにする)"""
+            ready = []
+            with lock:
+                changed = True
+                while changed:
+                    changed = False
+                    for name, step in list(waiting.items()):
+                        if any(dep in run.errors or dep in run.skipped for dep in step.deps):
+                            run.skipped.append(name)
+                            del waiting[name]
+                            changed = True
+                        elif all(dep in run.results for dep in step.deps):
+                            ready.append((step, {dep: run.results[dep] for dep in step.deps}))
+                            del waiting[name]
+                if not ready and len(run.results) + len(run.errors) + len(run.skipped) == len(self.steps):
+                    main_queue.put(None) # すべて終わった
+            return ready
+
+        def finish(name, future):
+            with lock:
+                try:
+                    run.results[name] = future.result()
+                except BaseException as e:
+                    # SystemExit なども記録する (記録しないと終了の判定ができず run() が戻らない)
+                    run.errors[name] = e
+            launch(take_ready())
+
+        def launch(ready):
+            for step, inputs in ready:
+                if step.main_thread:
+                    main_queue.put((step, inputs))
+                else:
+                    future = executor.submit(timed, step, inputs)
+                    future.add_done_callback(lambda f, name=step.name: finish(name, f))
+
+        try:
+            if not self.steps:
+                main_queue.put(None)
+            launch(take_ready())
+            while True:
+                item = main_queue.get()
+                if item is None:
+                    break
+                step, inputs = item
+                finish(step.name, InlineExecutor().submit(timed, step, inputs))
+        finally:
+            if own_executor:
+                executor.shutdown(wait=True)
+        run.elapsed = time.perf_counter() - origin
+        return run
@@ -0,0 +1,104 @@
+"""
+openpyxl のスタイル (罫線・フォント) 共有キャッシュ
+
+openpyxl では cell.border = Border(...) のたびにブックのスタイル一覧で
+ハッシュ計算と重複チェックが行われます。罫線やフォントの組み合わせは数種類しかないため、
+このモジュールでは Border/Font オブジェクトを事前に作成して使い回し、
+ブックへの登録も1回だけ行ってスタイルID (StyleArray の値) を直接セルに設定します。
+
+使い方:
+    cache = StyleCache.for_workbook(workbook)
+    border = cache.border(left=side_thin, right=side_thin, top=side_thin, bottom=side_hair)
+    cache.apply(sheet, 10, 1, 20, 9, border=border)   # A10:I20 に一括適用
+"""
+
+import weakref
+
+from openpyxl.styles import Border, Side
+from openpyxl.styles.cell_style import StyleArray
+
+_caches = weakref.WeakKeyDictionary()
+
+
+class StyleCache:
+    """ブック単位で Border/Font を登録済みIDとして保持するキャッシュ"""
+
+    def __init__(self, workbook):
+        # _caches の値からブックを強く参照すると、キー (ブック) が解放されなくなるため弱参照で持つ
+        self._workbook_ref = weakref.ref(workbook)
+        self._borders = {}      # (left, right, top, bottom) -> Border
+        self._border_ids = {}   # id(Border) -> (Border, borderId)
+        self._font_ids = {}     # id(Font) -> (Font, fontId)
+
+    @property
+    def workbook(self):
+        workbook = self._workbook_ref()
+        if workbook is None:
+            raise ReferenceError("キャッシュのブックは既に解放されています。")
+        return workbook
+
+    @classmethod
+    def for_workbook(cls, workbook):
+        """ブックごとに1つのキャッシュを返す"""
+        cache = _caches.get(workbook)
+        if cache is None:
+            cache = cls(workbook)
+            _caches[workbook] = cache
+        return cache
+
+    def border(self, left=None, right=None, top=None, bottom=None):
+        """4辺の Side を指定して、同じ組み合わせなら同じ Border オブジェクトを返す"""
+        key = (left, right, top, bottom)
+        border = self._borders.get(key)
+        if border is None:
+            border = Border(left=left or Side(), right=right or Side(),
+                            top=top or Side(), bottom=bottom or Side())
+            self._borders[key] = border
+        return border
+
+    def border_id(self, border):
+        """Border をブックに1回だけ登録し、borderId を返す"""
+        entry = self._border_ids.get(id(border))
+        if entry is None:
+            entry = (border, self.workbook._borders.add(border))
+            self._border_ids[id(border)] = entry
+        return entry[1]
+
+    def font_id(self, font):
+        """Font をブックに1回だけ登録し、fontId を返す"""
+        entry = self._font_ids.get(id(font))
+        if entry is None:
+            entry = (font, self.workbook._fonts.add(font))
+            self._font_ids[id(font)] = entry
+        return entry[1]
+
+    def apply(self, sheet, min_row, min_col, max_row, max_col, border=None, font=None):
+        """
+        矩形範囲のセルにスタイルを一括で設定する (行・列は1始まり、両端を含む)。
+
+        Returns:
+            int: 設定したセル数。
+        """
+        if min_row > max_row or min_col > max_col:
+            return 0
+        border_id = self.border_id(border) if border is not None else None
+        font_id = self.font_id(font) if font is not None else None
+
+        count = 0
+        for row in sheet.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col):
+            for cell in row:
+                style = cell._style
+                if style is None:
+                    style = cell._style = StyleArray()
+                if border_id is not None:
+                    style.borderId = border_id
+                if font_id is not None:
+                    style.fontId = font_id
+                count += 1
+        return count
+
+
+def apply_style_to_range(sheet, min_row, min_col, max_row, max_col, border=None, font=None):
+    """StyleCache.apply の簡易版。ブック単位の共有キャッシュを使用する"""
+    cache = StyleCache.for_workbook(sheet.parent)
+    return cache.apply(sheet, min_row, min_col, max_row, max_col, border=border, font=font)
@@ -0,0 +1,248 @@
+"""
+格納ファイルのコピー・移動をバックグラウンドで行うジャーナル付きの転送処理
+
+save_starred_xlsx は、ローカルのファイル (Downloads の xlsx / PDF / 写真ZIP) ができた時点で
+転送の手順をジャーナル (ローカル保存領域の transfer_journal フォルダ) に書き込み、
+バックグラウンドの転送処理を起動してすぐに戻ります。
+
+・転送処理は1つだけ実行されます (ロックファイルで排他)。保留中のジャーナルをすべて処理し、無くなったら終了します
+・手順ごとに完了をジャーナルに記録するため、異常終了しても次回の起動時に続きから再開します
+・各手順は何度実行しても結果が同じです (格納先に同じ内容があれば完了扱い、移動済みのZIPは完了扱い)
+・共有フォルダに接続できない間は、間隔を延ばしながら再試行します
+・写真ZIPは移動する前に CRC を検証し、破損していれば移動せずに「失敗」として残します (photo_zip)
+
+実行方法:
+    python transfer_journal.py --status   ... 保留中の転送の一覧
+    python transfer_journal.py --run      ... 保留中の転送を今すぐ処理する (通常は自動で起動されます)
+"""
+
+import datetime
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+import zipfile
+
+from file_lock import try_file_lock
+from file_transfer import STATUS_FAILED, Transfer, run_transfers
+from filing_ops import is_created_before_today, move_existing_file
+from local_store import load_json, save_json, store_path
+from photo_zip import check_photo_zip
+
+JOURNAL_VERSION = 1
+JOURNAL_DIR = "transfer_journal"
+
+STEP_PENDING = "保留"
+STEP_DONE = "完了"
+STEP_FAILED = "失敗"
+
+MAX_ATTEMPTS = 20           # これを超えて失敗した手順は「失敗」にする
+INITIAL_RETRY_DELAY = 5.0   # 最初の再試行までの秒数
+MAX_RETRY_DELAY = 300.0     # 再試行間隔の上限 (秒)
+MAX_WORKER_SECONDS = 3600.0 # 転送処理が1回の起動で再試行を続ける最大秒数 (残りは次回の起動で処理)
+LOCK_WAIT_SECONDS = 10.0    # 終了しかけている転送処理のロック解放を待つ秒数
+
+
+def _journal_path(job_id):
+    return store_path(JOURNAL_DIR, f"{job_id}.json")
+
+
+def _lock_path():
+    return store_path(JOURNAL_DIR, "worker.lock")
+
+
+def _history_path():
+    return store_path(JOURNAL_DIR, "history.jsonl")
+
+
+def enqueue_transfers(folder, transfers, zip_repack_level=None):
+    """
+    転送の手順をジャーナルに書き込む。
+
+    Args:
+        folder (str): 格納フォルダ (置き換えるファイルの old フォルダの場所)
+        transfers (list): file_transfer.Transfer のリスト
+        zip_repack_level (int, optional): 写真ZIPを重複を除いて詰め直す場合の圧縮レベル (省略時は検証のみ)
+    Returns:
+        str: ジャーナルのID
+    """
+    now = datetime.datetime.now()
+    job_id = f"{now:%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}"
+    save_json(_journal_path(job_id), {
+        "version": JOURNAL_VERSION,
+        "id": job_id,
+        "created_at": now.isoformat(timespec="seconds"),
+        "folder": os.path.abspath(folder),
+        "steps": [{"source": os.path.abspath(t.source), "target": os.path.abspath(t.target), "move": t.move,
+                   "state": STEP_PENDING, "attempts": 0, "error": None,
+                   "zip_check": t.move and t.source.lower().endswith(".zip"), "repack_level": zip_repack_level}
+                  for t in transfers],
+    })
+    return job_id
+
+
+def load_jobs():
+    """ジャーナル (保留中または失敗した手順があるもの) を作成順に返す"""
+    jobs = []
+    for path in sorted(glob.glob(os.path.join(glob.escape(store_path(JOURNAL_DIR, "")), "*.json"))):
+        job = load_json(path)
+        if job and job.get("version") == JOURNAL_VERSION:
+            jobs.append(job)
+    return jobs
+
+
+def _is_step_already_done(step):
+    """移動の手順で、元のファイルが無く格納先がある場合は前回の実行で完了している"""
+    return step["move"] and not os.path.exists(step["source"]) and os.path.exists(step["target"])
+
+
+def _check_zip_step(step):
+    """写真ZIPを移動する前に CRC を検証する (破損していれば移動せず失敗にする)。一度検証したら再開時は省略する"""
+    try:
+        report = check_photo_zip(step["source"], step.get("repack_level"))
+    except (OSError, zipfile.BadZipFile) as e:
+        step["attempts"] += 1
+        step["error"] = f"写真ZIPを検証できません: {e}"
+        return
+    print(report.summary())
+    if report.ok:
+        step["zip_check"] = False
+    else:
+        step["state"] = STEP_FAILED
+        step["error"] = f"写真ZIPが破損しています (ダウンロードし直してください): {report.errors[0][0]} {report.errors[0][1]}"
+
+
+def process_job(job):
+    """
+    ジャーナル1件の保留中の手順を実行する。
+
+    Returns:
+        bool: 保留中の手順が残っていない場合 True。
+    """
+    folder = job["folder"]
+
+    def move_replaced_file(transfer):
+        # 写真ZIPは常に、xlsx / PDF は今日より前に作成されたものだけ old フォルダへ移動する (今日作成したものは上書き)
+        if transfer.move or is_created_before_today(transfer.target):
+            return move_existing_file(transfer.target, folder)
+        return True
+
+    pending = [step for step in job["steps"] if step["state"] == STEP_PENDING]
+    for step in pending:
+        if _is_step_already_done(step):
+            step["state"] = STEP_DONE
+    pending = [step for step in pending if step["state"] == STEP_PENDING]
+    for step in pending:
+        if step.get("zip_check"):
+            _check_zip_step(step)
+    # 検証できなかった写真ZIP (zip_check が残っている) は移動せず、次回の実行で再試行する
+    pending = [step for step in pending if step["state"] == STEP_PENDING and not step.get("zip_check")]
+
+    if pending:
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError as e:
+            for step in pending:
+                step["attempts"] += 1
+                step["error"] = f"格納フォルダに接続できません: {e}"
+        else:
+            results, stats = run_transfers([Transfer(s["source"], s["target"], s["move"]) for s in pending],
+                                           before_replace=move_replaced_file)
+            for step, result in zip(pending, results):
+                if result.status == STATUS_FAILED:
+                    step["attempts"] += 1
+                    step["error"] = result.error
+                    if not os.path.exists(step["source"]):
+                        step["state"] = STEP_FAILED # 元のファイルが無ければ再試行しても成功しない
+                else:
+                    step["state"] = STEP_DONE
+                    step["error"] = None
+            print(f"[{job['id']}] {stats.summary()}")
+    # 写真ZIPを検証できなかった手順も含め、試行回数の上限に達したものは失敗にする
+    for step in job["steps"]:
+        if step["state"] == STEP_PENDING and step["attempts"] >= MAX_ATTEMPTS:
+            step["state"] = STEP_FAILED
+
+    finished = all(step["state"] != STEP_PENDING for step in job["steps"])
+    if finished and all(step["state"] == STEP_DONE for step in job["steps"]):
+        with open(_history_path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"finished_at": datetime.datetime.now().isoformat(timespec="seconds"), **job},
+                               ensure_ascii=False) + "\n")
+        os.remove(_journal_path(job["id"]))
+    else:
+        # 失敗した手順があるジャーナルは --status で確認できるよう残す
+        save_json(_journal_path(job["id"]), job)
+    return finished
+
+
+def run_worker(max_seconds=MAX_WORKER_SECONDS):
+    """
+    保留中のジャーナルが無くなるまで処理する (別の転送処理が実行中なら何もしない)。
+
+    Returns:
+        bool: この呼び出しで処理を行った場合 True。
+    """
+    with try_file_lock(_lock_path(), timeout=LOCK_WAIT_SECONDS) as locked:
+        if not locked:
+            print("別の転送処理が実行中です。")
+            return False
+
+        start_time = time.monotonic()
+        delay = INITIAL_RETRY_DELAY
+        while True:
+            jobs = [job for job in load_jobs() if any(step["state"] == STEP_PENDING for step in job["steps"])]
+            if not jobs:
+                return True
+            all_finished = True
+            for job in jobs:
+                all_finished &= process_job(job)
+            if all_finished:
+                delay = INITIAL_RETRY_DELAY
+                continue
+            if time.monotonic() - start_time + delay > max_seconds:
+                print("保留中の転送が残っています。次回の起動時に再開します。")
+                return True
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+
+def start_background_worker():
+    """転送処理を別プロセスで起動する (呼び出し元は終了を待たない)。出力は worker.log に追記する"""
+    log = open(store_path(JOURNAL_DIR, "worker.log"), "a", encoding="utf-8")
+    kwargs = {"stdout": log, "stderr": subprocess.STDOUT, "stdin": subprocess.DEVNULL, "close_fds": True}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    try:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--run"], **kwargs)
+    finally:
+        log.close()
+
+
+def print_status():
+    """保留中・失敗した転送の一覧を表示する"""
+    jobs = load_jobs()
+    if not jobs:
+        print("保留中の転送はありません。")
+        return
+    for job in jobs:
+        print(f"[{job['id']}] {job['folder']}")
+        for step in job["steps"]:
+            operation = "移動" if step["move"] else "コピー"
+            line = f"    {step['state']} {operation} {os.path.basename(step['target'])}"
+            if step["state"] != STEP_DONE and step["error"]:
+                line += f" (試行 {step['attempts']} 回: {step['error']})" if step["attempts"] else f" ({step['error']})"
+            print(line)
+
+
+if __name__ == "__main__":
+    if "--run" in sys.argv[1:]:
+        print(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} 転送処理を開始します。")
+        sys.stdout.flush()
+        run_worker()
+    else:
+        print_status()
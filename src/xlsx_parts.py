@@ -0,0 +1,322 @@
+"""
+xlsxパッケージ (zip) 内のパーツを openpyxl を通さずに直接読むためのヘルパー
+
+※workbook.xml と リレーションだけを読み、シート名とシートXMLのパスを対応付けます。
+※シート全体を読み込まずに特定セルの値だけを確認したり (peek_cell_values)、
+　指定したシートだけを openpyxl で読み込んだり (load_workbook_partial) できます。
+"""
+
+import posixpath
+import xml.etree.ElementTree as ET
+
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.utils.cell import coordinate_from_string, get_column_letter
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.worksheet import Worksheet
+
+from defined_name_snapshot import parse_refers_to
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_DOC_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+OFFICE_DOCUMENT_REL = NS_DOC_REL + "/officeDocument"
+WORKSHEET_REL = NS_DOC_REL + "/worksheet"
+
+
+def _rels_path(part_path):
+    """パーツに対応する .rels ファイルのパスを返す (xl/workbook.xml -> xl/_rels/workbook.xml.rels)"""
+    folder, name = posixpath.split(part_path)
+    return posixpath.join(folder, "_rels", f"{name}.rels")
+
+
+def _resolve_target(source_part, target):
+    """リレーションの Target をパッケージ内の絶対パス (先頭スラッシュなし) に変換する"""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    folder = posixpath.dirname(source_part)
+    return posixpath.normpath(posixpath.join(folder, target))
+
+
+def read_relationships(zf, part_path):
+    """パーツのリレーションを {Id: (Type, 絶対パス)} の辞書で返す"""
+    rels_path = _rels_path(part_path)
+    try:
+        root = ET.fromstring(zf.read(rels_path))
+    except KeyError:
+        return {}
+    rels = {}
+    for rel in root.iter(f"{{{NS_PKG_REL}}}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        rels[rel.get("Id")] = (rel.get("Type"), _resolve_target(part_path, rel.get("Target", "")))
+    return rels
+
+
+def find_workbook_part(zf):
+    """パッケージのルートリレーションから workbook.xml のパスを取得する"""
+    try:
+        root = ET.fromstring(zf.read("_rels/.rels"))
+    except KeyError:
+        return "xl/workbook.xml"
+    for rel in root.iter(f"{{{NS_PKG_REL}}}Relationship"):
+        if rel.get("Type") == OFFICE_DOCUMENT_REL:
+            return rel.get("Target", "").lstrip("/")
+    return "xl/workbook.xml"
+
+
+def read_sheet_parts(zf):
+    """
+    workbook.xml を読み、ワークシートの一覧をブック内の順序で返す。
+
+    Returns:
+        list: (シート名, シートXMLのパス, 表示状態) のタプルのリスト。
+              チャートシートなどワークシート以外は含まない。
+    """
+    workbook_part = find_workbook_part(zf)
+    rels = read_relationships(zf, workbook_part)
+    root = ET.fromstring(zf.read(workbook_part))
+
+    sheets = []
+    for sheet in root.iter(f"{{{NS_MAIN}}}sheet"):
+        rel = rels.get(sheet.get(f"{{{NS_DOC_REL}}}id"))
+        if rel is None or rel[0] != WORKSHEET_REL:
+            continue
+        sheets.append((sheet.get("name"), rel[1], sheet.get("state", "visible")))
+    return sheets
+
+
+def find_styles_part(zf):
+    """workbook.xml のリレーションから styles.xml のパスを取得する"""
+    workbook_part = find_workbook_part(zf)
+    for rel_type, target in read_relationships(zf, workbook_part).values():
+        if rel_type == NS_DOC_REL + "/styles":
+            return target
+    return None
+
+
+def find_shared_strings_part(zf):
+    """workbook.xml のリレーションから sharedStrings.xml のパスを取得する"""
+    workbook_part = find_workbook_part(zf)
+    for rel_type, target in read_relationships(zf, workbook_part).values():
+        if rel_type == NS_DOC_REL + "/sharedStrings":
+            return target
+    return None
+
+
+def read_defined_names(zf):
+    """
+    workbook.xml の名前定義を読む。
+
+    Returns:
+        list: (名前, localSheetId (ブックレベルなら None), 参照式) のタプルのリスト。
+    """
+    root = ET.fromstring(zf.read(find_workbook_part(zf)))
+    names = []
+    for element in root.iter(f"{{{NS_MAIN}}}definedName"):
+        local_id = element.get("localSheetId")
+        names.append((element.get("name"), int(local_id) if local_id is not None else None, element.text or ""))
+    return names
+
+
+def defined_name_sheets(zf, names):
+    """指定した名前定義が参照しているシート名の集合を返す"""
+    sheets = set()
+    for name, _, text in read_defined_names(zf):
+        if name not in names:
+            continue
+        try:
+            sheets.update(sheet for sheet, _ in DefinedName(name=name, attr_text=text).destinations)
+        except Exception:
+            continue  # 数式や #REF! など、セル参照でない名前は無視
+    return sheets
+
+
+def read_defined_name_values(zf, names):
+    """
+    名前定義が参照しているセルの値を読む (Excel の excel.Range(名前).Value の代わり)。
+
+    名前は アクティブシートのシートレベルの名前 → ブックレベルの名前 → "." 以降の短縮名 の順に探します。
+    範囲を参照している名前は左上のセルの値を返します。
+
+    Returns:
+        dict: {名前: 値}。名前が無い、またはセル参照でない場合は None。
+    """
+    workbook_part = find_workbook_part(zf)
+    root = ET.fromstring(zf.read(workbook_part))
+    view = root.find(f"{{{NS_MAIN}}}bookViews/{{{NS_MAIN}}}workbookView")
+    active_id = int(view.get("activeTab", 0)) if view is not None else 0
+
+    global_names, active_names = {}, {}
+    for name, local_id, text in read_defined_names(zf):
+        if local_id is None:
+            global_names[name] = text
+        elif local_id == active_id:
+            active_names[name] = text
+
+    def lookup(name):
+        for candidate in (name, name.split(".")[-1]):
+            for table in (active_names, global_names):
+                if candidate in table:
+                    return table[candidate]
+        return None
+
+    # 参照先のセルをシートごとにまとめ、シートXMLを1回ずつ読む
+    parts = {title: part for title, part, _ in read_sheet_parts(zf)}
+    wanted = {}
+    for name in names:
+        parsed = parse_refers_to("=" + (lookup(name) or ""))
+        if parsed is not None and parsed[0] in parts:
+            sheet, row, col = parsed[:3]
+            wanted.setdefault(sheet, []).append((name, f"{get_column_letter(col)}{row}"))
+
+    values = dict.fromkeys(names)
+    shared_strings = _SharedStrings(zf)
+    for sheet, refs in wanted.items():
+        cells = peek_cell_values(zf, parts[sheet], [coord for _, coord in refs], shared_strings)
+        for name, coord in refs:
+            values[name] = cells[coord]
+    return values
+
+
+class _SharedStrings:
+    """sharedStrings.xml を必要なインデックスまでだけ順に読む"""
+
+    def __init__(self, zf):
+        self._strings = []
+        part = find_shared_strings_part(zf)
+        self._events = ET.iterparse(zf.open(part), events=("end",)) if part else iter(())
+
+    def __getitem__(self, index):
+        for _, element in self._events:
+            if element.tag != f"{{{NS_MAIN}}}si":
+                continue
+            # ふりがな (rPh) を除いた文字列部分だけを連結する
+            texts = [t.text or "" for t in element.findall(f"{{{NS_MAIN}}}t")]
+            texts += [t.text or "" for t in element.findall(f"{{{NS_MAIN}}}r/{{{NS_MAIN}}}t")]
+            self._strings.append("".join(texts))
+            element.clear()
+            if len(self._strings) > index:
+                break
+        return self._strings[index]
+
+
+def _cell_value(element, shared_strings):
+    """<c> 要素の値を返す。数式セルは openpyxl (data_only=False) と同様に "=数式" を返す"""
+    formula = element.find(f"{{{NS_MAIN}}}f")
+    if formula is not None:
+        return f"={formula.text or ''}"
+    cell_type = element.get("t", "n")
+    if cell_type == "inlineStr":
+        return "".join(t.text or "" for t in element.iter(f"{{{NS_MAIN}}}t"))
+    value = element.findtext(f"{{{NS_MAIN}}}v")
+    if value is None:
+        return None
+    if cell_type == "s":
+        return shared_strings[int(value)]
+    if cell_type == "b":
+        return value == "1"
+    if cell_type in ("str", "e"):
+        return value
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def peek_cell_values(zf, sheet_part, coordinates, shared_strings=None):
+    """
+    シートXMLを先頭から読み、指定セルの値だけを取得する (最後の指定行を過ぎたら読み込みを止める)。
+
+    Returns:
+        dict: {座標: 値}。セルが存在しない場合は None。日付は数値 (シリアル値) のまま返す。
+    """
+    wanted = {coord.upper() for coord in coordinates}
+    last_row = max(coordinate_from_string(coord)[1] for coord in wanted)
+    shared_strings = shared_strings or _SharedStrings(zf)
+    values = dict.fromkeys(wanted)
+
+    with zf.open(sheet_part) as fh:
+        for _, element in ET.iterparse(fh, events=("end",)):
+            if element.tag == f"{{{NS_MAIN}}}c":
+                ref = element.get("r")
+                if ref in wanted:
+                    values[ref] = _cell_value(element, shared_strings)
+            elif element.tag == f"{{{NS_MAIN}}}row":
+                if int(element.get("r", 0)) >= last_row:
+                    break
+                element.clear()
+            elif element.tag == f"{{{NS_MAIN}}}sheetData":
+                break
+    return values
+
+
+def iter_column_values(zf, sheet_part, column, max_row=None, shared_strings=None):
+    """
+    シートXMLを先頭から読み、指定列のセル値を (行番号, 値) の形で順に返す (空のセルは返さない)。
+
+    Args:
+        column (str): 列名 ("B" など)。
+        max_row (int, optional): この行を過ぎたら読み込みを止める。
+    """
+    column = column.upper()
+    shared_strings = shared_strings or _SharedStrings(zf)
+    with zf.open(sheet_part) as fh:
+        for _, element in ET.iterparse(fh, events=("end",)):
+            if element.tag == f"{{{NS_MAIN}}}c":
+                ref = element.get("r", "")
+                if ref.rstrip("0123456789") == column:
+                    row = int(ref[len(column):])
+                    if max_row is not None and row > max_row:
+                        return
+                    value = _cell_value(element, shared_strings)
+                    if value is not None and value != "":
+                        yield row, value
+            elif element.tag == f"{{{NS_MAIN}}}row":
+                if max_row is not None and int(element.get("r", 0)) >= max_row:
+                    return
+                element.clear()
+            elif element.tag == f"{{{NS_MAIN}}}sheetData":
+                return
+
+
+class _PartialExcelReader(ExcelReader):
+    """指定したシートだけを解析し、それ以外は空のシートで位置だけを保持する ExcelReader"""
+
+    def __init__(self, filename, sheet_titles, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.sheet_titles = set(sheet_titles)
+
+    def read_worksheets(self):
+        find_sheets = self.parser.find_sheets
+        self.parser.find_sheets = lambda: (
+            (sheet, rel) for sheet, rel in find_sheets()
+            if sheet.name in self.sheet_titles or "chartsheet" in rel.Type
+        )
+        try:
+            super().read_worksheets()
+        finally:
+            del self.parser.find_sheets
+
+        # 読み込まなかったシートは空のシートとして元の順序に差し込む (localSheetId の位置を保つため)
+        loaded = {ws.title: ws for ws in self.wb._sheets}
+        ordered = []
+        for sheet, rel in find_sheets():
+            ws = loaded.get(sheet.name)
+            if ws is None:
+                if rel.target not in self.valid_files:
+                    continue
+                ws = Worksheet(self.wb, title=sheet.name)
+                ws.sheet_state = sheet.state
+            ordered.append(ws)
+        self.wb._sheets = ordered
+
+
+def load_workbook_partial(filename, sheet_titles, **kwargs):
+    """
+    指定したシートだけを解析して openpyxl の Workbook を返す。
+
+    ※読み込まなかったシートは空になっているため、このブックを workbook.save() で保存してはいけません。
+    　(XlsxPatchWriter で変更シートだけを書き換えてください)
+    """
+    reader = _PartialExcelReader(filename, sheet_titles, **kwargs)
+    reader.read()
+    return reader.wb
@@ -0,0 +1,491 @@
+"""
+xlsxの部分書き換え (パッチ) 保存モジュール
+
+openpyxl の workbook.save() はパッケージ全体を書き直すため、画像や図形など
+openpyxl が扱えない要素が失われ、シート数が多いブックでは保存も遅くなります。
+このモジュールは変更したセルを含むシートXMLと、必要な場合のみ styles.xml を書き換え、
+それ以外の zip メンバーは圧縮済みのバイト列のままコピーします。
+
+使い方:
+    writer = XlsxPatchWriter(filepath)
+    cell.value = "合格"
+    writer.mark_value(cell)                        # 値を変更したセル
+    writer.mark_style(sheet, 10, 1, 20, 9)         # 罫線を変更した範囲 (行・列は1始まり)
+    writer.save(workbook)                          # 変更セルの値/罫線を workbook から読み出して書き込む
+
+パッチで表現できない変更 (数式セルの上書きなど) の場合は PatchError を送出するので、
+呼び出し側で workbook.save() にフォールバックしてください。
+"""
+
+import datetime
+import os
+import re
+import shutil
+import struct
+import tempfile
+import time
+import zipfile
+from copy import copy
+from xml.sax.saxutils import escape, unescape
+
+from openpyxl.styles.numbers import BUILTIN_FORMATS_REVERSE
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string, get_column_letter
+from openpyxl.utils.datetime import to_excel
+from openpyxl.xml.functions import tostring
+
+from xlsx_parts import find_styles_part, read_sheet_parts
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# --- 正規表現パターン (シートXML / styles.xml をテキストのまま扱う) ---
+sheet_data_pattern = re.compile(r"<sheetData\s*/>|<sheetData>(.*?)</sheetData>", re.DOTALL)
+row_pattern = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.DOTALL)
+cell_pattern = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.DOTALL)
+attr_pattern = re.compile(r'([\w:]+)="([^"]*)"')
+dimension_pattern = re.compile(r'<dimension\s+ref="([^"]*)"\s*/>')
+xf_pattern = re.compile(r"<xf\b[^>]*?(?:/>|>.*?</xf>)", re.DOTALL)
+border_pattern = re.compile(r"<border\b[^>]*?(?:/>|>.*?</border>)", re.DOTALL)
+num_fmt_pattern = re.compile(r'<numFmt\b[^>]*numFmtId="(\d+)"[^>]*formatCode="([^"]*)"[^>]*/>')
+
+
+class PatchError(Exception):
+    """パッチ方式で保存できない変更が含まれている場合に送出する例外"""
+
+
+def _parse_attrs(attr_text):
+    return dict(attr_pattern.findall(attr_text))
+
+
+def _format_attrs(attrs):
+    return "".join(f' {key}="{value}"' for key, value in attrs.items())
+
+
+def _split_ref(ref):
+    """'F10' -> (10, 6)"""
+    letters, row = coordinate_from_string(ref)
+    return row, column_index_from_string(letters)
+
+
+class _StylesPatch:
+    """styles.xml の cellXfs / borders / numFmts に必要なエントリだけを追記する"""
+
+    def __init__(self, xml_text):
+        self.xml_text = xml_text
+        self.changed = False
+        self._xfs = self._read_block("cellXfs", xf_pattern)
+        self._borders = self._read_block("borders", border_pattern)
+        self._border_ids = {}
+        for index, border_xml in enumerate(self._borders):
+            self._border_ids.setdefault(self._normalize(border_xml), index)
+        self._num_fmts = {unescape(code, {"&quot;": '"'}): int(fmt_id)
+                          for fmt_id, code in num_fmt_pattern.findall(xml_text)}
+        self._new_num_fmts = []
+        self._derived = {}
+
+    def _read_block(self, tag, element_pattern):
+        match = re.search(rf"<{tag}\b[^>]*>(.*?)</{tag}>", self.xml_text, re.DOTALL)
+        if match is None:
+            raise PatchError(f"styles.xml に <{tag}> が見つかりません。")
+        return element_pattern.findall(match.group(1))
+
+    @staticmethod
+    def _normalize(element_xml):
+        return re.sub(r">\s+<", "><", element_xml.strip())
+
+    def border_id(self, border):
+        """openpyxl の Border に対応する borderId を返す (無ければ追加する)"""
+        border_xml = tostring(border.to_tree()).decode("utf-8")
+        key = self._normalize(border_xml)
+        if key not in self._border_ids:
+            self._border_ids[key] = len(self._borders)
+            self._borders.append(border_xml)
+            self.changed = True
+        return self._border_ids[key]
+
+    def num_fmt_id(self, format_code):
+        """表示形式コードに対応する numFmtId を返す (組み込みに無ければ追加する)"""
+        if format_code in BUILTIN_FORMATS_REVERSE:
+            return BUILTIN_FORMATS_REVERSE[format_code]
+        if format_code not in self._num_fmts:
+            fmt_id = max([163] + list(self._num_fmts.values())) + 1
+            self._num_fmts[format_code] = fmt_id
+            self._new_num_fmts.append((fmt_id, format_code))
+            self.changed = True
+        return self._num_fmts[format_code]
+
+    def derive(self, style_id, border=None, number_format=None):
+        """既存の xf を元に罫線/表示形式だけを差し替えた xf のインデックスを返す"""
+        if style_id >= len(self._xfs):
+            style_id = 0
+        border_id = self.border_id(border) if border is not None else None
+        fmt_id = self.num_fmt_id(number_format) if number_format is not None else None
+        key = (style_id, border_id, fmt_id)
+        if key in self._derived:
+            return self._derived[key]
+
+        xf_xml = self._xfs[style_id]
+        open_tag = re.match(r"<xf\b([^>]*?)(/?>)", xf_xml)
+        attrs = _parse_attrs(open_tag.group(1))
+        if border_id is not None:
+            attrs["borderId"] = str(border_id)
+            attrs["applyBorder"] = "1"
+        if fmt_id is not None:
+            attrs["numFmtId"] = str(fmt_id)
+            attrs["applyNumberFormat"] = "1"
+        new_xml = f"<xf{_format_attrs(attrs)}{open_tag.group(2)}{xf_xml[open_tag.end():]}"
+
+        if self._normalize(new_xml) == self._normalize(xf_xml):
+            new_id = style_id
+        else:
+            new_id = len(self._xfs)
+            self._xfs.append(new_xml)
+            self.changed = True
+        self._derived[key] = new_id
+        return new_id
+
+    def _replace_block(self, text, tag, elements):
+        body = "".join(elements)
+        return re.sub(rf"<{tag}\b[^>]*>.*?</{tag}>",
+                      lambda m: f'<{tag} count="{len(elements)}">{body}</{tag}>', text, count=1, flags=re.DOTALL)
+
+    def to_xml(self):
+        text = self._replace_block(self.xml_text, "cellXfs", self._xfs)
+        text = self._replace_block(text, "borders", self._borders)
+        if self._new_num_fmts:
+            new_entries = "".join(f'<numFmt numFmtId="{fmt_id}" formatCode="{escape(code, {chr(34): "&quot;"})}"/>'
+                                  for fmt_id, code in self._new_num_fmts)
+            match = re.search(r"<numFmts\b[^>]*>(.*?)</numFmts>", text, re.DOTALL)
+            if match:
+                count = len(num_fmt_pattern.findall(match.group(1))) + len(self._new_num_fmts)
+                text = (text[:match.start()] + f'<numFmts count="{count}">{match.group(1)}{new_entries}</numFmts>'
+                        + text[match.end():])
+            else:
+                # numFmts は styleSheet の最初の子要素でなければならない
+                root_tag = re.search(r"<styleSheet\b[^>]*>", text)
+                text = (text[:root_tag.end()] + f'<numFmts count="{len(self._new_num_fmts)}">{new_entries}</numFmts>'
+                        + text[root_tag.end():])
+        return text
+
+
+def _value_xml(value):
+    """セル値を (t属性, 子要素XML) に変換する"""
+    if value is None:
+        return None, ""
+    if isinstance(value, bool):
+        return "b", f"<v>{int(value)}</v>"
+    if isinstance(value, (int, float)):
+        return None, f"<v>{value!r}</v>"
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return None, f"<v>{to_excel(value)!r}</v>"
+    text = str(value)
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return "inlineStr", f"<is><t{space}>{escape(text)}</t></is>"
+
+
+def _build_cell(row, col, attrs, inner, sheet, flags, styles):
+    """1セル分のXMLを組み立てる。flags は ('値を書き換えるか', '罫線を書き換えるか')"""
+    value_changed, style_changed = flags
+    cell = sheet.cell(row=row, column=col)
+    attrs = dict(attrs)
+    attrs["r"] = f"{get_column_letter(col)}{row}"
+
+    number_format = None
+    if value_changed:
+        if inner and "<f" in inner:
+            raise PatchError(f"数式セル {sheet.title}!{attrs['r']} の上書きはパッチ保存に対応していません。")
+        if cell.data_type == "f":
+            raise PatchError(f"数式の書き込み ({sheet.title}!{attrs['r']}) はパッチ保存に対応していません。")
+        if isinstance(cell.value, (datetime.datetime, datetime.date, datetime.time)):
+            number_format = cell.number_format
+        for key in ("t", "cm", "vm"):
+            attrs.pop(key, None)
+        cell_type, inner = _value_xml(cell.value)
+        if cell_type:
+            attrs["t"] = cell_type
+
+    if style_changed or number_format is not None:
+        style_id = styles.derive(int(attrs.get("s", 0)),
+                                 border=cell.border if style_changed else None,
+                                 number_format=number_format)
+        if style_id:
+            attrs["s"] = str(style_id)
+        else:
+            attrs.pop("s", None)
+
+    # 属性の順序は r を先頭に揃える
+    ordered = {"r": attrs.pop("r")}
+    ordered.update(attrs)
+    if inner:
+        return f"<c{_format_attrs(ordered)}>{inner}</c>"
+    return f"<c{_format_attrs(ordered)}/>"
+
+
+def _patch_row(row_attrs, row_inner, row, cells, sheet_title, build):
+    """
+    1行分のXMLに変更セルを反映する。
+
+    Args:
+        cells (dict): {列番号: 変更内容}
+        build (callable): build(行, 列, 既存の属性, 既存の子要素XML, 既存のセルXML (無ければ None), 変更内容)
+                          で新しいセルXMLを返す関数 (空文字ならセルを削除)。
+    """
+    existing = []
+    for match in cell_pattern.finditer(row_inner or ""):
+        attrs = _parse_attrs(match.group(1))
+        if "r" not in attrs:
+            raise PatchError(f"シート '{sheet_title}' に座標 (r属性) のないセルがあります。")
+        existing.append((_split_ref(attrs["r"])[1], attrs, match.group(2), match.group(0)))
+
+    pieces = []
+    pending = sorted(cells.items())
+    index = 0
+    for col, attrs, inner, original in existing:
+        while index < len(pending) and pending[index][0] < col:
+            new_col, flags = pending[index]
+            pieces.append(build(row, new_col, {}, "", None, flags))
+            index += 1
+        if index < len(pending) and pending[index][0] == col:
+            pieces.append(build(row, col, attrs, inner, original, pending[index][1]))
+            index += 1
+        else:
+            pieces.append(original)
+    for new_col, flags in pending[index:]:
+        pieces.append(build(row, new_col, {}, "", None, flags))
+
+    row_attrs = dict(row_attrs)
+    row_attrs["r"] = str(row)
+    if "spans" in row_attrs:
+        columns = [col for col, _, _, _ in existing] + list(cells)
+        row_attrs["spans"] = f"{min(columns)}:{max(columns)}"
+    ordered = {"r": row_attrs.pop("r")}
+    ordered.update(row_attrs)
+    return f"<row{_format_attrs(ordered)}>{''.join(pieces)}</row>"
+
+
+def _patch_sheet_xml(xml_text, changes, sheet_title, build):
+    """
+    シートXMLの sheetData に変更セルを反映する。
+
+    Args:
+        changes (dict): {(行, 列): 変更内容}。変更内容はそのまま build に渡す (_patch_row を参照)。
+    """
+    data_match = sheet_data_pattern.search(xml_text)
+    if data_match is None:
+        raise PatchError(f"シート '{sheet_title}' の sheetData が見つかりません。")
+
+    by_row = {}
+    for (row, col), flags in changes.items():
+        by_row.setdefault(row, {})[col] = flags
+
+    pieces = []
+    pending_rows = sorted(by_row)
+    index = 0
+    data_inner = data_match.group(1) or ""
+    last_end = 0
+    for match in row_pattern.finditer(data_inner):
+        attrs = _parse_attrs(match.group(1))
+        if "r" not in attrs:
+            raise PatchError(f"シート '{sheet_title}' に行番号 (r属性) のない行があります。")
+        row = int(attrs["r"])
+        pieces.append(data_inner[last_end:match.start()])
+        last_end = match.end()
+        while index < len(pending_rows) and pending_rows[index] < row:
+            new_row = pending_rows[index]
+            pieces.append(_patch_row({}, "", new_row, by_row[new_row], sheet_title, build))
+            index += 1
+        if index < len(pending_rows) and pending_rows[index] == row:
+            pieces.append(_patch_row(attrs, match.group(2), row, by_row[row], sheet_title, build))
+            index += 1
+        else:
+            pieces.append(match.group(0))
+    pieces.append(data_inner[last_end:])
+    for new_row in pending_rows[index:]:
+        pieces.append(_patch_row({}, "", new_row, by_row[new_row], sheet_title, build))
+
+    new_data = f"<sheetData>{''.join(pieces)}</sheetData>"
+    xml_text = xml_text[:data_match.start()] + new_data + xml_text[data_match.end():]
+
+    # dimension (使用範囲) を変更セルまで広げる
+    rows = [row for row, _ in changes]
+    cols = [col for _, col in changes]
+    dim_match = dimension_pattern.search(xml_text)
+    if dim_match:
+        ref = dim_match.group(1)
+        bounds = [_split_ref(part) for part in ref.split(":")]
+        rows += [row for row, _ in bounds]
+        cols += [col for _, col in bounds]
+        new_ref = f"{get_column_letter(min(cols))}{min(rows)}:{get_column_letter(max(cols))}{max(rows)}"
+        xml_text = xml_text[:dim_match.start()] + f'<dimension ref="{new_ref}"/>' + xml_text[dim_match.end():]
+    return xml_text
+
+
+def _copy_raw_member(src_fp, zout, info):
+    """zip メンバーを再圧縮せず、ローカルヘッダーごとバイト列のままコピーする"""
+    src_fp.seek(info.header_offset)
+    header = src_fp.read(30)
+    if header[:4] != b"PK\x03\x04":
+        raise PatchError(f"zip メンバー '{info.filename}' のヘッダーが不正です。")
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    remaining = name_len + extra_len + info.compress_size
+
+    new_info = copy(info)
+    new_info.header_offset = zout.fp.tell()
+    zout.fp.write(header)
+    while remaining > 0:
+        chunk = src_fp.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise PatchError(f"zip メンバー '{info.filename}' のデータが途中で終わっています。")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+
+    if info.flag_bits & 0x08:
+        # データディスクリプタ (シグネチャ有無の両方に対応)
+        descriptor = src_fp.read(16)
+        size = 16 if descriptor[:4] == b"PK\x07\x08" else 12
+        zout.fp.write(descriptor[:size])
+
+    zout.filelist.append(new_info)
+    zout.NameToInfo[new_info.filename] = new_info
+    zout.start_dir = zout.fp.tell()
+    zout._didModify = True
+    return 30 + name_len + extra_len + info.compress_size
+
+
+class XlsxPatchWriter:
+    """変更セルを記録し、対象シートのXMLだけを書き換えて保存するライター"""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._changes = {}  # シート名 -> {(行, 列): [値変更, 罫線変更]}
+
+    def _flags(self, sheet, row, col):
+        return self._changes.setdefault(sheet.title, {}).setdefault((row, col), [False, False])
+
+    def mark_value(self, cell):
+        """値を書き換えたセルを記録する"""
+        self._flags(cell.parent, cell.row, cell.column)[0] = True
+
+    def mark_style(self, sheet, min_row, min_col, max_row, max_col):
+        """罫線を書き換えた範囲を記録する (行・列は1始まり、両端を含む)"""
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                self._flags(sheet, row, col)[1] = True
+
+    @property
+    def has_changes(self):
+        return any(self._changes.values())
+
+    def save(self, workbook, dest=None, snapshot=None):
+        """
+        記録したセルの値・罫線を workbook から読み出し、対象パーツだけを書き換えて保存する。
+
+        Args:
+            snapshot (dict, optional): 指定すると、書き換え前のセルXMLを {シート名: {座標: セルXML}} の形で
+                                       格納する (元々セルが無かった場合は None)。restore_cells() で元に戻せる。
+        Returns:
+            dict: 書き換えたパーツ数、無変更でコピーしたメンバー数/バイト数、所要秒数。
+        """
+        start_time = time.perf_counter()
+        with zipfile.ZipFile(self.filepath) as zin:
+            sheet_parts = {title: part for title, part, _ in read_sheet_parts(zin)}
+            styles_part = find_styles_part(zin)
+            if styles_part is None:
+                raise PatchError("styles.xml が見つかりません。")
+            styles = _StylesPatch(zin.read(styles_part).decode("utf-8"))
+
+            patched = {}
+            for title, changes in self._changes.items():
+                if not changes:
+                    continue
+                if title not in sheet_parts:
+                    raise PatchError(f"シート '{title}' のXMLが見つかりません。")
+                sheet = workbook[title]
+                originals = snapshot.setdefault(title, {}) if snapshot is not None else None
+
+                def build(row, col, attrs, inner, original, flags, sheet=sheet, originals=originals):
+                    if originals is not None:
+                        originals[f"{get_column_letter(col)}{row}"] = original
+                    return _build_cell(row, col, attrs, inner, sheet, flags, styles)
+
+                part = sheet_parts[title]
+                xml_text = zin.read(part).decode("utf-8")
+                patched[part] = _patch_sheet_xml(xml_text, changes, title, build).encode("utf-8")
+            if styles.changed:
+                patched[styles_part] = styles.to_xml().encode("utf-8")
+            temp_path, stats = self._write_temp_package(zin, patched, dest or self.filepath)
+        _replace_file(temp_path, dest or self.filepath)
+        stats["seconds"] = time.perf_counter() - start_time
+        return stats
+
+    def restore_cells(self, originals, dest=None):
+        """
+        save(snapshot=...) で記録した書き換え前のセルXMLを書き戻す。
+        styles.xml は追記しかしていないため、元のセルXMLのスタイル番号はそのまま使える。
+
+        Args:
+            originals (dict): {シート名: {座標: セルXML (元々セルが無かった場合は None)}}
+        Returns:
+            dict: save() と同じ統計情報。
+        """
+        start_time = time.perf_counter()
+        with zipfile.ZipFile(self.filepath) as zin:
+            sheet_parts = {title: part for title, part, _ in read_sheet_parts(zin)}
+            patched = {}
+            for title, cells in originals.items():
+                if not cells:
+                    continue
+                if title not in sheet_parts:
+                    raise PatchError(f"シート '{title}' のXMLが見つかりません。")
+                changes = {_split_ref(coord): original or "" for coord, original in cells.items()}
+
+                def build(row, col, attrs, inner, original, fragment):
+                    return fragment
+
+                part = sheet_parts[title]
+                xml_text = zin.read(part).decode("utf-8")
+                patched[part] = _patch_sheet_xml(xml_text, changes, title, build).encode("utf-8")
+            temp_path, stats = self._write_temp_package(zin, patched, dest or self.filepath)
+        _replace_file(temp_path, dest or self.filepath)
+        stats["seconds"] = time.perf_counter() - start_time
+        return stats
+
+    def _write_temp_package(self, zin, patched, dest):
+        """
+        patched のメンバーだけを差し替え、それ以外はそのままコピーした zip を dest と同じフォルダに作成する。
+
+        Returns:
+            tuple: (一時ファイルのパス, 統計情報)
+        """
+        stats = {"patched_parts": 0, "copied_members": 0, "copied_bytes": 0, "seconds": 0.0}
+
+        # 同じフォルダに一時ファイルを作成してから置き換える (保存途中で失敗しても元ファイルは残る)
+        fd, temp_path = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(os.path.abspath(dest)))
+        os.close(fd)
+        try:
+            shutil.copymode(self.filepath, temp_path) # mkstemp は所有者のみの権限で作成するため元の権限に揃える
+            with open(self.filepath, "rb") as src_fp, \
+                    zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as zout:
+                for info in zin.infolist():
+                    if info.filename in patched:
+                        new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                        new_info.compress_type = zipfile.ZIP_DEFLATED
+                        new_info.external_attr = info.external_attr
+                        zout.writestr(new_info, patched[info.filename])
+                        stats["patched_parts"] += 1
+                    else:
+                        stats["copied_bytes"] += _copy_raw_member(src_fp, zout, info)
+                        stats["copied_members"] += 1
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return temp_path, stats
+
+
+def _replace_file(temp_path, dest):
+    """一時ファイルで dest を置き換える"""
+    try:
+        os.replace(temp_path, dest)
+    except OSError:
+        # 別ボリュームなどで置き換えできない場合はコピーで上書き
+        shutil.copyfile(temp_path, dest)
+        os.remove(temp_path)
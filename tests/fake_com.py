@@ -0,0 +1,245 @@
+"""
+Excel (COM) の代替オブジェクト (tests と benchmarks から使う。製品のモジュールからは使わない)
+
+Excel を使わずに名前定義の取得 (defined_name_snapshot) を確認できるよう、
+wb.Names / wb.Worksheets / ws.Range / excel.Range と同じ属性を持つオブジェクトを用意します。
+プロパティ取得・メソッド呼び出し・列挙のたびに FakeCom.calls を1つ増やすため、
+COM 呼び出し回数の比較にも使えます。
+
+    com = FakeCom()
+    wb = FakeWorkbook(com)
+    info = wb.add_sheet("情報")
+    info.cells[(2, 2)] = 12345
+    wb.add_name("HOUSES.BUILDING_NO", "=情報!$B$2")
+    excel = FakeExcel(com, wb, info)
+
+legacy_defined_name_lookup は変更前の save_starred_xlsx と同じ手順で名前の値を取得します
+(DefinedNameSnapshot の結果と比較するための基準)。
+"""
+
+import re
+
+from openpyxl.utils.cell import column_index_from_string
+
+from defined_name_snapshot import parse_refers_to, split_local_name
+
+
+class FakeCom:
+    """COM 呼び出し (プロパティ取得・メソッド呼び出し・列挙) の回数を数える"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def hit(self):
+        self.calls += 1
+
+
+class FakeName:
+    def __init__(self, com, name, refers_to):
+        self._com, self._name, self._refers_to = com, name, refers_to
+
+    @property
+    def Name(self):
+        self._com.hit()
+        return self._name
+
+    @property
+    def RefersTo(self):
+        self._com.hit()
+        return self._refers_to
+
+
+class FakeNames:
+    def __init__(self, com, names):
+        self._com, self._names = com, names
+
+    def __iter__(self):
+        for name in self._names:
+            self._com.hit() # IEnumVARIANT.Next
+            yield name
+
+    def Item(self, full_name):
+        """Excel と同じく Name.Name と完全に一致する名前を返す (大文字・小文字は区別しない)"""
+        self._com.hit()
+        for name in self._names:
+            if name._name.lower() == full_name.lower():
+                return name
+        raise Exception(f"名前 '{full_name}' が見つかりません")
+
+
+class FakeRange:
+    def __init__(self, com, sheet, r1, c1, r2, c2):
+        self._com, self._sheet, self._bounds = com, sheet, (r1, c1, r2, c2)
+
+    @property
+    def Value(self):
+        self._com.hit()
+        r1, c1, r2, c2 = self._bounds
+        if r1 == r2 and c1 == c2:
+            return self._sheet.cells.get((r1, c1))
+        return tuple(tuple(self._sheet.cells.get((r, c)) for c in range(c1, c2 + 1)) for r in range(r1, r2 + 1))
+
+
+class FakeConstant:
+    """参照先がセルではない名前 (=0.1 など) の excel.Range(名前)"""
+
+    def __init__(self, com, value):
+        self._com, self._value = com, value
+
+    @property
+    def Value(self):
+        self._com.hit()
+        return self._value
+
+
+class FakeWorksheet:
+    def __init__(self, com, title):
+        self._com, self.title = com, title
+        self.cells = {}         # (行, 列) -> 値
+        self.local_names = []   # ws.Names (このシートのシートレベルの名前)
+
+    @property
+    def Name(self):
+        self._com.hit()
+        return self.title
+
+    @property
+    def Names(self):
+        self._com.hit()
+        return FakeNames(self._com, self.local_names)
+
+    def Range(self, address):
+        self._com.hit()
+        match = re.fullmatch(r"\$?([A-Z]+)\$?(\d+)(?::\$?([A-Z]+)\$?(\d+))?", address)
+        c1, r1 = column_index_from_string(match.group(1)), int(match.group(2))
+        c2 = column_index_from_string(match.group(3)) if match.group(3) else c1
+        r2 = int(match.group(4)) if match.group(4) else r1
+        return FakeRange(self._com, self, r1, c1, r2, c2)
+
+
+class FakeWorksheets:
+    def __init__(self, com, sheets):
+        self._com, self._sheets = com, sheets
+
+    def __call__(self, title):
+        self._com.hit()
+        for sheet in self._sheets:
+            if sheet.title == title:
+                return sheet
+        raise KeyError(title)
+
+    def __iter__(self):
+        for sheet in self._sheets:
+            self._com.hit()
+            yield sheet
+
+
+class FakeWorkbook:
+    def __init__(self, com):
+        self._com = com
+        self.sheets = []
+        self.names = [] # wb.Names (シートレベルの名前も "シート名!名前" で含む)
+
+    def add_sheet(self, title):
+        sheet = FakeWorksheet(self._com, title)
+        self.sheets.append(sheet)
+        return sheet
+
+    def add_name(self, full_name, refers_to):
+        """
+        名前を追加する ("シート名!名前" はそのシートのシートレベルの名前にもなる)。
+
+        full_name は Excel の Name.Name と同じ形で指定する (引用符が必要なシート名だけ 'My Sheet'!NAME)。
+        """
+        name = FakeName(self._com, full_name, refers_to)
+        self.names.append(name)
+        sheet_title, _ = split_local_name(full_name)
+        if sheet_title is not None:
+            next(s for s in self.sheets if s.title == sheet_title).local_names.append(name)
+        return name
+
+    @property
+    def Names(self):
+        self._com.hit()
+        return FakeNames(self._com, self.names)
+
+    @property
+    def Worksheets(self):
+        self._com.hit()
+        return FakeWorksheets(self._com, self.sheets)
+
+
+class FakeExcel:
+    """excel.Range(名前) を Excel と同じく、アクティブシートのシートレベル → ブックレベルの順で解決する"""
+
+    def __init__(self, com, workbook, active_sheet):
+        self._com, self._workbook, self._active = com, workbook, active_sheet
+
+    def Range(self, reference):
+        """参照式として解釈する ('My Sheet'!NAME と My Sheet の引用符の有無は Name.Name と関係なく解決する)"""
+        self._com.hit()
+        sheet, local = split_local_name(reference)
+        candidates = [(sheet, local)] if sheet is not None else [(self._active.title, local), (None, local)]
+        for candidate_sheet, candidate in candidates:
+            for name in self._workbook.names:
+                name_sheet, name_local = split_local_name(name._name)
+                if name_sheet != candidate_sheet or name_local.lower() != candidate.lower():
+                    continue
+                parsed = parse_refers_to(name._refers_to)
+                if parsed is None:
+                    return FakeConstant(self._com, name._refers_to.lstrip("="))
+                sheet = next(s for s in self._workbook.sheets if s.title == parsed[0])
+                return FakeRange(self._com, sheet, *parsed[1:])
+        raise Exception(f"名前 '{reference}' が見つかりません")
+
+
+def legacy_defined_name_lookup(excel, wb, names):
+    """
+    変更前の save_starred_xlsx と同じ手順 (名前定義の辞書作成 + 名前ごとに excel.Range) で値を取得する。
+
+    Returns:
+        dict: 名前 -> 値 (見つからない名前は None)
+    """
+    defined_names_dict = {}
+    for name_obj in wb.Names:
+        refers = name_obj.RefersTo
+        if refers:
+            defined_names_dict[name_obj.Name] = refers
+            if '.' in name_obj.Name:
+                short_name = name_obj.Name.split('.')[-1]
+                if short_name not in defined_names_dict:
+                    defined_names_dict[short_name] = refers
+    for ws_item in wb.Worksheets:
+        for name_obj in ws_item.Names:
+            refers = name_obj.RefersTo
+            if refers and name_obj.Name not in defined_names_dict:
+                defined_names_dict[name_obj.Name] = refers
+                if '.' in name_obj.Name:
+                    short_name = name_obj.Name.split('.')[-1]
+                    if short_name not in defined_names_dict:
+                        defined_names_dict[short_name] = refers
+
+    def get_value_by_defined_name(name):
+        if name in defined_names_dict:
+            try:
+                return excel.Range(name).Value
+            except Exception:
+                pass
+        if '.' in name:
+            short = name.split('.')[-1]
+            if short in defined_names_dict:
+                try:
+                    return excel.Range(short).Value
+                except Exception:
+                    pass
+        try:
+            return excel.Range(name).Value
+        except Exception:
+            if '.' in name:
+                try:
+                    return excel.Range(name.split('.')[-1]).Value
+                except Exception:
+                    return None
+            return None
+
+    return {name: get_value_by_defined_name(name) for name in names}
@@ -0,0 +1,110 @@
+"""
+DefinedNameSnapshot の値が、変更前の名前ごとの excel.Range (fake_com.legacy_defined_name_lookup) と一致するか
+
+実行方法:
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest  # noqa: E402
+
+from defined_name_snapshot import DefinedNameSnapshot  # noqa: E402
+from fake_com import FakeCom, FakeExcel, FakeWorkbook, legacy_defined_name_lookup  # noqa: E402
+
+LOOKUP_NAMES = [
+    # ブックレベルの名前
+    "HOUSES.BUILDING_NO", "HOUSES.ADDRESS", "AREA", "TAX_RATE",
+    # "HOUSES." 付きの名前が無く、短縮名だけが定義されている
+    "HOUSES.SERVICE_ID",
+    # アクティブシートのシートレベルの名前 (同名のブックレベルの名前より優先)
+    "BUILDING_STATE", "LOCAL_ONLY",
+    # 別のシートのシートレベルの名前 (アクティブシートからは見えない)
+    "OTHER_ONLY", "Print_Area",
+    # 存在しない名前
+    "HOUSES.MISSING", "MISSING",
+]
+
+
+def make_workbook():
+    com = FakeCom()
+    wb = FakeWorkbook(com)
+    info = wb.add_sheet("情報")
+    other = wb.add_sheet("別紙")
+    info.cells.update({(2, 2): 12345, (3, 2): "愛知県名古屋市", (4, 2): "FOO", (5, 2): "新築",
+                       (6, 2): "シートの状態", (7, 2): "情報だけ", (2, 4): 1, (3, 4): 2})
+    other.cells.update({(1, 1): "別紙だけ", (2, 1): "印刷範囲"})
+
+    wb.add_name("HOUSES.BUILDING_NO", "=情報!$B$2")
+    wb.add_name("HOUSES.ADDRESS", "=情報!$B$3")
+    wb.add_name("SERVICE_ID", "=情報!$B$4")
+    wb.add_name("BUILDING_STATE", "=情報!$B$5")
+    wb.add_name("AREA", "=情報!$D$2:$D$3")
+    wb.add_name("TAX_RATE", "=0.1")
+    wb.add_name("情報!BUILDING_STATE", "=情報!$B$6")
+    wb.add_name("情報!LOCAL_ONLY", "=情報!$B$7")
+    wb.add_name("別紙!OTHER_ONLY", "=別紙!$A$1")
+    wb.add_name("別紙!Print_Area", "=別紙!$A$1:$A$2")
+    return com, wb, info
+
+
+@pytest.mark.parametrize("names", [None, LOOKUP_NAMES], ids=["全名前を列挙", "使う名前を指定"])
+def test_snapshot_matches_legacy_lookup(names):
+    com, wb, info = make_workbook()
+    excel = FakeExcel(com, wb, info)
+    expected = legacy_defined_name_lookup(excel, wb, LOOKUP_NAMES)
+
+    snapshot = DefinedNameSnapshot.capture(excel, wb, info, names)
+    assert {name: snapshot.get(name) for name in LOOKUP_NAMES} == expected
+
+
+def test_lookup_order():
+    com, wb, info = make_workbook()
+    snapshot = DefinedNameSnapshot.capture(FakeExcel(com, wb, info), wb, info)
+
+    assert snapshot.get("HOUSES.BUILDING_NO") == 12345
+    assert snapshot.get("HOUSES.SERVICE_ID") == "FOO"               # 短縮名で見つかる
+    assert snapshot.get("BUILDING_STATE") == "シートの状態"          # シートレベルが優先
+    assert snapshot.get("AREA") == ((1,), (2,))
+    assert snapshot.get("TAX_RATE") == "0.1"                        # 定数は excel.Range から取得
+    assert snapshot.get("OTHER_ONLY") is None                       # 別のシートの名前
+    assert snapshot.get("HOUSES.MISSING") is None
+
+
+def test_snapshot_uses_fewer_com_calls():
+    com, wb, info = make_workbook()
+    excel = FakeExcel(com, wb, info)
+    legacy_defined_name_lookup(excel, wb, LOOKUP_NAMES)
+    legacy_calls = com.calls
+
+    com.calls = 0
+    snapshot = DefinedNameSnapshot.capture(excel, wb, info, LOOKUP_NAMES)
+    for name in LOOKUP_NAMES:
+        snapshot.get(name)
+    assert com.calls < legacy_calls
+
+
+@pytest.mark.parametrize("sheet_title, name_prefix", [
+    ("情報", "情報"),              # 引用符が要らないシート名
+    ("Sheet1", "Sheet1"),
+    ("My Sheet", "'My Sheet'"),    # 空白を含む
+    ("1月", "'1月'"),               # 数字で始まる
+])
+def test_sheet_level_name_with_and_without_quotes(sheet_title, name_prefix):
+    com = FakeCom()
+    wb = FakeWorkbook(com)
+    sheet = wb.add_sheet(sheet_title)
+    sheet.cells.update({(1, 1): "ブック", (2, 1): "シート"})
+    wb.add_name("STATE", f"={name_prefix}!$A$1")
+    wb.add_name(f"{name_prefix}!STATE", f"={name_prefix}!$A$2")
+    excel = FakeExcel(com, wb, sheet)
+    expected = legacy_defined_name_lookup(excel, wb, ["STATE"])
+    assert expected == {"STATE": "シート"}
+
+    for names in (None, ["STATE"]):
+        snapshot = DefinedNameSnapshot.capture(excel, wb, sheet, names)
+        assert snapshot.get("STATE") == "シート"
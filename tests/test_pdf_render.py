@@ -0,0 +1,41 @@
+"""
+pdf_render.format_value の表示形式 (Excel と同じ表示になるか)
+
+実行方法:
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import pytest  # noqa: E402
+
+from pdf_render import format_value  # noqa: E402
+
+
+@pytest.mark.parametrize("value, number_format, expected", [
+    # .5 は Excel と同じく0から遠い方へ丸める (偶数への丸めにしない)
+    (1234.5, "#,##0", "1,235"),
+    (2.5, "0", "3"),
+    (0.5, "0", "1"),
+    (-2.5, "0", "-3"),
+    (0.125, "0.00", "0.13"),
+    (1.005, "0.00", "1.01"),
+    (0.045, "0.0%", "4.5%"),
+    (0.285, "0%", "29%"),
+    (1234.4, "#,##0", "1,234"),
+    (1234567, "#,##0", "1,234,567"),
+    (1500, '#,##0"円"', "1,500円"),
+    (1e30, "0", "1" + "0" * 30),
+])
+def test_format_value_rounds_half_away_from_zero(value, number_format, expected):
+    assert format_value(value, number_format) == expected
+
+
+def test_format_value_general():
+    assert format_value(3.0) == "3"
+    assert format_value(0.1) == "0.1"
+    assert format_value(None) == ""
+    assert format_value(True) == "TRUE"